@@ -1,13 +1,16 @@
-from fastapi import APIRouter, Depends
-from fastapi.responses import JSONResponse
+from typing import Optional
+from fastapi import APIRouter, Depends, Request, Query
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
+from app.core.payload import EncodedPayload
 
 from app.api.v1.endpoints import (
     platforms,
     categories,
     hot_items,
+    hot_item_keys,
     crawl_tasks,
     auth,
     admin,
@@ -36,6 +39,12 @@ api_router.include_router(
     tags=["hot-items"]
 )
 
+api_router.include_router(
+    hot_item_keys.router,
+    prefix="/hot-item-keys",
+    tags=["hot-items"]
+)
+
 api_router.include_router(
     crawl_tasks.router,
     prefix="/crawl-tasks",
@@ -61,34 +70,98 @@ api_router.include_router(
 )
 
 # 聚合热榜路由
+# 热榜服务返回预编码的响应体，直接作为响应返回，不再重复编码
+JSON_MEDIA_TYPE = "application/json; charset=utf-8"
+
+
+def encoded_response(request: Request, payload: EncodedPayload) -> Response:
+    """返回预编码的响应体，内容未变化时返回304"""
+    headers = payload.headers()
+    if payload.is_not_modified(
+        request.headers.get("if-none-match"),
+        request.headers.get("if-modified-since")
+    ):
+        return Response(status_code=304, headers=headers)
+    
+    body, content_encoding = payload.encode(request.headers.get("accept-encoding", ""))
+    if content_encoding:
+        headers["Content-Encoding"] = content_encoding
+    return Response(content=body, media_type=JSON_MEDIA_TYPE, headers=headers)
+
+
 @api_router.get("/hot", tags=["hot-lists"])
-async def get_all_hot_lists(db: AsyncSession = Depends(get_db)):
+async def get_all_hot_lists(request: Request, db: AsyncSession = Depends(get_db)):
     """获取所有平台的热榜数据"""
     from app.services.hot_list_service import HotListService
     from loguru import logger
     
     logger.info("API endpoint /hot called")
     service = HotListService(db)
-    logger.info("HotListService created, calling get_all_hot_lists")
     result = await service.get_all_hot_lists()
-    logger.info(f"Service returned result: {type(result)}, keys: {result.keys() if isinstance(result, dict) else 'not dict'}")
-    return result
+    logger.info(f"Service returned {len(result)} bytes")
+    return encoded_response(request, result)
+
+
+@api_router.get("/hot/stream", tags=["hot-lists"])
+async def stream_hot_lists(platforms: Optional[str] = Query(None, description="只推送这些平台，逗号分隔")):
+    """以Server-Sent Events推送热榜变化
+
+    每次爬取提交后推送 diff 事件（各分类新上榜、下榜和排名变化的条目），
+    客户端积压过多时推送 resync 事件，此时应重新拉取完整热榜。
+    """
+    from app.services.hot_list_stream import hot_list_stream
+    
+    platform_filter = {name.strip() for name in platforms.split(",") if name.strip()} if platforms else None
+    return StreamingResponse(
+        hot_list_stream.events(platform_filter),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        }
+    )
+
+
+@api_router.get("/hot/clusters", tags=["hot-lists"])
+async def get_story_clusters(
+    min_platforms: int = Query(2, ge=1, le=20, description="至少出现在几个平台"),
+    limit: int = Query(50, ge=1, le=200, description="返回数量")
+):
+    """获取跨平台热点聚类
+
+    各平台标题近似的条目归为同一事件，按跨平台热度（各平台内归一化后的热度之和）降序。
+    """
+    from app.services.cluster_service import cluster_service
+    
+    clusters = await cluster_service.get_clusters(min_platforms, limit)
+    if clusters is None:
+        return JSONResponse(
+            status_code=503,
+            content={"success": False, "error": "聚类结果暂不可用", "data": None}
+        )
+    return {"success": True, "data": {"clusters": clusters, "total": len(clusters)}}
 
 
 @api_router.get("/hot/{platform_name}", tags=["hot-lists"])
-async def get_platform_hot_list(platform_name: str, db: AsyncSession = Depends(get_db)):
+async def get_platform_hot_list(platform_name: str, request: Request, db: AsyncSession = Depends(get_db)):
     """获取指定平台的热榜数据"""
     from app.services.hot_list_service import HotListService
     
     service = HotListService(db)
     result = await service.get_platform_hot_list(platform_name)
-    return JSONResponse(content=result, media_type="application/json; charset=utf-8")
+    return encoded_response(request, result)
 
 
 @api_router.get("/hot/{platform_name}/{category_name}", tags=["hot-lists"])
-async def get_category_hot_list(platform_name: str, category_name: str, db: AsyncSession = Depends(get_db)):
+async def get_category_hot_list(
+    platform_name: str,
+    category_name: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
     """获取指定平台分类的热榜数据"""
     from app.services.hot_list_service import HotListService
     
     service = HotListService(db)
-    return await service.get_category_hot_list(platform_name, category_name)
\ No newline at end of file
+    result = await service.get_category_hot_list(platform_name, category_name)
+    return encoded_response(request, result)
@@ -1,6 +1,7 @@
 from . import platforms
 from . import categories
 from . import hot_items
+from . import hot_item_keys
 from . import crawl_tasks
 from . import auth
 from . import admin
@@ -10,6 +11,7 @@ __all__ = [
     "platforms",
     "categories", 
     "hot_items",
+    "hot_item_keys",
     "crawl_tasks",
     "auth",
     "admin",
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
 from app.core.database import get_db
 from app.services.hot_list_service import HotListService
@@ -10,12 +10,18 @@ router = APIRouter()
 
 @router.get("/")
 async def get_crawl_tasks(
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    limit: int = Query(20, ge=1, le=100, description="每页数量"),
+    cursor: Optional[int] = Query(None, description="上一页返回的 next_cursor"),
+    crawler_name: Optional[str] = Query(None, description="爬虫名称"),
+    status: Optional[str] = Query(None, description="任务状态")
 ):
-    """获取爬虫任务列表"""
+    """获取爬虫任务列表（按时间倒序，键集分页）"""
     service = HotListService(db)
     try:
-        tasks = await service.get_crawl_tasks()
+        tasks = await service.get_crawl_tasks(
+            limit=limit, before_id=cursor, crawler_name=crawler_name, status=status
+        )
         return {"success": True, "data": tasks}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -31,6 +37,8 @@ async def create_crawl_task(
     try:
         task = await service.create_crawl_task(task_data)
         return {"success": True, "data": task}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -47,5 +55,7 @@ async def get_crawl_task(
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
         return {"success": True, "data": task}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -5,6 +5,8 @@ from datetime import datetime
 from loguru import logger
 
 from app.crawlers.crawler_manager import crawler_manager
+from app.crawlers.validators import get_saved_cycles
+from app.crawlers.host_guard import host_guard
 from app.core.scheduler import scheduler
 
 router = APIRouter()
@@ -39,13 +41,9 @@ async def trigger_crawl_single(crawler_name: str, background_tasks: BackgroundTa
             )
         
         # 在后台执行单个爬虫
-        async def run_single_crawler():
-            items = await crawler_manager.crawl_single(crawler_name)
-            if items:
-                await crawler_manager.save_to_database({crawler_name: items})
-                await crawler_manager._clear_cache()
-        
-        background_tasks.add_task(run_single_crawler)
+        background_tasks.add_task(
+            crawler_manager.crawl_and_persist, [crawler_name], conditional=False, trigger="manual"
+        )
         
         return {
             "success": True,
@@ -162,6 +160,11 @@ async def get_crawler_status():
                 "scheduler_running": scheduler.is_running,
                 "total_crawlers": len(crawler_manager.crawlers),
                 "available_crawlers": list(crawler_manager.crawlers.keys()),
+                "crawl_schedule": scheduler.get_crawl_schedule(),
+                # 因上游内容未变化而跳过解析和写库的周期数
+                "saved_cycles": await get_saved_cycles(),
+                # 熔断中的主机及剩余冷却秒数
+                "open_circuits": await host_guard.get_open_circuits(),
                 "system_time": datetime.now().isoformat()
             }
         }
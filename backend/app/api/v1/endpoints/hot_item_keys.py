@@ -0,0 +1,86 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List
+from datetime import datetime, timedelta, timezone
+
+from app.core.database import get_db
+from app.services.history_service import history_service, RESOLUTIONS
+from app.core.config import settings
+from app.models.hot_item_history import HotItemKey
+
+router = APIRouter()
+
+
+# 历史查询参数：降采样粒度与时间范围（不超过历史保留期）
+RESOLUTION_PATTERN = "^(" + "|".join(RESOLUTIONS) + ")$"
+MAX_HISTORY_HOURS = settings.HISTORY_RETENTION_DAYS * 24
+MAX_HISTORY_IDS = 50
+
+
+def _parse_key_ids(raw_ids: List[str]) -> List[int]:
+    try:
+        return [int(raw_id) for raw_id in raw_ids]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="条目ID格式错误")
+
+
+def history_window(hours: int) -> tuple:
+    until = datetime.now(timezone.utc)
+    return until - timedelta(hours=hours), until
+
+
+async def item_key_history(db: AsyncSession, key_id: int, resolution: str, hours: int) -> Dict[str, Any]:
+    """单个排名历史条目的变化序列，条目不存在时返回404"""
+    since, until = history_window(hours)
+    try:
+        points = (await history_service.get_series(db, [key_id], resolution, since, until)).get(key_id)
+        if points is None and await db.get(HotItemKey, key_id) is None:
+            raise HTTPException(status_code=404, detail="热榜条目不存在")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取排名历史失败: {str(e)}")
+    return {
+        "item_key_id": key_id,
+        "resolution": resolution,
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "points": points or [],
+    }
+
+
+@router.get("/history")
+async def get_item_keys_history(
+    ids: str = Query(..., description="排名历史条目ID（热榜条目的 item_key_id），逗号分隔"),
+    db: AsyncSession = Depends(get_db),
+    resolution: str = Query("1h", pattern=RESOLUTION_PATTERN, description="降采样粒度：5m/1h/1d"),
+    hours: int = Query(24, ge=1, le=MAX_HISTORY_HOURS, description="最近N小时")
+):
+    """批量获取排名历史条目的排名/热度变化序列"""
+    key_ids = _parse_key_ids([raw_id.strip() for raw_id in ids.split(",") if raw_id.strip()])
+    if not key_ids or len(key_ids) > MAX_HISTORY_IDS:
+        raise HTTPException(status_code=400, detail=f"条目ID数量应为 1-{MAX_HISTORY_IDS} 个")
+    since, until = history_window(hours)
+    
+    try:
+        series = await history_service.get_series(db, key_ids, resolution, since, until)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取排名历史失败: {str(e)}")
+    return {
+        "resolution": resolution,
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "items": {str(key_id): series.get(key_id, []) for key_id in key_ids},
+    }
+
+
+@router.get("/{item_key_id}/history")
+async def get_item_key_history(
+    item_key_id: str,
+    db: AsyncSession = Depends(get_db),
+    resolution: str = Query("1h", pattern=RESOLUTION_PATTERN, description="降采样粒度：5m/1h/1d"),
+    hours: int = Query(24, ge=1, le=MAX_HISTORY_HOURS, description="最近N小时")
+):
+    """获取单个排名历史条目的排名/热度变化序列，条目落榜后仍可查询"""
+    key_id = _parse_key_ids([item_key_id])[0]
+    return await item_key_history(db, key_id, resolution, hours)
@@ -1,10 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
+from typing import Optional
 from datetime import datetime, timedelta, timezone
+import uuid
 
 from app.core.database import get_db
 from app.services.hot_list_service import HotListService
+from app.models.hot_item import HotItem
+from app.models.hot_item_history import HotItemKey
+from app.api.v1.endpoints.hot_item_keys import (
+    RESOLUTION_PATTERN,
+    MAX_HISTORY_HOURS,
+    history_window,
+    item_key_history
+)
 from app.schemas.hot_item import HotItemResponse, HotItemListResponse
 from app.schemas.common import PaginationParams
 
@@ -45,6 +55,52 @@ async def get_hot_items(
         raise HTTPException(status_code=500, detail=f"获取热榜数据失败: {str(e)}")
 
 
+@router.get("/{item_id}/history")
+async def get_hot_item_history(
+    item_id: str,
+    db: AsyncSession = Depends(get_db),
+    resolution: str = Query("1h", pattern=RESOLUTION_PATTERN, description="降采样粒度：5m/1h/1d"),
+    hours: int = Query(24, ge=1, le=MAX_HISTORY_HOURS, description="最近N小时")
+):
+    """获取当前热榜条目的排名/热度变化序列
+
+    item_id 与条目详情接口相同（hot_items.id），条目落榜后按 item_key_id
+    使用 /hot-item-keys/{item_key_id}/history 查询。
+    """
+    try:
+        item_uuid = uuid.UUID(item_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="条目ID格式错误")
+    
+    try:
+        item = await db.get(HotItem, item_uuid)
+        key_id = item.item_key_id if item is not None else None
+        if item is not None and key_id is None:
+            # item_key_id 列补齐之前写入的条目，按 (category_id, url) 查找
+            result = await db.execute(
+                select(HotItemKey.id).where(
+                    HotItemKey.category_id == item.category_id,
+                    HotItemKey.url == item.url
+                )
+            )
+            key_id = result.scalar()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取排名历史失败: {str(e)}")
+    if item is None:
+        raise HTTPException(status_code=404, detail="热榜条目不存在")
+    if key_id is None:
+        since, until = history_window(hours)
+        return {
+            "item_id": item_id,
+            "item_key_id": None,
+            "resolution": resolution,
+            "since": since.isoformat(),
+            "until": until.isoformat(),
+            "points": [],
+        }
+    return {"item_id": item_id, **await item_key_history(db, key_id, resolution, hours)}
+
+
 @router.get("/{item_id}", response_model=HotItemResponse)
 async def get_hot_item(
     item_id: str,
@@ -64,7 +120,7 @@ async def get_hot_item(
         raise HTTPException(status_code=500, detail=f"获取热榜条目失败: {str(e)}")
 
 
-@router.get("/trending/today", response_model=List[HotItemResponse])
+@router.get("/trending/today")
 async def get_trending_today(
     db: AsyncSession = Depends(get_db),
     limit: int = Query(50, ge=1, le=200, description="返回数量")
@@ -82,7 +138,7 @@ async def get_trending_today(
         raise HTTPException(status_code=500, detail=f"获取今日热门失败: {str(e)}")
 
 
-@router.get("/trending/week", response_model=List[HotItemResponse])
+@router.get("/trending/week")
 async def get_trending_week(
     db: AsyncSession = Depends(get_db),
     limit: int = Query(50, ge=1, le=200, description="返回数量")
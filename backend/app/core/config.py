@@ -45,14 +45,64 @@ class Settings(BaseSettings):
     CRAWLER_DELAY: float = 1.0  # 爬取延迟（秒）
     CRAWLER_TIMEOUT: int = 30   # 请求超时（秒）
     CRAWLER_RETRY_TIMES: int = 3  # 重试次数
+    CRAWLER_POOL_SIZE: int = 100  # 共享连接池总连接数
+    CRAWLER_POOL_PER_HOST: int = 6  # 每个主机的最大连接数
+    CRAWLER_DNS_CACHE_TTL: int = 600  # DNS缓存时间（秒）
+    CRAWLER_KEEPALIVE_TIMEOUT: int = 60  # 空闲连接保持时间（秒）
+    CRAWLER_PARSE_EXECUTOR: str = "process"  # HTML解析执行器：process（进程池）或 thread（线程池）
+    CRAWLER_PARSE_WORKERS: int = 2  # 解析执行器的工作进程/线程数
+    CRAWLER_PARSER: str = "lxml"  # BeautifulSoup解析后端，不可用时回退到 html.parser
+    CRAWLER_CONDITIONAL_FETCH: bool = True  # 按ETag/Last-Modified/响应体哈希跳过内容未变化的爬取周期
+    CRAWLER_VALIDATOR_TTL: int = 3600  # 校验器保存时间（秒），过期后下一次爬取强制完整入库并重新生成快照
+    CRAWLER_PAGE_CONCURRENCY: int = 3  # 单个爬虫并发抓取分页的上限
+    CRAWLER_HEDGE_DELAY: float = 1.5  # 备用来源竞速时，前一个来源多久没有结果就启动下一个（秒）
+    CRAWLER_HOST_BURST: int = 3  # 每个主机令牌桶容量，按 CRAWLER_DELAY 补充令牌
+    CRAWLER_CIRCUIT_THRESHOLD: int = 3  # 主机连续失败多少次后熔断
+    CRAWLER_CIRCUIT_WINDOW: int = 7200  # 失败计数保留时间（秒），应覆盖最长爬取间隔以便跨周期累计
+    CRAWLER_CIRCUIT_COOLDOWN: int = 300  # 首次熔断冷却时间（秒），探测失败后加倍
+    CRAWLER_CIRCUIT_MAX_COOLDOWN: int = 3600  # 最长熔断冷却时间（秒）
     
     # 缓存配置
     CACHE_EXPIRE_TIME: int = 300  # 缓存过期时间（秒）
     HOT_LIST_CACHE_TIME: int = 600  # 热榜缓存时间（秒）
+    LOCAL_CACHE_MAX_ENTRIES: int = 256  # 进程内一级缓存最大条目数
+    LOCAL_CACHE_TTL: int = 60  # 进程内一级缓存过期时间（秒），失效通知丢失时兜底
+    SNAPSHOT_REDIS_TTL: int = 21600  # 热榜快照在Redis中的保存时间（秒），过期后从数据库回填
+    
+    # 热榜推送配置
+    STREAM_QUEUE_SIZE: int = 16  # 每个推送连接的待发送消息上限，超出后要求客户端重新拉取
+    STREAM_KEEPALIVE_SECONDS: int = 15  # 推送连接心跳间隔（秒）
     
     # 定时任务配置
     SCHEDULER_TIMEZONE: str = "Asia/Shanghai"
-    CRAWL_INTERVAL_MINUTES: int = 30  # 爬取间隔（分钟）
+    CRAWL_INTERVAL_MINUTES: int = 30  # 爬取间隔（分钟），各爬虫的初始间隔
+    CRAWL_MIN_INTERVAL_MINUTES: float = 5  # 自适应爬取间隔下限（分钟）
+    CRAWL_MAX_INTERVAL_MINUTES: float = 120  # 自适应爬取间隔上限（分钟）
+    CRAWL_CHURN_HIGH: float = 0.3  # 榜单变化比例高于该值时缩短间隔
+    CRAWL_CHURN_LOW: float = 0.05  # 榜单变化比例低于该值时延长间隔
+    CRAWL_JITTER_SECONDS: int = 60  # 每次定时爬取的随机延迟上限（秒），错开各爬虫的执行时间
+    CRAWL_QUEUE_SIZE: int = 4  # 爬取结果入库队列长度
+    CRAWL_TELEMETRY_BATCH_SIZE: int = 20  # 爬取记录攒够该数量后批量写入
+    CRAWL_TELEMETRY_FLUSH_SECONDS: int = 30  # 爬取记录最长缓存时间（秒）
+    DATA_STALE_MINUTES: Optional[float] = None  # 最新快照超过该时间（分钟）未更新时就绪检查报告数据过期，未设置时按最长爬取间隔推算
+    LEADER_LOCK_TTL: int = 15  # 调度主节点租约时长（秒），主节点宕机后最迟在该时间后被接管
+    LEADER_RENEW_INTERVAL: int = 5  # 主节点续期/从节点竞选间隔（秒）
+    
+    # 排名历史配置
+    HISTORY_RETENTION_DAYS: int = 30  # 排名历史保留天数，按天分区整体删除
+    HISTORY_PARTITIONS_AHEAD: int = 2  # 提前创建的每日分区数量
+    
+    # 热门趋势配置
+    TRENDING_TODAY_HALF_LIFE_HOURS: float = 6  # 今日热门的热度半衰期（小时）
+    TRENDING_WEEK_HALF_LIFE_HOURS: float = 36  # 本周热门的热度半衰期（小时）
+    TRENDING_VELOCITY_WEIGHT: float = 0.5  # 排名变化对热度的加权，排名上升一整个榜单长度时热度乘以 1 + 该值
+    TRENDING_MAX_ITEMS: int = 2000  # 每个热门窗口最多保留的条目数
+    
+    # 热点聚类配置
+    CLUSTER_NUM_PERM: int = 60  # 标题 MinHash 签名长度
+    CLUSTER_BANDS: int = 30  # LSH 分段数，每段 CLUSTER_NUM_PERM / CLUSTER_BANDS 个值；30段×2时相似度0.4的标题成为候选的概率约99.5%
+    CLUSTER_SIMILARITY: float = 0.4  # 标题字符二元组 Jaccard 相似度不低于该值时归为同一聚类
+    CLUSTER_SNAPSHOT_TTL: int = 7200  # 聚类结果在Redis中的保存时间（秒）
     
     # 日志配置
     LOG_LEVEL: str = "INFO"
@@ -96,6 +146,11 @@ class Settings(BaseSettings):
         # 确保上传目录存在
         upload_dir = Path(self.UPLOAD_DIR)
         upload_dir.mkdir(parents=True, exist_ok=True)
+        
+        # 榜单几乎不变时爬取间隔会升到 CRAWL_MAX_INTERVAL_MINUTES，内容未变化的爬取不重新生成快照，
+        # 校验器过期后的下一次爬取才会强制重新生成，两者之和内没有新快照仍属正常
+        if self.DATA_STALE_MINUTES is None:
+            self.DATA_STALE_MINUTES = self.CRAWL_MAX_INTERVAL_MINUTES + self.CRAWLER_VALIDATOR_TTL / 60
 
 
 # 创建全局配置实例
@@ -1,10 +1,25 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import MetaData
-from typing import AsyncGenerator
+from sqlalchemy import MetaData, inspect, text
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from typing import AsyncGenerator, Dict, Set, Tuple
 from loguru import logger
+import time
 
 from app.core.config import settings
+from app.core.metrics import DB_POOL_WAIT, DB_POOL_CHECKED_OUT
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """记录连接借出等待时间的连接池，连接池耗尽时等待时间会明显上升"""
+    
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - started)
+
 
 # 创建异步数据库引擎
 if settings.DATABASE_URL.startswith("sqlite"):
@@ -20,7 +35,9 @@ else:
         max_overflow=0,
         pool_pre_ping=True,
         pool_recycle=3600,
+        poolclass=InstrumentedQueuePool,
     )
+    DB_POOL_CHECKED_OUT.set_function(engine.pool.checkedout)
 
 # 创建异步会话工厂
 AsyncSessionLocal = async_sessionmaker(
@@ -46,6 +63,111 @@ convention = {
 Base.metadata = MetaData(naming_convention=convention)
 
 
+# create_all 不会修改已存在的表，以下为已有数据库（PostgreSQL和SQLite）需要补齐的结构
+
+# 已有表缺失时补齐的列：(表, 列, 类型)，按当前表结构判断后 ADD COLUMN，失败时启动失败
+SCHEMA_COLUMNS = [
+    # 爬取记录的分阶段耗时
+    ("crawl_tasks", "crawler_name", "VARCHAR(50)"),
+    ("crawl_tasks", "trigger", "VARCHAR(20)"),
+    ("crawl_tasks", "items_inserted", "INTEGER DEFAULT 0"),
+    ("crawl_tasks", "items_updated", "INTEGER DEFAULT 0"),
+    ("crawl_tasks", "requests_count", "INTEGER DEFAULT 0"),
+    ("crawl_tasks", "bytes_downloaded", "BIGINT DEFAULT 0"),
+    ("crawl_tasks", "dns_ms", "INTEGER"),
+    ("crawl_tasks", "connect_ms", "INTEGER"),
+    ("crawl_tasks", "crawl_ms", "INTEGER"),
+    ("crawl_tasks", "parse_ms", "INTEGER"),
+    ("crawl_tasks", "queue_wait_ms", "INTEGER"),
+    ("crawl_tasks", "persist_ms", "INTEGER"),
+    ("crawl_tasks", "snapshot_ms", "INTEGER"),
+    ("crawl_tasks", "invalidate_ms", "INTEGER"),
+    ("crawl_tasks", "error_class", "VARCHAR(100)"),
+    # 热度原始文本（score 为解析后的数值）
+    ("hot_items", "hot_value", "VARCHAR(100)"),
+    # 排名历史条目ID，条目落榜后仍可按该ID查询历史
+    ("hot_items", "item_key_id", "INTEGER"),
+]
+
+# 批量 upsert 依赖 (category_id, url) 唯一索引
+HOT_ITEMS_UNIQUE_COLUMNS = ["category_id", "url"]
+
+# 旧的保存逻辑可能写入过重复行，只在建唯一索引前执行一次：每组只保留最新的一行，
+# 否则建索引失败后每轮 upsert 都会失败
+HOT_ITEMS_UNIQUE_UPGRADE = [
+    """
+    DELETE FROM hot_items WHERE id IN (
+        SELECT id FROM (
+            SELECT id, row_number() OVER (
+                PARTITION BY category_id, url
+                ORDER BY crawled_at DESC NULLS LAST, updated_at DESC NULLS LAST, id
+            ) AS duplicate_rank
+            FROM hot_items
+            WHERE url IS NOT NULL
+        ) ranked
+        WHERE duplicate_rank > 1
+    )
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_hot_items_category_url ON hot_items (category_id, url)",
+]
+
+# 可选的幂等补齐语句，单条失败只记录日志
+SCHEMA_UPGRADES = [
+    # 按爬虫过滤的键集分页
+    "CREATE INDEX IF NOT EXISTS ix_crawl_tasks_crawler_name_id ON crawl_tasks (crawler_name, id)",
+]
+
+
+def _inspect_schema(sync_conn) -> Tuple[Dict[str, Set[str]], bool]:
+    """读取需要补齐的表的现有列，以及 hot_items 上是否已有 (category_id, url) 唯一索引"""
+    inspector = inspect(sync_conn)
+    tables = set(inspector.get_table_names())
+    columns = {
+        table: {column["name"] for column in inspector.get_columns(table)}
+        for table in {table for table, _, _ in SCHEMA_COLUMNS} & tables
+    }
+    unique_columns = []
+    if "hot_items" in tables:
+        unique_columns = [
+            index["column_names"] for index in inspector.get_indexes("hot_items") if index["unique"]
+        ] + [
+            constraint["column_names"] for constraint in inspector.get_unique_constraints("hot_items")
+        ]
+    return columns, HOT_ITEMS_UNIQUE_COLUMNS in unique_columns
+
+
+async def ensure_schema(conn) -> None:
+    """补齐已有数据库缺失的列、索引等结构
+
+    先检查现有结构，只执行缺失部分对应的语句；去重删除只在唯一索引不存在时执行。
+    """
+    columns, has_unique_index = await conn.run_sync(_inspect_schema)
+    quote = conn.dialect.identifier_preparer.quote
+    required = [
+        f"ALTER TABLE {table} ADD COLUMN {quote(column)} {column_type}"
+        for table, column, column_type in SCHEMA_COLUMNS
+        if table in columns and column not in columns[table]
+    ]
+    if not has_unique_index:
+        required.extend(HOT_ITEMS_UNIQUE_UPGRADE)
+    try:
+        for ddl in required:
+            await conn.execute(text(ddl))
+    except Exception as e:
+        logger.error(f"Required schema upgrade failed: {e}")
+        raise RuntimeError(f"数据库结构升级失败: {e}") from e
+    if required:
+        logger.info(f"Schema upgraded: {len(required)} statements")
+
+    for ddl in SCHEMA_UPGRADES:
+        try:
+            # 每条语句使用独立保存点，单条失败不影响其他语句
+            async with conn.begin_nested():
+                await conn.execute(text(ddl))
+        except Exception as e:
+            logger.error(f"Schema upgrade failed ({ddl}): {e}")
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """获取数据库会话"""
     async with AsyncSessionLocal() as session:
@@ -65,6 +187,7 @@ async def init_db() -> None:
         async with engine.begin() as conn:
             # 创建所有表
             await conn.run_sync(Base.metadata.create_all)
+            await ensure_schema(conn)
         logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
@@ -0,0 +1,84 @@
+from collections import OrderedDict
+from typing import Optional, Iterable, Dict, Tuple, Any
+import json
+import time
+from loguru import logger
+
+from app.core.config import settings
+
+
+# 跨进程失效通知频道，消息为被删除缓存键的JSON数组，["*"] 表示清空
+CACHE_INVALIDATION_CHANNEL = "cache:invalidate"
+
+
+class LocalCache:
+    """进程内一级缓存
+
+    保存预编码的响应（EncodedPayload），容量有界，按LRU淘汰，条目带TTL。
+    只在单个事件循环内使用，不需要加锁。
+    """
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """获取缓存，命中时将条目移到队尾"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """设置缓存，超出容量时淘汰最久未使用的条目"""
+        self._entries[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, keys: Iterable[str]) -> int:
+        """删除指定键，键为 "*" 时清空缓存"""
+        removed = 0
+        for key in keys:
+            if key == "*":
+                removed += len(self._entries)
+                self._entries.clear()
+                break
+            if self._entries.pop(key, None) is not None:
+                removed += 1
+        return removed
+
+    def handle_invalidation(self, message: str) -> None:
+        """处理Redis发布的失效通知"""
+        try:
+            removed = self.invalidate(json.loads(message))
+            if removed:
+                logger.debug(f"Local cache dropped {removed} entries")
+        except (json.JSONDecodeError, TypeError) as e:
+            logger.warning(f"Invalid cache invalidation message: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """缓存统计"""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# 全局进程内缓存实例
+local_cache = LocalCache(settings.LOCAL_CACHE_MAX_ENTRIES, settings.LOCAL_CACHE_TTL)
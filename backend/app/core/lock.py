@@ -0,0 +1,118 @@
+from typing import Optional
+import os
+import socket
+import uuid
+from loguru import logger
+
+from app.core.redis import redis_manager
+
+
+# 获取锁并发放递增的防护令牌（fencing token）
+ACQUIRE_SCRIPT = """
+if redis.call('set', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return redis.call('incr', KEYS[2])
+end
+return false
+"""
+
+# 仅当锁仍属于自己时续期
+RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# 仅当锁仍属于自己时释放
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# 锁仍属于自己且期间没有发放过更新的令牌
+VALIDATE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] and redis.call('get', KEYS[2]) == ARGV[2] then
+    return 1
+end
+return 0
+"""
+
+
+class RedisLock:
+    """基于Redis的租约锁
+
+    SET NX PX 获取，持有者需在租约到期前调用 renew 续期，进程崩溃后租约自然过期，
+    其他进程即可接管。每次成功获取都会得到一个单调递增的防护令牌，写入前调用
+    is_valid 确认锁仍由自己持有且没有更新的持有者，避免进程暂停（GC、网络分区）
+    后租约已过期的旧持有者继续写入。
+    """
+
+    def __init__(self, name: str, ttl: float):
+        self.key = f"lock:{name}"
+        self.fence_key = f"lock:{name}:fence"
+        self.ttl_ms = int(ttl * 1000)
+        # 持有者标识，同一进程内的不同锁实例也互不相同
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.token: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        """本实例是否认为自己持有锁（以最近一次获取/续期结果为准）"""
+        return self.token is not None
+
+    async def acquire(self) -> bool:
+        """尝试获取锁，成功时记录防护令牌"""
+        if not redis_manager.connected or not redis_manager.redis_client:
+            return False
+        try:
+            token = await redis_manager.redis_client.eval(
+                ACQUIRE_SCRIPT, 2, self.key, self.fence_key, self.owner, self.ttl_ms
+            )
+        except Exception as e:
+            logger.error(f"Lock {self.key} acquire error: {e}")
+            return False
+        if not token:
+            return False
+        self.token = int(token)
+        return True
+
+    async def renew(self) -> bool:
+        """续期，锁已丢失时清空令牌并返回False"""
+        if self.token is None:
+            return False
+        try:
+            renewed = await redis_manager.redis_client.eval(
+                RENEW_SCRIPT, 1, self.key, self.owner, self.ttl_ms
+            )
+        except Exception as e:
+            logger.error(f"Lock {self.key} renew error: {e}")
+            renewed = 0
+        if not renewed:
+            self.token = None
+            return False
+        return True
+
+    async def release(self) -> None:
+        """释放锁（仅当仍由自己持有）"""
+        if self.token is None:
+            return
+        self.token = None
+        try:
+            await redis_manager.redis_client.eval(RELEASE_SCRIPT, 1, self.key, self.owner)
+        except Exception as e:
+            logger.error(f"Lock {self.key} release error: {e}")
+
+    async def is_valid(self) -> bool:
+        """写入前校验：锁仍由自己持有，且防护令牌仍是最新的"""
+        if self.token is None:
+            return False
+        try:
+            valid = await redis_manager.redis_client.eval(
+                VALIDATE_SCRIPT, 2, self.key, self.fence_key, self.owner, self.token
+            )
+        except Exception as e:
+            logger.error(f"Lock {self.key} validate error: {e}")
+            return False
+        return bool(valid)
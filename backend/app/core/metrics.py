@@ -0,0 +1,148 @@
+"""Prometheus 指标
+
+热点路径上只做一次 labels() 查找和 observe()/inc()，开销在微秒级，可以在生产环境常开。
+标签只使用有限取值（路由模板、爬虫名、缓存前缀、Redis命令名），不使用原始URL或参数。
+多进程部署（uvicorn --workers）时设置 PROMETHEUS_MULTIPROC_DIR，/metrics 会汇总所有工作进程。
+"""
+from typing import Optional
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+
+# 毫秒级到十秒级的请求/命令延迟
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 爬虫各阶段与调度延迟，可能达到分钟级
+STAGE_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP请求处理耗时",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+CRAWLER_STAGE_DURATION = Histogram(
+    "crawler_stage_duration_seconds",
+    "爬虫各阶段耗时（fetch 为请求与解析合计）",
+    ["crawler", "stage"],
+    buckets=STAGE_BUCKETS,
+)
+CRAWLER_RUNS = Counter(
+    "crawler_runs_total",
+    "爬虫运行次数",
+    ["crawler", "status"],
+)
+CRAWLER_BYTES = Counter(
+    "crawler_downloaded_bytes_total",
+    "爬虫下载字节数",
+    ["crawler"],
+)
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "cache_result 缓存查询结果：local_hit/redis_hit/coalesced/miss",
+    ["prefix", "result"],
+)
+
+DB_POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "从数据库连接池获取连接的等待时间",
+    buckets=LATENCY_BUCKETS,
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "已借出的数据库连接数",
+    multiprocess_mode="livesum",
+)
+
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds",
+    "Redis命令往返耗时",
+    ["command"],
+    buckets=LATENCY_BUCKETS,
+)
+
+SCHEDULER_JOB_LAG = Histogram(
+    "scheduler_job_lag_seconds",
+    "定时任务计划时间与实际提交执行时间之差",
+    ["job"],
+    buckets=STAGE_BUCKETS,
+)
+
+
+# 爬取记录中的阶段字段 -> 指标中的阶段名
+_CRAWL_STAGES = {
+    "crawl_ms": "fetch",
+    "parse_ms": "parse",
+    "queue_wait_ms": "queue_wait",
+    "persist_ms": "persist",
+    "snapshot_ms": "snapshot",
+    "invalidate_ms": "invalidate",
+}
+
+
+def observe_crawl_run(run) -> None:
+    """把一次爬取记录（app.crawlers.telemetry.CrawlRun）计入指标，未执行的阶段不计"""
+    for attr, stage in _CRAWL_STAGES.items():
+        value = getattr(run, attr)
+        if value:
+            CRAWLER_STAGE_DURATION.labels(run.crawler_name, stage).observe(value / 1000)
+    CRAWLER_RUNS.labels(run.crawler_name, run.status).inc()
+    if run.bytes_downloaded:
+        CRAWLER_BYTES.labels(run.crawler_name).inc(run.bytes_downloaded)
+
+
+def render_metrics() -> tuple:
+    """生成抓取响应体和Content-Type"""
+    registry: Optional[CollectorRegistry] = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """记录每个HTTP请求的耗时
+
+    纯ASGI中间件，不包装响应体，流式响应（SSE）不受影响。
+    路由标签使用匹配到的路由模板，未匹配的请求归为 unmatched，避免标签基数膨胀。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status),
+            ).observe(time.perf_counter() - started)
@@ -0,0 +1,161 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Dict, Any, Tuple
+import base64
+import gzip
+import hashlib
+import json
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，未安装时只提供gzip
+    brotli = None
+
+
+# 小于该大小的响应体不压缩
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# 服务端按优先级选择的压缩格式
+ENCODINGS = ("br", "gzip")
+
+
+class EncodedPayload:
+    """预编码的JSON响应体
+
+    序列化后的字节、内容摘要ETag和各压缩版本都挂在同一个对象上，跟随一级缓存
+    条目存活。压缩版本在快照生成（或缓存写入）时由 compress 一次算好，
+    与原始响应体一起保存在Redis哈希中，各进程读取后直接复用，请求路径上不做压缩。
+    失败的响应（success 为假）不可缓存：不写缓存，也不带ETag。
+    """
+
+    __slots__ = ("body", "etag", "last_modified", "cacheable", "_encoded")
+
+    def __init__(
+        self,
+        body: bytes,
+        last_modified: Optional[datetime] = None,
+        cacheable: bool = True,
+        encoded: Optional[Dict[str, bytes]] = None
+    ):
+        self.body = body
+        # 同一内容的不同压缩版本共用一个弱ETag
+        self.etag = f'W/"{hashlib.sha1(body).hexdigest()[:20]}"'
+        self.last_modified = last_modified
+        self.cacheable = cacheable
+        self._encoded: Dict[str, bytes] = dict(encoded or {})
+
+    @classmethod
+    def from_document(cls, document: Any) -> "EncodedPayload":
+        """从响应文档创建，快照文档的生成时间作为 Last-Modified"""
+        body = json.dumps(document, ensure_ascii=False).encode("utf-8")
+        last_modified = None
+        cacheable = True
+        if isinstance(document, dict):
+            cacheable = document.get("success", True) is not False
+            generated_at = (document.get("snapshot") or {}).get("generated_at")
+            if generated_at:
+                last_modified = datetime.fromisoformat(generated_at)
+        return cls(body, last_modified, cacheable)
+
+    @classmethod
+    def from_mapping(cls, mapping: Dict[str, str]) -> "EncodedPayload":
+        """从Redis哈希字段恢复，包括预先压缩的版本"""
+        last_modified = mapping.get("last_modified")
+        return cls(
+            mapping["body"].encode("utf-8"),
+            datetime.fromisoformat(last_modified) if last_modified else None,
+            encoded={
+                encoding: base64.b64decode(mapping[encoding])
+                for encoding in ENCODINGS
+                if mapping.get(encoding)
+            }
+        )
+
+    def to_mapping(self) -> Dict[str, str]:
+        """转换为Redis哈希字段（客户端按文本解码，压缩版本以base64保存）"""
+        mapping = {
+            "body": self.body.decode("utf-8"),
+            "last_modified": self.last_modified.isoformat() if self.last_modified else "",
+        }
+        for encoding, data in self._encoded.items():
+            mapping[encoding] = base64.b64encode(data).decode("ascii")
+        return mapping
+
+    def compress(self) -> "EncodedPayload":
+        """计算各压缩版本（已计算的跳过），小于 MIN_COMPRESS_SIZE 的响应体不压缩"""
+        if len(self.body) < MIN_COMPRESS_SIZE:
+            return self
+        if "gzip" not in self._encoded:
+            self._encoded["gzip"] = gzip.compress(self.body, GZIP_LEVEL, mtime=0)
+        if brotli is not None and "br" not in self._encoded:
+            self._encoded["br"] = brotli.compress(self.body, quality=BROTLI_QUALITY)
+        return self
+
+    def encode(self, accept_encoding: str) -> Tuple[bytes, Optional[str]]:
+        """按 Accept-Encoding 在已压缩的版本中选择响应体，返回 (内容, Content-Encoding)"""
+        if not self._encoded:
+            return self.body, None
+
+        accepted = set()
+        for part in accept_encoding.lower().split(","):
+            token, _, params = part.partition(";")
+            params = params.replace(" ", "")
+            try:
+                quality = float(params[2:]) if params.startswith("q=") else 1.0
+            except ValueError:
+                quality = 0.0
+            if quality > 0:
+                accepted.add(token.strip())
+
+        for encoding in ENCODINGS:
+            if encoding in self._encoded and (encoding in accepted or "*" in accepted):
+                return self._encoded[encoding], encoding
+
+        return self.body, None
+
+    def is_not_modified(
+        self,
+        if_none_match: Optional[str],
+        if_modified_since: Optional[str]
+    ) -> bool:
+        """判断条件请求是否可以返回304，If-None-Match 优先于 If-Modified-Since"""
+        if not self.cacheable:
+            return False
+        if if_none_match:
+            tags = {tag.strip() for tag in if_none_match.split(",")}
+            if "*" in tags:
+                return True
+            # 弱比较：忽略 W/ 前缀
+            own = self.etag[2:]
+            return any(tag[2:] == own if tag.startswith("W/") else tag == own for tag in tags)
+
+        if if_modified_since and self.last_modified:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            # HTTP日期只精确到秒
+            return self.last_modified.replace(microsecond=0) <= since
+        return False
+
+    def headers(self) -> Dict[str, str]:
+        """缓存校验相关的响应头，不可缓存的响应禁止缓存且不带校验器"""
+        if not self.cacheable:
+            return {"Cache-Control": "no-store"}
+        headers = {
+            "ETag": self.etag,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if self.last_modified:
+            headers["Last-Modified"] = format_datetime(
+                self.last_modified.astimezone(timezone.utc), usegmt=True
+            )
+        return headers
+
+    def __len__(self) -> int:
+        return len(self.body)
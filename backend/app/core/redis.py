@@ -1,10 +1,49 @@
 import redis.asyncio as redis
-from typing import Optional, Any, Union
+from typing import Optional, Any, Union, Iterable, Callable, List, Dict, AsyncIterator
+import asyncio
+import functools
+import hashlib
+import inspect
 import json
+import time
 from loguru import logger
 from datetime import timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.core.local_cache import local_cache, CACHE_INVALIDATION_CHANNEL
+from app.core.payload import EncodedPayload
+from app.core.metrics import REDIS_COMMAND_DURATION, CACHE_REQUESTS
+
+
+# 缓存依赖标签
+CACHE_DEPS_PREFIX = "cache_deps"
+# 按命名空间（键前缀第一段）索引缓存键的集合
+CACHE_INDEX_PREFIX = "cache_index"
+# SCAN/管道批次大小
+SCAN_BATCH_SIZE = 500
+ALL_PLATFORMS_TAG = "platform:__all__"
+
+
+def platform_tag(platform_name: str) -> str:
+    """平台数据标签"""
+    return f"platform:{platform_name}"
+
+
+def category_tag(platform_name: str, category_name: str) -> str:
+    """分类数据标签"""
+    return f"category:{platform_name}/{category_name}"
+
+
+class InstrumentedRedis(redis.Redis):
+    """记录每条命令往返耗时的Redis客户端（不含管道和订阅连接）"""
+    
+    async def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_DURATION.labels(str(args[0]).upper()).observe(time.perf_counter() - started)
 
 
 class RedisManager:
@@ -13,11 +52,14 @@ class RedisManager:
     def __init__(self):
         self.redis_client: Optional[redis.Redis] = None
         self.connected = False
+        # 频道 -> 消息处理函数，由 start_listener 统一订阅
+        self._handlers: Dict[str, List[Callable[[str], Any]]] = {}
+        self._listener_task: Optional[asyncio.Task] = None
     
     async def connect(self) -> None:
         """连接Redis"""
         try:
-            self.redis_client = redis.from_url(
+            self.redis_client = InstrumentedRedis.from_url(
                 settings.REDIS_URL,
                 db=settings.REDIS_DB,
                 password=settings.REDIS_PASSWORD,
@@ -41,6 +83,7 @@ class RedisManager:
     
     async def disconnect(self) -> None:
         """断开Redis连接"""
+        await self.stop_listener()
         if self.redis_client:
             await self.redis_client.close()
             self.connected = False
@@ -96,6 +139,50 @@ class RedisManager:
             logger.error(f"Redis get error: {e}")
             return None
     
+    async def get_raw(self, key: str) -> Optional[str]:
+        """获取缓存原始字符串（不做JSON反序列化）"""
+        if not self.connected or not self.redis_client:
+            return None
+        
+        try:
+            return await self.redis_client.get(key)
+        except Exception as e:
+            logger.error(f"Redis get error: {e}")
+            return None
+
+    async def hset(
+        self,
+        key: str,
+        mapping: Dict[str, Any],
+        expire: Optional[Union[int, timedelta]] = None
+    ) -> bool:
+        """整体替换哈希（先删除旧键），expire 为空时不过期"""
+        if not self.connected or not self.redis_client:
+            return False
+
+        try:
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                pipe.delete(key)
+                pipe.hset(key, mapping=mapping)
+                if expire is not None:
+                    pipe.expire(key, expire)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Redis hset error: {e}")
+            return False
+
+    async def hgetall(self, key: str) -> Dict[str, str]:
+        """读取哈希全部字段，不存在时返回空字典"""
+        if not self.connected or not self.redis_client:
+            return {}
+
+        try:
+            return await self.redis_client.hgetall(key)
+        except Exception as e:
+            logger.error(f"Redis hgetall error: {e}")
+            return {}
+
     async def delete(self, key: str) -> bool:
         """删除缓存"""
         if not self.connected or not self.redis_client:
@@ -141,16 +228,51 @@ class RedisManager:
             logger.error(f"Redis ttl error: {e}")
             return -1
     
+    async def scan_iter(self, pattern: str = "*", count: int = SCAN_BATCH_SIZE) -> AsyncIterator[str]:
+        """增量遍历匹配模式的键（SCAN，不阻塞Redis）"""
+        if not self.connected or not self.redis_client:
+            return
+        
+        try:
+            async for key in self.redis_client.scan_iter(match=pattern, count=count):
+                yield key
+        except Exception as e:
+            logger.error(f"Redis scan error: {e}")
+    
     async def keys(self, pattern: str = "*") -> list:
         """获取匹配模式的所有键"""
-        if not self.connected or not self.redis_client:
-            return []
+        return [key async for key in self.scan_iter(pattern)]
+    
+    async def ttl_many(self, keys: List[str]) -> List[int]:
+        """批量获取键的剩余生存时间（管道，每批一次往返）"""
+        if not self.connected or not self.redis_client or not keys:
+            return [-2] * len(keys)
         
         try:
-            return await self.redis_client.keys(pattern)
+            ttls: List[int] = []
+            for i in range(0, len(keys), SCAN_BATCH_SIZE):
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    for key in keys[i:i + SCAN_BATCH_SIZE]:
+                        pipe.ttl(key)
+                    ttls.extend(await pipe.execute())
+            return ttls
         except Exception as e:
-            logger.error(f"Redis keys error: {e}")
-            return []
+            logger.error(f"Redis ttl_many error: {e}")
+            return [-2] * len(keys)
+    
+    async def unlink_many(self, keys: List[str]) -> int:
+        """批量异步删除键（UNLINK，内存回收在后台线程完成）"""
+        if not self.connected or not self.redis_client or not keys:
+            return 0
+        
+        try:
+            deleted = 0
+            for i in range(0, len(keys), SCAN_BATCH_SIZE):
+                deleted += await self.redis_client.unlink(*keys[i:i + SCAN_BATCH_SIZE])
+            return deleted
+        except Exception as e:
+            logger.error(f"Redis unlink error: {e}")
+            return 0
     
     async def flushdb(self) -> bool:
         """清空当前数据库"""
@@ -186,6 +308,17 @@ class RedisManager:
             logger.error(f"Redis incr error: {e}")
             return 0
     
+    async def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        """递增哈希中的计数字段"""
+        if not self.connected or not self.redis_client:
+            return 0
+        
+        try:
+            return await self.redis_client.hincrby(key, field, amount)
+        except Exception as e:
+            logger.error(f"Redis hincrby error: {e}")
+            return 0
+    
     async def decr(self, key: str, amount: int = 1) -> int:
         """递减计数器"""
         if not self.connected or not self.redis_client:
@@ -197,43 +330,308 @@ class RedisManager:
             logger.error(f"Redis decr error: {e}")
             return 0
 
+    async def track_key(
+        self,
+        key: str,
+        namespace: str,
+        tags: Iterable[str] = (),
+        expire: Optional[int] = None
+    ) -> bool:
+        """登记缓存键：加入命名空间索引，并记录其依赖的数据标签（平台/分类）"""
+        if not self.connected or not self.redis_client:
+            return False
+        
+        try:
+            # 索引集合比缓存条目多保留一段时间，过期成员由定时任务清理
+            ttl = (expire or settings.CACHE_EXPIRE_TIME) * 2
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for set_key in [f"{CACHE_INDEX_PREFIX}:{namespace}"] + [
+                    f"{CACHE_DEPS_PREFIX}:{tag}" for tag in tags
+                ]:
+                    pipe.sadd(set_key, key)
+                    pipe.expire(set_key, ttl)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Redis track_key error: {e}")
+            return False
+    
+    async def set_members(self, set_key: str) -> List[str]:
+        """增量读取集合成员（SSCAN）"""
+        if not self.connected or not self.redis_client:
+            return []
+        
+        try:
+            return [member async for member in self.redis_client.sscan_iter(set_key, count=SCAN_BATCH_SIZE)]
+        except Exception as e:
+            logger.error(f"Redis sscan error: {e}")
+            return []
+    
+    async def index_members(self, namespace: str) -> List[str]:
+        """获取命名空间下登记的缓存键"""
+        return await self.set_members(f"{CACHE_INDEX_PREFIX}:{namespace}")
+    
+    async def invalidate_index(self, namespace: str) -> int:
+        """删除命名空间下登记的所有缓存键，代价为 O(成员数)"""
+        members = await self.index_members(namespace)
+        deleted = await self.unlink_many(members)
+        await self.unlink_many([f"{CACHE_INDEX_PREFIX}:{namespace}"])
+        return deleted
+    
+    async def invalidate_tags(self, tags: Iterable[str]) -> List[str]:
+        """删除依赖任一标签的缓存键，返回被删除的键"""
+        if not self.connected or not self.redis_client:
+            return []
+        
+        try:
+            tag_keys = [f"{CACHE_DEPS_PREFIX}:{tag}" for tag in tags]
+            if not tag_keys:
+                return []
+            keys = await self.redis_client.sunion(tag_keys)
+            await self.unlink_many(list(keys) + tag_keys)
+            return sorted(keys)
+        except Exception as e:
+            logger.error(f"Redis invalidate_tags error: {e}")
+            return []
+    
+    async def prune_index_set(self, set_key: str, default_expire: Optional[int] = None) -> Dict[str, int]:
+        """清理索引集合：移除已过期的成员，为没有过期时间的成员补上过期时间"""
+        members = await self.set_members(set_key)
+        if not members:
+            return {"removed": 0, "expired": 0}
+        
+        ttls = await self.ttl_many(members)
+        dead = [key for key, ttl in zip(members, ttls) if ttl == -2]
+        persistent = [key for key, ttl in zip(members, ttls) if ttl == -1]
+        
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                if dead:
+                    pipe.srem(set_key, *dead)
+                for key in persistent:
+                    pipe.expire(key, default_expire or settings.CACHE_EXPIRE_TIME)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Redis prune_index_set error: {e}")
+            return {"removed": 0, "expired": 0}
+        
+        return {"removed": len(dead), "expired": len(persistent)}
+
     async def delete_pattern(self, pattern: str) -> int:
-        """删除匹配模式的所有键"""
+        """删除匹配模式的所有键（SCAN分批 + UNLINK）"""
         if not self.connected or not self.redis_client:
             return 0
         
         try:
-            keys_to_delete = await self.keys(pattern)
-            if not keys_to_delete:
-                return 0
-            
-            deleted_count = await self.redis_client.delete(*keys_to_delete)
+            deleted_count = 0
+            batch: List[str] = []
+            async for key in self.scan_iter(pattern):
+                batch.append(key)
+                if len(batch) >= SCAN_BATCH_SIZE:
+                    deleted_count += await self.unlink_many(batch)
+                    batch = []
+            if batch:
+                deleted_count += await self.unlink_many(batch)
             return deleted_count
         except Exception as e:
             logger.error(f"Redis delete_pattern error: {e}")
             return 0
 
+    async def publish(self, channel: str, message: str) -> int:
+        """发布消息，返回接收到消息的订阅者数量"""
+        if not self.connected or not self.redis_client:
+            return 0
+        
+        try:
+            return await self.redis_client.publish(channel, message)
+        except Exception as e:
+            logger.error(f"Redis publish error: {e}")
+            return 0
+    
+    def subscribe(self, channel: str, handler: Callable[[str], Any]) -> None:
+        """注册频道消息处理函数（需在 start_listener 之前调用）"""
+        self._handlers.setdefault(channel, []).append(handler)
+    
+    async def start_listener(self) -> None:
+        """启动后台订阅协程，每个进程只占用一个订阅连接"""
+        if not self._handlers or (self._listener_task and not self._listener_task.done()):
+            return
+        self._listener_task = asyncio.create_task(self._listen())
+    
+    async def stop_listener(self) -> None:
+        """停止后台订阅协程"""
+        if self._listener_task:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+    
+    async def _listen(self) -> None:
+        """订阅循环，连接断开后自动重连"""
+        while True:
+            if not self.connected or not self.redis_client:
+                await asyncio.sleep(5)
+                continue
+            
+            pubsub = self.redis_client.pubsub()
+            try:
+                await pubsub.subscribe(*self._handlers.keys())
+                logger.info(f"Redis listener subscribed: {list(self._handlers.keys())}")
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    for handler in self._handlers.get(message["channel"], []):
+                        try:
+                            result = handler(message["data"])
+                            if inspect.isawaitable(result):
+                                await result
+                        except Exception as e:
+                            logger.error(f"Redis message handler error: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Redis listener disconnected, retrying: {e}")
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+
 # 全局Redis管理器实例
 redis_manager = RedisManager()
 
 
+async def broadcast_invalidation(keys: List[str]) -> None:
+    """通知所有进程丢弃一级缓存中的指定键（本进程立即生效）"""
+    if not keys:
+        return
+    local_cache.invalidate(keys)
+    await redis_manager.publish(CACHE_INVALIDATION_CHANNEL, json.dumps(keys, ensure_ascii=False))
+
+
+# 正在执行的缓存未命中查询（单飞合并），键为缓存键
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+def build_cache_key(key_prefix: str, signature: inspect.Signature, args: tuple, kwargs: dict) -> str:
+    """生成稳定的缓存键
+
+    跳过 self 和数据库会话，按参数名对其余参数做确定性摘要，
+    相同参数在不同请求、不同进程中得到相同的键。
+    """
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    material = {
+        name: value
+        for name, value in bound.arguments.items()
+        if name not in ("self", "cls") and not isinstance(value, AsyncSession)
+    }
+    payload = json.dumps(material, sort_keys=True, ensure_ascii=False, default=str)
+    digest = hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+    return f"{key_prefix}:{digest}"
+
+
 # 缓存装饰器
-def cache_result(key_prefix: str, expire: int = None):
-    """缓存结果装饰器"""
+def cache_result(
+    key_prefix: str,
+    expire: int = None,
+    depends_on: Optional[Callable[..., Iterable[str]]] = None,
+    local: bool = False
+):
+    """缓存结果装饰器
+
+    depends_on 接收与被装饰函数相同的参数，返回该结果依赖的数据标签，
+    爬虫更新某个平台时只失效依赖该平台的缓存。
+    local=True 时在Redis前增加进程内一级缓存，被装饰函数返回 EncodedPayload
+    （预编码的JSON字节、ETag和压缩版本），命中时既不访问Redis也不做反序列化；
+    不可缓存的结果（失败的响应）直接返回，不写入任何一级缓存。
+    同一进程内对同一缓存键的并发未命中只执行一次被装饰函数，其余请求等待其结果。
+    """
     def decorator(func):
+        signature = inspect.signature(func)
+        namespace = key_prefix.split(":")[0]
+        
+        async def load(cache_key: str) -> Optional[Any]:
+            if not local:
+                result = await redis_manager.get(cache_key)
+                if result is not None:
+                    CACHE_REQUESTS.labels(key_prefix, "redis_hit").inc()
+                return result
+            
+            payload = local_cache.get(cache_key)
+            if payload is not None:
+                CACHE_REQUESTS.labels(key_prefix, "local_hit").inc()
+                return payload
+            cached = await redis_manager.hgetall(cache_key)
+            if not cached.get("body"):
+                return None
+            CACHE_REQUESTS.labels(key_prefix, "redis_hit").inc()
+            payload = EncodedPayload.from_mapping(cached)
+            local_cache.set(cache_key, payload)
+            return payload
+        
+        async def compute(cache_key: str, args: tuple, kwargs: dict) -> Any:
+            result = await func(*args, **kwargs)
+            if local:
+                if not isinstance(result, EncodedPayload):
+                    result = EncodedPayload.from_document(result)
+                if not result.cacheable:
+                    return result
+                result.compress()
+                stored = await redis_manager.hset(
+                    cache_key,
+                    result.to_mapping(),
+                    expire if expire is not None else settings.CACHE_EXPIRE_TIME
+                )
+                local_cache.set(cache_key, result)
+            else:
+                stored = await redis_manager.set(cache_key, result, expire)
+            if stored:
+                tags = depends_on(*args, **kwargs) if depends_on else ()
+                await redis_manager.track_key(cache_key, namespace, tags, expire)
+            return result
+        
+        @functools.wraps(func)
         async def wrapper(*args, **kwargs):
             # 生成缓存键
-            cache_key = f"{key_prefix}:{hash(str(args) + str(kwargs))}"
+            cache_key = build_cache_key(key_prefix, signature, args, kwargs)
             
             # 尝试从缓存获取
-            cached_result = await redis_manager.get(cache_key)
+            cached_result = await load(cache_key)
             if cached_result is not None:
                 return cached_result
             
-            # 执行函数并缓存结果
-            result = await func(*args, **kwargs)
-            await redis_manager.set(cache_key, result, expire)
+            # 已有相同查询在执行时等待其结果；若该查询被取消则重新竞争执行
+            while (pending := _inflight.get(cache_key)) is not None:
+                try:
+                    result = await asyncio.shield(pending)
+                    CACHE_REQUESTS.labels(key_prefix, "coalesced").inc()
+                    return result
+                except asyncio.CancelledError:
+                    if not pending.cancelled():
+                        raise
             
-            return result
+            CACHE_REQUESTS.labels(key_prefix, "miss").inc()
+            future = asyncio.get_running_loop().create_future()
+            _inflight[cache_key] = future
+            try:
+                # 执行函数并缓存结果
+                result = await compute(cache_key, args, kwargs)
+                future.set_result(result)
+                return result
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                future.set_exception(e)
+                # 没有等待者时避免 "exception was never retrieved" 警告
+                future.exception()
+                raise
+            finally:
+                _inflight.pop(cache_key, None)
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
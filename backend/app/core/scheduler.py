@@ -3,11 +3,28 @@ from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.jobstores.memory import MemoryJobStore
 from apscheduler.executors.asyncio import AsyncIOExecutor
+from apscheduler.events import EVENT_JOB_SUBMITTED, JobSubmissionEvent
 from loguru import logger
-from datetime import datetime
-from typing import Callable, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional, Dict, Any, List, Set
+import asyncio
 
 from app.core.config import settings
+from app.core.lock import RedisLock
+from app.core.metrics import SCHEDULER_JOB_LAG
+
+
+# 榜单变化比例的指数移动平均权重，避免单次波动导致间隔来回跳动
+CHURN_SMOOTHING = 0.5
+
+
+# 只在主节点上运行的任务（爬取与集群级清理）
+LEADER_JOB_IDS = ("cleanup_old_data", "cleanup_cache")
+
+
+def crawler_job_id(crawler_name: str) -> str:
+    """爬虫定时任务ID"""
+    return f"crawl:{crawler_name}"
 
 
 class SchedulerManager:
@@ -35,8 +52,31 @@ class SchedulerManager:
             job_defaults=job_defaults,
             timezone=settings.SCHEDULER_TIMEZONE
         )
+        self.scheduler.add_listener(self._observe_job_lag, EVENT_JOB_SUBMITTED)
         
         self.is_running = False
+        # 各爬虫当前的爬取间隔（分钟）和平滑后的榜单变化比例
+        self.crawl_intervals: Dict[str, float] = {}
+        self.crawl_churn: Dict[str, float] = {}
+        # 多副本部署时只有持有该租约的进程注册爬取任务
+        self.leader_lock = RedisLock("scheduler:leader", settings.LEADER_LOCK_TTL)
+        self._election_task: Optional[asyncio.Task] = None
+        # 成为主节点时在后台执行的协程函数及其运行中的任务
+        self._leader_callbacks: List[Callable[[], Awaitable[None]]] = []
+        self._leader_tasks: Set[asyncio.Task] = set()
+        self._leadership_listeners: List[Callable[[Optional[int]], None]] = []
+    
+    @staticmethod
+    def _observe_job_lag(event: JobSubmissionEvent) -> None:
+        """记录计划执行时间与实际提交时间之差，事件循环阻塞或执行器繁忙时该值上升"""
+        now = datetime.now(timezone.utc)
+        for run_time in event.scheduled_run_times:
+            SCHEDULER_JOB_LAG.labels(event.job_id).observe(max(0.0, (now - run_time).total_seconds()))
+    
+    @property
+    def is_leader(self) -> bool:
+        """当前进程是否为调度主节点"""
+        return self.leader_lock.held
     
     def start(self) -> None:
         """启动调度器"""
@@ -46,9 +86,6 @@ class SchedulerManager:
                 self.is_running = True
                 logger.info("Scheduler started successfully")
                 
-                # 添加默认的爬取任务
-                self._add_default_jobs()
-                
             except Exception as e:
                 logger.error(f"Failed to start scheduler: {e}")
                 raise
@@ -63,27 +100,112 @@ class SchedulerManager:
             except Exception as e:
                 logger.error(f"Error shutting down scheduler: {e}")
     
+    def on_leadership(self, callback: Callable[[], Awaitable[None]]) -> None:
+        """注册每次获得主节点租约时在后台执行的协程函数，失去租约或停止竞选时取消"""
+        self._leader_callbacks.append(callback)
+    
+    def on_leadership_change(self, listener: Callable[[Optional[int]], None]) -> None:
+        """注册租约变化时同步调用的函数，获得租约时传入防护令牌，失去或释放租约时传入None"""
+        self._leadership_listeners.append(listener)
+    
+    def _notify_leadership(self, token: Optional[int]) -> None:
+        for listener in self._leadership_listeners:
+            try:
+                listener(token)
+            except Exception as e:
+                logger.error(f"Leadership listener error: {e}")
+    
+    def _run_leader_callbacks(self) -> None:
+        for callback in self._leader_callbacks:
+            task = asyncio.create_task(callback())
+            self._leader_tasks.add(task)
+            task.add_done_callback(self._leader_tasks.discard)
+    
+    def _cancel_leader_tasks(self) -> List[asyncio.Task]:
+        tasks = list(self._leader_tasks)
+        for task in tasks:
+            task.cancel()
+        return tasks
+    
+    async def start_election(self) -> None:
+        """参与主节点竞选
+
+        立即尝试一次，之后在后台定期续期（主节点）或重新竞选（从节点）。
+        成为主节点时注册默认任务，失去租约时立即移除，保证集群内同一时间
+        只有一个进程在爬取。
+        """
+        await self._elect()
+        if self._election_task is None or self._election_task.done():
+            self._election_task = asyncio.create_task(self._election_loop())
+    
+    async def stop_election(self) -> None:
+        """停止竞选并主动释放租约，其他副本可立即接管"""
+        if self._election_task:
+            self._election_task.cancel()
+            try:
+                await self._election_task
+            except asyncio.CancelledError:
+                pass
+            self._election_task = None
+        tasks = self._cancel_leader_tasks()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if self.is_leader:
+            self._remove_default_jobs()
+            self._notify_leadership(None)
+        await self.leader_lock.release()
+    
+    async def _election_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.LEADER_RENEW_INTERVAL)
+            try:
+                await self._elect()
+            except Exception as e:
+                logger.error(f"Leader election error: {e}")
+    
+    async def _elect(self) -> None:
+        if self.leader_lock.held:
+            if not await self.leader_lock.renew():
+                logger.warning("Lost scheduler leadership, removing crawl jobs")
+                self._remove_default_jobs()
+                self._cancel_leader_tasks()
+                self._notify_leadership(None)
+        elif await self.leader_lock.acquire():
+            logger.info(f"Became scheduler leader (fencing token {self.leader_lock.token})")
+            self._notify_leadership(self.leader_lock.token)
+            self._add_default_jobs()
+            self._run_leader_callbacks()
+    
     def add_interval_job(
         self,
         func: Callable,
-        minutes: int,
+        minutes: float,
         job_id: str,
         args: tuple = None,
         kwargs: dict = None,
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
+        end_date: Optional[datetime] = None,
+        max_instances: Optional[int] = None,
+        jitter: Optional[int] = None
     ) -> None:
-        """添加间隔执行任务"""
+        """添加间隔执行任务，start_date 为首次执行时间，jitter 为每次执行的随机延迟（秒）"""
         try:
+            options = {}
+            if max_instances is not None:
+                options["max_instances"] = max_instances
             self.scheduler.add_job(
                 func=func,
-                trigger=IntervalTrigger(minutes=minutes),
+                trigger=IntervalTrigger(
+                    minutes=minutes,
+                    start_date=start_date,
+                    end_date=end_date,
+                    jitter=jitter
+                ),
                 id=job_id,
                 args=args or (),
                 kwargs=kwargs or {},
-                start_date=start_date,
-                end_date=end_date,
-                replace_existing=True
+                replace_existing=True,
+                **options
             )
             logger.info(f"Added interval job: {job_id} (every {minutes} minutes)")
         except Exception as e:
@@ -176,12 +298,14 @@ class SchedulerManager:
         """添加默认的定时任务"""
         from app.crawlers.crawler_manager import crawler_manager
         
-        # 添加热榜爬取任务（每30分钟执行一次）
-        self.add_interval_job(
-            func=crawler_manager.run_crawl_task,
-            minutes=30,
-            job_id="crawl_hot_lists"
-        )
+        # 每个爬虫一个爬取任务，间隔按榜单变化情况自适应调整；
+        # 首次执行时间在一个间隔内均匀错开，避免所有爬虫同时触发
+        crawler_names = list(crawler_manager.crawlers)
+        now = datetime.now(timezone.utc)
+        for index, crawler_name in enumerate(crawler_names):
+            minutes = self.crawl_intervals.get(crawler_name, settings.CRAWL_INTERVAL_MINUTES)
+            offset = timedelta(minutes=minutes * (index + 1) / len(crawler_names))
+            self.add_crawler_job(crawler_name, minutes, start_date=now + offset)
         
         # 添加数据清理任务（每天凌晨2点执行）
         self.add_cron_job(
@@ -199,25 +323,102 @@ class SchedulerManager:
         
         logger.info("Default scheduled jobs added")
     
+    def _remove_default_jobs(self) -> None:
+        """移除只在主节点运行的任务"""
+        job_ids = [crawler_job_id(name) for name in self.crawl_intervals] + list(LEADER_JOB_IDS)
+        for job_id in job_ids:
+            if self.scheduler.get_job(job_id):
+                self.scheduler.remove_job(job_id)
+        logger.info("Leader-only scheduled jobs removed")
+    
+    def add_crawler_job(
+        self,
+        crawler_name: str,
+        minutes: Optional[float] = None,
+        start_date: Optional[datetime] = None
+    ) -> None:
+        """添加单个爬虫的爬取任务，同一爬虫不会并发执行"""
+        minutes = minutes or self.crawl_intervals.get(crawler_name, settings.CRAWL_INTERVAL_MINUTES)
+        self.crawl_intervals[crawler_name] = minutes
+        self.add_interval_job(
+            func=self._run_crawler_job,
+            minutes=minutes,
+            job_id=crawler_job_id(crawler_name),
+            args=(crawler_name,),
+            start_date=start_date,
+            max_instances=1,
+            jitter=settings.CRAWL_JITTER_SECONDS
+        )
+    
+    def get_crawl_schedule(self) -> Dict[str, Dict[str, Any]]:
+        """各爬虫当前的爬取间隔和榜单变化比例"""
+        return {
+            crawler_name: {
+                "interval_minutes": round(interval, 2),
+                "churn": round(self.crawl_churn[crawler_name], 3) if crawler_name in self.crawl_churn else None,
+            }
+            for crawler_name, interval in self.crawl_intervals.items()
+        }
+    
+    async def _run_crawler_job(self, crawler_name: str) -> None:
+        """执行单个爬虫并根据本次榜单变化调整下次间隔"""
+        from app.crawlers.crawler_manager import crawler_manager
+        
+        try:
+            stats = await crawler_manager.crawl_and_persist([crawler_name], fence=self.leader_lock)
+            result = stats.get(crawler_name)
+            self._adapt_interval(crawler_name, result["churn"] if result else None)
+        except Exception as e:
+            logger.error(f"Crawler job {crawler_name} failed: {e}")
+    
+    def _adapt_interval(self, crawler_name: str, churn: Optional[float]) -> float:
+        """按平滑后的榜单变化比例调整爬取间隔
+
+        变化剧烈时间隔减半，几乎不变时延长一半，结果限制在配置的上下限之内。
+        爬取失败或没有数据时按无变化处理，不会因为失败而加快请求。
+        """
+        current = self.crawl_intervals.get(crawler_name, settings.CRAWL_INTERVAL_MINUTES)
+        churn = churn or 0.0
+        previous = self.crawl_churn.get(crawler_name)
+        smoothed = churn if previous is None else CHURN_SMOOTHING * churn + (1 - CHURN_SMOOTHING) * previous
+        self.crawl_churn[crawler_name] = smoothed
+        
+        interval = current
+        if smoothed >= settings.CRAWL_CHURN_HIGH:
+            interval = current / 2
+        elif smoothed <= settings.CRAWL_CHURN_LOW:
+            interval = current * 1.5
+        interval = min(max(interval, settings.CRAWL_MIN_INTERVAL_MINUTES), settings.CRAWL_MAX_INTERVAL_MINUTES)
+        
+        if interval != current:
+            self.crawl_intervals[crawler_name] = interval
+            try:
+                self.scheduler.reschedule_job(
+                    crawler_job_id(crawler_name),
+                    trigger=IntervalTrigger(minutes=interval, jitter=settings.CRAWL_JITTER_SECONDS)
+                )
+                logger.info(
+                    f"Crawler {crawler_name} interval {current:.1f} -> {interval:.1f} minutes "
+                    f"(churn {smoothed:.2f})"
+                )
+            except Exception as e:
+                logger.error(f"Failed to reschedule crawler job {crawler_name}: {e}")
+        return interval
+    
     async def _cleanup_cache(self) -> None:
         """清理过期缓存"""
         try:
-            from app.core.redis import redis_manager
+            from app.core.redis import redis_manager, CACHE_INDEX_PREFIX, CACHE_DEPS_PREFIX
             
-            # 获取所有缓存键
-            keys = await redis_manager.keys("cache:*")
-            expired_count = 0
+            # 只遍历索引集合（SCAN），成员的TTL检查和清理均为管道批量操作
+            removed_count = 0
+            for pattern in (f"{CACHE_INDEX_PREFIX}:*", f"{CACHE_DEPS_PREFIX}:*"):
+                async for set_key in redis_manager.scan_iter(pattern):
+                    result = await redis_manager.prune_index_set(set_key, settings.CACHE_EXPIRE_TIME)
+                    removed_count += result["removed"]
             
-            for key in keys:
-                ttl = await redis_manager.ttl(key)
-                if ttl == -1:  # 没有过期时间的键
-                    await redis_manager.expire(key, settings.CACHE_EXPIRE_TIME)
-                elif ttl == -2:  # 已过期的键
-                    await redis_manager.delete(key)
-                    expired_count += 1
-            
-            if expired_count > 0:
-                logger.info(f"Cleaned up {expired_count} expired cache keys")
+            if removed_count > 0:
+                logger.info(f"Cleaned up {removed_count} expired cache index entries")
                 
         except Exception as e:
             logger.error(f"Cache cleanup error: {e}")
@@ -227,13 +428,14 @@ class SchedulerManager:
         try:
             from app.core.database import get_db
             from app.models.hot_item import HotItem
+            from app.services.history_service import history_service
             from sqlalchemy import delete
-            from datetime import datetime, timedelta
+            from datetime import timedelta
             
             async for db in get_db():
                 try:
                     # 删除7天前的数据
-                    cutoff_date = datetime.now() - timedelta(days=7)
+                    cutoff_date = datetime.now(timezone.utc) - timedelta(days=7)
                     stmt = delete(HotItem).where(HotItem.crawled_at < cutoff_date)
                     result = await db.execute(stmt)
                     await db.commit()
@@ -242,6 +444,12 @@ class SchedulerManager:
                     if deleted_count > 0:
                         logger.info(f"Cleaned up {deleted_count} old hot items")
                     
+                    # 排名历史按天分区，整体删除过期分区并提前创建后续分区
+                    history_stats = await history_service.drop_expired(db)
+                    await history_service.ensure_partitions(db)
+                    await db.commit()
+                    logger.info(f"Cleaned up hot item history: {history_stats}")
+                    
                 except Exception as e:
                     logger.error(f"Database cleanup error: {e}")
                     await db.rollback()
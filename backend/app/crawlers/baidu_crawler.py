@@ -4,11 +4,10 @@ from datetime import datetime
 import logging
 import re
 import json
-import aiohttp
 
 logger = logging.getLogger(__name__)
 
-from .base import BaseCrawler, HotItem
+from .base import BaseCrawler, HotItem, ContentNotModified
 
 class BaiduCrawler(BaseCrawler):
     """百度热搜爬虫"""
@@ -25,99 +24,98 @@ class BaiduCrawler(BaseCrawler):
     
     async def crawl(self) -> List[HotItem]:
         """爬取百度热搜"""
-        # 确保session已创建
-        if not self.session:
-            self.session = aiohttp.ClientSession(
-                headers=self.headers,
-                timeout=aiohttp.ClientTimeout(total=30)
-            )
-        
         try:
             logger.info(f"正在请求百度热搜: {self.hot_url}")
             
             async with self.session.get(self.hot_url) as response:
                 if response.status == 200:
-                    html = await response.text()
+                    html = await self.read_body(self.hot_url, response)
                     logger.info("成功获取百度热搜页面")
-                    
-                    items = []
-                    
-                    # 使用正则表达式提取数据
-                    pattern = r'<!--s-data:(.*?)-->'
-                    match = re.search(pattern, html, re.DOTALL)
-                    
-                    if match:
-                        try:
-                            json_str = match.group(1)
-                            data = json.loads(json_str)
-                            
-                            # 提取热搜数据
-                            if 'cards' in data and len(data['cards']) > 0:
-                                content = data['cards'][0].get('content', [])
-                                
-                                for rank, item_data in enumerate(content[:30], 1):
-                                    try:
-                                        # 提取标题
-                                        title = item_data.get('word', '').strip()
-                                        if not title:
-                                            continue
-                                        
-                                        # 构建搜索URL
-                                        query = item_data.get('query', title)
-                                        url = f"https://www.baidu.com/s?wd={query}"
-                                        
-                                        # 提取描述
-                                        description = item_data.get('desc', '')
-                                        
-                                        # 提取热度
-                                        hot_score = item_data.get('hotScore', 0)
-                                        hot_value = str(hot_score) if hot_score else '0'
-                                        
-                                        # 提取图片
-                                        image_url = item_data.get('img', '')
-                                        
-                                        # 提取显示信息（作者或来源）
-                                        show_info = item_data.get('show', [])
-                                        author = ' '.join(show_info) if show_info else ''
-                                        
-                                        # 提取原始URL（移动端）
-                                        raw_url = item_data.get('rawUrl', '')
-                                        
-                                        item = HotItem(
-                                            title=title,
-                                            url=url,
-                                            rank=rank,
-                                            hot_value=hot_value,
-                                            author=author if author else None,
-                                            description=description if description else None,
-                                            image_url=image_url if image_url else None,
-                                            publish_time=datetime.now(),
-                                            extra_data={
-                                                'mobile_url': raw_url,
-                                                'query': query,
-                                                'index': item_data.get('index', rank)
-                                            }
-                                        )
-                                        items.append(item)
-                                        
-                                    except Exception as e:
-                                        logger.warning(f"解析百度热搜数据失败: {e}")
-                                        continue
-                            
-                            logger.info(f"成功解析到 {len(items)} 条百度热搜")
-                            return items
-                            
-                        except json.JSONDecodeError as e:
-                            logger.error(f"解析百度热搜JSON数据失败: {e}")
-                            return []
-                    else:
-                        logger.error("未找到百度热搜数据")
-                        return []
+                    return parse_baidu_realtime(html)
                     
                 else:
                     logger.error(f"百度热搜请求失败，状态码: {response.status}")
                     return []
                     
+        except ContentNotModified:
+            raise
         except Exception as e:
             logger.error(f"百度热搜请求异常: {e}")
-            return []
\ No newline at end of file
+            return []
+
+
+def parse_baidu_realtime(html: str) -> List[HotItem]:
+    """解析百度热搜页面注释中内嵌的 s-data 数据"""
+    items = []
+    
+    # 使用正则表达式提取数据
+    pattern = r'<!--s-data:(.*?)-->'
+    match = re.search(pattern, html, re.DOTALL)
+    
+    if match:
+        try:
+            json_str = match.group(1)
+            data = json.loads(json_str)
+            
+            # 提取热搜数据
+            if 'cards' in data and len(data['cards']) > 0:
+                content = data['cards'][0].get('content', [])
+                
+                for rank, item_data in enumerate(content[:30], 1):
+                    try:
+                        # 提取标题
+                        title = item_data.get('word', '').strip()
+                        if not title:
+                            continue
+                        
+                        # 构建搜索URL
+                        query = item_data.get('query', title)
+                        url = f"https://www.baidu.com/s?wd={query}"
+                        
+                        # 提取描述
+                        description = item_data.get('desc', '')
+                        
+                        # 提取热度
+                        hot_score = item_data.get('hotScore', 0)
+                        hot_value = str(hot_score) if hot_score else '0'
+                        
+                        # 提取图片
+                        image_url = item_data.get('img', '')
+                        
+                        # 提取显示信息（作者或来源）
+                        show_info = item_data.get('show', [])
+                        author = ' '.join(show_info) if show_info else ''
+                        
+                        # 提取原始URL（移动端）
+                        raw_url = item_data.get('rawUrl', '')
+                        
+                        item = HotItem(
+                            title=title,
+                            url=url,
+                            rank=rank,
+                            hot_value=hot_value,
+                            author=author if author else None,
+                            summary=description if description else None,
+                            image_url=image_url if image_url else None,
+                            publish_time=datetime.now(),
+                            extra_data={
+                                'mobile_url': raw_url,
+                                'query': query,
+                                'index': item_data.get('index', rank)
+                            }
+                        )
+                        items.append(item)
+                        
+                    except Exception as e:
+                        logger.warning(f"解析百度热搜数据失败: {e}")
+                        continue
+            
+            logger.info(f"成功解析到 {len(items)} 条百度热搜")
+            return items
+            
+        except json.JSONDecodeError as e:
+            logger.error(f"解析百度热搜JSON数据失败: {e}")
+            return []
+    else:
+        logger.error("未找到百度热搜数据")
+        return []
@@ -1,15 +1,34 @@
 """基础爬虫类"""
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union, Callable, Awaitable, TypeVar
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass
 from datetime import datetime
 import aiohttp
 import asyncio
+import time
 import logging
 logger = logging.getLogger(__name__)
 from bs4 import BeautifulSoup
 import json
 
+from .parsing import make_soup, get_parse_executor, reset_parse_executor
+from .validators import load_validators, body_hash, NOT_MODIFIED, UNCHANGED_BODY
+from .host_guard import host_guard, GuardedRequest, CircuitOpenError
+from .telemetry import current_run
+from app.core.config import settings
+
+T = TypeVar('T')
+
+
+class ContentNotModified(Exception):
+    """上游内容与上次成功入库时相同，本轮无需解析和写库"""
+    
+    def __init__(self, url: str, reason: str):
+        super().__init__(f"{reason}: {url}")
+        self.url = url
+        self.reason = reason
+
 
 @dataclass
 class HotItem:
@@ -27,41 +46,103 @@ class HotItem:
     extra_data: Optional[Dict[str, Any]] = None
 
 
+class CrawlerSession:
+    """共享会话视图
+
+    借用CrawlerManager持有的长连接会话，并在每个请求上叠加爬虫自身的请求头。
+    连接池、DNS缓存和keep-alive连接由所有爬虫共享，会话本身不由爬虫关闭。
+    每个请求都经过按主机的限速和熔断检查（见 host_guard）。
+    """
+    
+    def __init__(self, session: aiohttp.ClientSession, headers: Dict[str, str]):
+        self._session = session
+        self.headers = headers
+    
+    @property
+    def closed(self) -> bool:
+        return self._session.closed
+    
+    def _merge_headers(self, headers: Optional[Dict[str, str]]) -> Dict[str, str]:
+        """叠加请求头，单次请求传入的请求头优先"""
+        if not headers:
+            return self.headers
+        merged = dict(self.headers)
+        merged.update(headers)
+        return merged
+    
+    def request(self, method: str, url: str, **kwargs):
+        kwargs['headers'] = self._merge_headers(kwargs.get('headers'))
+        return GuardedRequest(host_guard, url, lambda: self._session.request(method, url, **kwargs))
+    
+    def get(self, url: str, **kwargs):
+        return self.request('GET', url, **kwargs)
+    
+    def post(self, url: str, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+
 class BaseCrawler(ABC):
     """基础爬虫类"""
     
+    # 本轮结果只由一个响应决定时，该响应未变化即可跳过整个周期；
+    # 需要合并多个页面的爬虫应关闭，避免因第一个页面未变化而漏掉其他页面的更新
+    CONDITIONAL_FETCH = True
+    
     def __init__(self, platform_name: str, category_name: str):
         self.platform_name = platform_name
         self.category_name = category_name
         # 为了兼容性，添加简化的属性名
         self.platform = platform_name
         self.category = category_name
-        self.session: Optional[aiohttp.ClientSession] = None
+        self.session: Optional[Union[aiohttp.ClientSession, CrawlerSession]] = None
+        self._shared_session: Optional[aiohttp.ClientSession] = None
+        self._owns_session = False
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        self._conditional = False
+        # 本轮抓取得到的新校验器，由调用方在入库成功后保存
+        self.pending_validators: Dict[str, Dict[str, str]] = {}
+    
+    def enable_conditional_fetch(self) -> None:
+        """启用条件请求（由爬虫管理器在需要入库的爬取中开启，单独运行时不跳过）"""
+        self._conditional = self.CONDITIONAL_FETCH
+    
+    def bind_session(self, session: aiohttp.ClientSession) -> None:
+        """绑定共享会话，运行时借用而不是新建会话"""
+        self._shared_session = session
     
     async def __aenter__(self):
         """异步上下文管理器入口"""
-        self.session = aiohttp.ClientSession(
-            headers=self.headers,
-            timeout=aiohttp.ClientTimeout(total=30)
-        )
+        if self._shared_session is not None and not self._shared_session.closed:
+            self.session = CrawlerSession(self._shared_session, self.headers)
+            self._owns_session = False
+        else:
+            # 单独运行（如测试脚本）时使用独立会话
+            self.session = aiohttp.ClientSession(
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=30)
+            )
+            self._owns_session = True
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """异步上下文管理器出口"""
-        if self.session:
+        if self.session and self._owns_session:
             await self.session.close()
+        self.session = None
     
     async def fetch(self, url: str, max_retries: int = 3, **kwargs) -> str:
         """获取网页内容，支持重试"""
         retries = 0
         last_error = None
         
+        validators = await self._apply_validators(url, kwargs)
+        
         while retries < max_retries:
             try:
                 async with self.session.get(url, **kwargs) as response:
+                    self._raise_if_not_modified(url, response)
                     if response.status == 403:
                         logger.warning(f"访问被禁止 (403): {url}")
                         # 如果是403错误，可能需要更新请求头或Cookie
@@ -74,7 +155,9 @@ class BaseCrawler(ABC):
                         )
                     
                     response.raise_for_status()
-                    return await response.text()
+                    return await self.read_body(url, response, validators)
+            except (ContentNotModified, CircuitOpenError):
+                raise
             except aiohttp.ClientResponseError as e:
                 last_error = e
                 logger.warning(f"请求失败 (尝试 {retries+1}/{max_retries}): {url}, 状态码: {e.status}")
@@ -99,21 +182,179 @@ class BaseCrawler(ABC):
     async def fetch_json(self, url: str, **kwargs) -> Dict[str, Any]:
         """获取JSON数据"""
         try:
+            validators = await self._apply_validators(url, kwargs)
             async with self.session.get(url, **kwargs) as response:
+                self._raise_if_not_modified(url, response)
                 response.raise_for_status()
-                return await response.json()
+                return json.loads(await self.read_body(url, response, validators))
+        except ContentNotModified:
+            raise
         except Exception as e:
             logger.error(f"Failed to fetch JSON from {url}: {e}")
             raise
     
+    async def _apply_validators(self, url: str, kwargs: Dict[str, Any]) -> Dict[str, str]:
+        """读取该URL上次入库时的校验器，并把条件请求头合并到本次请求"""
+        if not self._conditional:
+            return {}
+        validators = await load_validators(url)
+        conditional_headers = {}
+        if validators.get('etag'):
+            conditional_headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            conditional_headers['If-Modified-Since'] = validators['last_modified']
+        if conditional_headers:
+            kwargs['headers'] = {**(kwargs.get('headers') or {}), **conditional_headers}
+        return validators
+    
+    def discard_validators(self, url: str) -> None:
+        """该URL的响应没有产出本轮结果（改用了备用地址），不保存其校验器"""
+        self.pending_validators.pop(url, None)
+    
+    def _raise_if_not_modified(self, url: str, response: aiohttp.ClientResponse) -> None:
+        if self._conditional and response.status == 304:
+            raise ContentNotModified(url, NOT_MODIFIED)
+    
+    async def read_body(
+        self,
+        url: str,
+        response: aiohttp.ClientResponse,
+        validators: Optional[Dict[str, str]] = None
+    ) -> str:
+        """读取响应体；条件请求开启时比较响应体哈希，并暂存本次的校验器
+        
+        直接使用 self.session 发起请求的爬虫（如POST接口）也应通过该方法读取响应体，
+        validators 为空时自行读取。
+        """
+        if not self._conditional:
+            return await response.text()
+        if validators is None:
+            validators = await load_validators(url)
+        
+        body = await response.read()
+        digest = body_hash(body)
+        if validators.get('body_hash') == digest:
+            raise ContentNotModified(url, UNCHANGED_BODY)
+        
+        fields = {'body_hash': digest}
+        if response.headers.get('ETag'):
+            fields['etag'] = response.headers['ETag']
+        if response.headers.get('Last-Modified'):
+            fields['last_modified'] = response.headers['Last-Modified']
+        self.pending_validators[url] = fields
+        # 响应体已缓存，text() 不会再次读取网络
+        return await response.text()
+    
     @abstractmethod
     async def crawl(self) -> List[HotItem]:
         """爬取热榜数据"""
         pass
     
     def parse_html(self, html: str) -> BeautifulSoup:
-        """解析HTML"""
-        return BeautifulSoup(html, 'html.parser')
+        """解析HTML（在当前线程执行，页面较大时应使用 parse_in_executor）"""
+        return make_soup(html)
+    
+    async def parse_in_executor(self, func: Callable[..., T], *args: Any) -> T:
+        """在解析执行器中运行模块级解析函数，事件循环只等待结果
+        
+        func 及其参数、返回值需可被pickle：传入原始HTML字符串，取回 HotItem 列表等普通数据。
+        """
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            return await loop.run_in_executor(get_parse_executor(), func, *args)
+        except BrokenProcessPool:
+            # 工作进程异常退出，重建执行器后重试一次
+            logger.warning(f"解析进程池已损坏，重建后重试: {func.__name__}")
+            reset_parse_executor()
+            return await loop.run_in_executor(get_parse_executor(), func, *args)
+        finally:
+            run = current_run.get()
+            if run is not None:
+                run.add("parse", time.perf_counter() - started)
+    
+    async def gather_pages(
+        self,
+        urls: List[str],
+        load: Callable[[str], Awaitable[List[HotItem]]],
+        limit: int = 30,
+        concurrency: Optional[int] = None
+    ) -> List[HotItem]:
+        """并发抓取同一榜单的多个分页，按 urls 顺序拼接结果
+        
+        同时进行的请求不超过 concurrency 个；按顺序已拼接的条目达到 limit 后取消其余请求。
+        单个分页失败时记录日志并视为空页，排名需由调用方在拼接后重新编号。
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency or settings.CRAWLER_PAGE_CONCURRENCY))
+        
+        async def load_page(url: str) -> List[HotItem]:
+            async with semaphore:
+                try:
+                    return await load(url)
+                except ContentNotModified:
+                    raise
+                except Exception as e:
+                    logger.warning(f"抓取分页失败 {url}: {e}")
+                    return []
+        
+        tasks = [asyncio.create_task(load_page(url)) for url in urls]
+        items: List[HotItem] = []
+        try:
+            for task in tasks:
+                items.extend(await task)
+                if len(items) >= limit:
+                    break
+        finally:
+            await self._cancel_tasks(tasks)
+        return items
+    
+    async def race_sources(
+        self,
+        urls: List[str],
+        load: Callable[[str], Awaitable[List[HotItem]]],
+        hedge_delay: Optional[float] = None
+    ) -> List[HotItem]:
+        """按优先级竞速多个备用来源，返回第一个非空结果
+        
+        先请求第一个来源，hedge_delay 秒内没有结果（或已失败）就同时启动下一个；
+        任一来源返回非空结果后取消其余请求。同时完成时优先采用排在前面的来源。
+        """
+        delay = settings.CRAWLER_HEDGE_DELAY if hedge_delay is None else hedge_delay
+        order = {url: index for index, url in enumerate(urls)}
+        remaining = list(urls)
+        running: Dict[asyncio.Task, str] = {}
+        try:
+            while remaining or running:
+                if remaining:
+                    url = remaining.pop(0)
+                    running[asyncio.create_task(load(url))] = url
+                done, _ = await asyncio.wait(
+                    running.keys(),
+                    timeout=delay if remaining else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in sorted(done, key=lambda t: order[running[t]]):
+                    url = running.pop(task)
+                    try:
+                        items = task.result()
+                    except ContentNotModified:
+                        raise
+                    except Exception as e:
+                        logger.warning(f"备用来源 {url} 失败: {e}")
+                        continue
+                    if items:
+                        logger.info(f"备用来源 {url} 胜出，获取 {len(items)} 条数据")
+                        return items
+            return []
+        finally:
+            await self._cancel_tasks(list(running.keys()))
+    
+    @staticmethod
+    async def _cancel_tasks(tasks: List[asyncio.Task]) -> None:
+        """取消尚未完成的请求并等待其退出，连接随之归还连接池"""
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
     
     async def run(self) -> List[HotItem]:
         """运行爬虫"""
@@ -123,6 +364,12 @@ class BaseCrawler(ABC):
                 items = await self.crawl()
                 logger.info(f"成功爬取 {len(items)} 条数据")
                 return items
+        except ContentNotModified as e:
+            logger.info(f"{self.platform_name} 内容未变化，跳过本轮 ({e})")
+            raise
         except Exception as e:
             logger.error(f"爬取失败: {e}")
+            run = current_run.get()
+            if run is not None:
+                run.error_class, run.error_message = type(e).__name__, str(e)[:1000]
             return []
\ No newline at end of file
@@ -1,11 +1,20 @@
 """爬虫管理器"""
-from typing import List, Dict, Any, Type
-from datetime import datetime
+from typing import List, Dict, Any, Type, Optional
+from datetime import datetime, timezone
 import asyncio
+import time
+import aiohttp
 from loguru import logger
+from sqlalchemy import select, delete, desc, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .base import BaseCrawler, HotItem
+from .base import BaseCrawler, HotItem, ContentNotModified
+from .parsing import shutdown_parse_executor
+from .validators import save_validators, record_saved_cycle
+from .hot_value import normalize_hot_values
+from .telemetry import CrawlRun, CrawlTelemetry, create_trace_config, current_run, COMPLETED, FAILED, SKIPPED
 from .nga_crawler import NGACrawler
 from .zhihu_crawler import ZhihuCrawler
 from .weibo_crawler import WeiboCrawler
@@ -21,12 +30,28 @@ from app.core.database import get_db
 from app.models.platform import Platform
 from app.models.category import Category
 from app.models.hot_item import HotItem as HotItemModel
-from app.core.redis import redis_manager
+from app.models.crawl_task import CrawlTask
+from app.core.redis import (
+    redis_manager,
+    broadcast_invalidation,
+    ALL_PLATFORMS_TAG,
+    platform_tag,
+    category_tag,
+)
+from app.core.config import settings
+from app.core.lock import RedisLock
+from app.services.snapshot_service import snapshot_service
+from app.services.history_service import history_service
+from app.services.trending_service import trending_service, score_batch
+from app.services.cluster_service import cluster_service
 
 
 class CrawlerManager:
     """爬虫管理器"""
     
+    # 单条 upsert 语句的最大行数（asyncpg 绑定参数上限为 32767）
+    UPSERT_CHUNK_SIZE = 1000
+    
     def __init__(self):
         self.crawlers: Dict[str, Type[BaseCrawler]] = {
             'nga_zatan': NGACrawler,
@@ -41,6 +66,41 @@ class CrawlerManager:
             'kr36_hot': Kr36Crawler,
             'baidu_hot': BaiduCrawler,
         }
+        # 所有爬虫共享的长连接会话，生命周期与管理器一致
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_lock = asyncio.Lock()
+        # 每次爬取的运行记录，批量写入 crawl_tasks
+        self.telemetry = CrawlTelemetry(self._write_crawl_runs)
+        self._category_ids: Dict[str, int] = {}
+    
+    async def get_session(self) -> aiohttp.ClientSession:
+        """获取共享会话（懒加载）"""
+        if self._session is None or self._session.closed:
+            async with self._session_lock:
+                if self._session is None or self._session.closed:
+                    connector = aiohttp.TCPConnector(
+                        limit=settings.CRAWLER_POOL_SIZE,
+                        limit_per_host=settings.CRAWLER_POOL_PER_HOST,
+                        ttl_dns_cache=settings.CRAWLER_DNS_CACHE_TTL,
+                        keepalive_timeout=settings.CRAWLER_KEEPALIVE_TIMEOUT,
+                    )
+                    self._session = aiohttp.ClientSession(
+                        connector=connector,
+                        timeout=aiohttp.ClientTimeout(total=settings.CRAWLER_TIMEOUT),
+                        trace_configs=[create_trace_config()]
+                    )
+                    logger.info("爬虫共享会话已创建")
+        return self._session
+    
+    async def close(self):
+        """写入剩余的运行记录，关闭共享会话和HTML解析执行器"""
+        await self.telemetry.close()
+        if self._session and not self._session.closed:
+            await self._session.close()
+            logger.info("爬虫共享会话已关闭")
+        self._session = None
+        # 等待进行中的解析结束，不阻塞事件循环
+        await asyncio.get_running_loop().run_in_executor(None, shutdown_parse_executor)
     
     def register_crawler(self, name: str, crawler_class: Type[BaseCrawler]):
         """注册新的爬虫"""
@@ -53,9 +113,7 @@ class CrawlerManager:
             logger.error(f"未找到爬虫: {crawler_name}")
             return []
         
-        crawler_class = self.crawlers[crawler_name]
-        crawler = crawler_class()
-        
+        crawler = await self._create_crawler(crawler_name)
         try:
             items = await crawler.run()
             logger.info(f"爬虫 {crawler_name} 完成，获取 {len(items)} 条数据")
@@ -64,6 +122,12 @@ class CrawlerManager:
             logger.error(f"爬虫 {crawler_name} 执行失败: {e}")
             return []
     
+    async def _create_crawler(self, crawler_name: str) -> BaseCrawler:
+        """创建爬虫实例并绑定共享会话"""
+        crawler = self.crawlers[crawler_name]()
+        crawler.bind_session(await self.get_session())
+        return crawler
+    
     async def crawl_all(self) -> Dict[str, List[HotItem]]:
         """执行所有爬虫"""
         logger.info("开始执行所有爬虫任务")
@@ -90,90 +154,184 @@ class CrawlerManager:
         
         return results
     
-    async def save_to_database(self, crawler_results: Dict[str, List[HotItem]]):
-        """保存爬取结果到数据库"""
+    async def save_to_database(self, crawler_results: Dict[str, List[HotItem]]) -> Dict[str, Dict[str, Any]]:
+        """保存爬取结果到数据库，返回每个爬虫的新增/更新/清理数量"""
+        stats: Dict[str, Dict[str, Any]] = {}
         async for db in get_db():
             try:
                 for crawler_name, items in crawler_results.items():
                     if not items:
                         continue
                     
-                    # 获取或创建平台和分类
-                    platform_name, category_name = self._parse_crawler_name(crawler_name)
-                    platform = await self._get_or_create_platform(db, platform_name)
-                    category = await self._get_or_create_category(db, platform.id, category_name)
-                    
-                    # 查询当前分类下的所有热榜条目URL，用于去重
-                    from sqlalchemy import select
-                    stmt = select(HotItemModel.url).where(HotItemModel.category_id == category.id)
-                    result = await db.execute(stmt)
-                    existing_urls = {row[0] for row in result.fetchall()}
-                    
-                    # 保存热榜条目（去重）
-                    new_items_count = 0
-                    updated_items_count = 0
-                    
-                    for item in items:
-                        # 检查URL是否已存在
-                        if item.url in existing_urls:
-                            # 更新已存在的条目（仅更新排名和热度）
-                            stmt = select(HotItemModel).where(
-                                HotItemModel.category_id == category.id,
-                                HotItemModel.url == item.url
-                            )
-                            result = await db.execute(stmt)
-                            existing_item = result.scalars().first()
-                            
-                            if existing_item:
-                                existing_item.rank_position = item.rank
-                                existing_item.score = int(item.hot_value) if item.hot_value and item.hot_value.isdigit() else 0
-                                existing_item.comment_count = item.comment_count or 0
-                                existing_item.crawled_at = datetime.now()
-                                updated_items_count += 1
-                        else:
-                            # 创建新条目
-                            hot_item = HotItemModel(
-                                category_id=category.id,
-                                title=item.title,
-                                url=item.url,
-                                rank_position=item.rank,
-                                score=int(item.hot_value) if item.hot_value and item.hot_value.isdigit() else 0,
-                                author=item.author,
-                                comment_count=item.comment_count or 0,
-                                description=item.summary,
-                                published_at=item.publish_time,
-                                tags=item.tags if item.tags else None,
-                                crawled_at=datetime.now()
-                            )
-                            db.add(hot_item)
-                            new_items_count += 1
-
-                    if new_items_count > 0 or updated_items_count > 0:
-                        try:
-                            # 清理旧数据
-                            from sqlalchemy import desc
-                            stmt = select(HotItemModel.id).where(
-                                HotItemModel.category_id == category.id
-                            ).order_by(desc(HotItemModel.crawled_at)).offset(30)
-                            result = await db.execute(stmt)
-                            old_item_ids = [row[0] for row in result.fetchall()]
-                            
-                            if old_item_ids:
-                                from sqlalchemy import delete
-                                delete_stmt = delete(HotItemModel).where(HotItemModel.id.in_(old_item_ids))
-                                await db.execute(delete_stmt)
-
-                            await db.commit()
-                            logger.info(f"保存 {crawler_name} 数据: 新增 {new_items_count} 条, 更新 {updated_items_count} 条, 删除 {len(old_item_ids)} 条旧数据")
-                        except Exception as e:
-                            logger.error(f"提交事务失败: {e}")
-                            await db.rollback()
+                    try:
+                        stats[crawler_name] = await self._save_crawler_items(db, crawler_name, items)
+                    except Exception as e:
+                        logger.error(f"提交事务失败: {e}")
+                        await db.rollback()
 
             except Exception as e:
                 logger.error(f"保存数据到数据库失败: {e}")
                 await db.rollback()
             finally:
                 break
+        
+        return stats
+    
+    async def save_crawler_items(self, crawler_name: str, items: List[HotItem]) -> Optional[Dict[str, Any]]:
+        """在独立会话中保存单个爬虫的结果，失败时返回None"""
+        result = None
+        async for db in get_db():
+            try:
+                result = await self._save_crawler_items(db, crawler_name, items)
+            except Exception as e:
+                logger.error(f"保存 {crawler_name} 数据失败: {e}")
+                await db.rollback()
+            finally:
+                break
+        return result
+    
+    async def _save_crawler_items(self, db: AsyncSession, crawler_name: str, items: List[HotItem]) -> Dict[str, Any]:
+        """写入单个爬虫的结果并提交"""
+        # 获取或创建平台和分类
+        platform_name, category_name = self._parse_crawler_name(crawler_name)
+        platform = await self._get_or_create_platform(db, platform_name)
+        category = await self._get_or_create_category(db, platform.id, category_name)
+        
+        result = await self._bulk_upsert_items(db, category.id, items)
+        await db.commit()
+        entries = result.pop("trending")
+        await trending_service.record(platform_name, category_name, entries)
+        await cluster_service.update(db, platform_name, category_name, entries)
+        logger.info(
+            f"保存 {crawler_name} 数据: 新增 {result['inserted']} 条, "
+            f"更新 {result['updated']} 条, 删除 {result['pruned']} 条旧数据"
+        )
+        return result
+    
+    async def _write_crawl_runs(self, runs: List[CrawlRun]) -> None:
+        """一条 INSERT 写入一批运行记录"""
+        async for db in get_db():
+            try:
+                rows = []
+                for run in runs:
+                    category_id = self._category_ids.get(run.crawler_name)
+                    if category_id is None:
+                        platform_name, category_name = self._parse_crawler_name(run.crawler_name)
+                        platform = await self._get_or_create_platform(db, platform_name)
+                        category = await self._get_or_create_category(db, platform.id, category_name)
+                        category_id = self._category_ids[run.crawler_name] = category.id
+                    rows.append(run.to_row(category_id))
+                await db.execute(CrawlTask.__table__.insert(), rows)
+                await db.commit()
+            except Exception as e:
+                logger.error(f"写入 {len(runs)} 条爬取记录失败: {e}")
+                await db.rollback()
+            finally:
+                break
+    
+    async def _bulk_upsert_items(
+        self,
+        db: AsyncSession,
+        category_id: int,
+        items: List[HotItem],
+        keep: int = 30
+    ) -> Dict[str, Any]:
+        """批量写入一个分类的热榜条目
+
+        每个分类只执行一条 INSERT ... ON CONFLICT (category_id, url) DO UPDATE，
+        追加排名历史并计算热门趋势，再用一条 DELETE 清理超出保留数量的旧条目。
+        """
+        # 与排名历史使用同一个带时区的UTC时间
+        now = datetime.now(timezone.utc)
+        
+        # 同一批次内按URL去重（ON CONFLICT 不允许同一语句多次命中同一行），保留排名靠前的条目
+        # 整个批次的热度文本一次解析为热度分数
+        scores = normalize_hot_values(item.hot_value for item in items)
+        rows: Dict[str, Dict[str, Any]] = {}
+        for item, score in zip(items, scores):
+            if not item.url or item.url in rows:
+                continue
+            rows[item.url] = {
+                "category_id": category_id,
+                "title": item.title,
+                "url": item.url,
+                "rank_position": item.rank,
+                "score": score,
+                "hot_value": str(item.hot_value)[:100] if item.hot_value not in (None, "") else None,
+                "author": item.author,
+                "comment_count": item.comment_count or 0,
+                "description": item.summary,
+                "published_at": item.publish_time,
+                "tags": item.tags if item.tags else None,
+                "crawled_at": now,
+            }
+        
+        if not rows:
+            return {"inserted": 0, "updated": 0, "moved": 0, "pruned": 0, "churn": 0.0, "trending": []}
+        
+        # 一次查询得到本批次中已存在的URL及原排名，用于统计新增/更新/排名变化数量
+        stmt = select(HotItemModel.url, HotItemModel.rank_position).where(
+            HotItemModel.category_id == category_id,
+            HotItemModel.url.in_(list(rows.keys()))
+        )
+        result = await db.execute(stmt)
+        existing_ranks = {url: rank for url, rank in result.fetchall()}
+        existing_count = len(existing_ranks)
+        moved_count = sum(
+            1 for url, rank in existing_ranks.items()
+            if rank != rows[url]["rank_position"]
+        )
+        
+        # 先追加排名历史（只追加，不受下面清理的影响），得到条目的历史ID一并写入热榜条目
+        row_values = list(rows.values())
+        key_ids = await history_service.append(db, category_id, row_values, crawled_at=now)
+        for row in row_values:
+            row["item_key_id"] = key_ids.get(row["url"])
+        
+        if db.get_bind().dialect.name == "postgresql":
+            insert_stmt = pg_insert(HotItemModel)
+        else:
+            insert_stmt = sqlite_insert(HotItemModel)
+        upsert_stmt = insert_stmt.on_conflict_do_update(
+            index_elements=[HotItemModel.category_id, HotItemModel.url],
+            set_={
+                # 已存在的条目仅更新排名和热度
+                "rank_position": insert_stmt.excluded.rank_position,
+                "score": insert_stmt.excluded.score,
+                "hot_value": insert_stmt.excluded.hot_value,
+                "comment_count": insert_stmt.excluded.comment_count,
+                "crawled_at": insert_stmt.excluded.crawled_at,
+                # 历史写入失败时保留原有的历史ID
+                "item_key_id": func.coalesce(insert_stmt.excluded.item_key_id, HotItemModel.item_key_id),
+                "updated_at": func.now(),
+            }
+        )
+        # 正常批次只有一条语句；超大批次分块以避免超出驱动的绑定参数上限
+        for offset in range(0, len(row_values), self.UPSERT_CHUNK_SIZE):
+            await db.execute(upsert_stmt.values(row_values[offset:offset + self.UPSERT_CHUNK_SIZE]))
+        
+        # 清理旧数据：只保留最新的 keep 条
+        stale_ids = (
+            select(HotItemModel.id)
+            .where(HotItemModel.category_id == category_id)
+            .order_by(desc(HotItemModel.crawled_at), HotItemModel.rank_position)
+            .offset(keep)
+        )
+        delete_result = await db.execute(
+            delete(HotItemModel).where(HotItemModel.id.in_(stale_ids))
+        )
+        
+        inserted_count = len(rows) - existing_count
+        return {
+            "inserted": inserted_count,
+            "updated": existing_count,
+            "moved": moved_count,
+            "pruned": delete_result.rowcount or 0,
+            # 榜单变化程度：新上榜或排名变化的条目占比，调度器据此调整爬取间隔
+            "churn": (inserted_count + moved_count) / len(rows),
+            # 热门趋势在提交后由调用方写入Redis
+            "trending": score_batch(row_values, existing_ranks, key_ids),
+        }
     
     def _parse_crawler_name(self, crawler_name: str) -> tuple:
         """解析爬虫名称获取平台和分类"""
@@ -261,39 +419,128 @@ class CrawlerManager:
         return category
     
     async def run_crawl_task(self):
-        """运行爬取任务"""
+        """运行爬取任务（手动触发，不使用条件请求，强制完整爬取）"""
         try:
-            # 执行所有爬虫
-            results = await self.crawl_all()
-            
-            # 保存到数据库
-            await self.save_to_database(results)
-            
-            # 清除相关缓存
-            await self._clear_cache()
-            
-            logger.info("爬取任务完成")
+            stats = await self.crawl_and_persist(conditional=False, trigger="manual")
+            logger.info(f"爬取任务完成，{len(stats)} 个爬虫写入了新数据")
             
         except Exception as e:
             logger.error(f"爬取任务执行失败: {e}")
     
-    async def _clear_cache(self):
-        """清除相关缓存"""
+    async def crawl_and_persist(
+        self,
+        crawler_names: Optional[List[str]] = None,
+        fence: Optional[RedisLock] = None,
+        conditional: bool = True,
+        trigger: str = "scheduled"
+    ) -> Dict[str, Dict[str, Any]]:
+        """流式爬取并入库
+
+        每个爬虫完成后立即把结果放入有界队列，由单个持久化协程按分类写入、
+        重新生成该平台的快照并失效相关缓存，新数据的可见时间取决于最快的爬虫
+        而不是最慢的爬虫。
+        队列满时爬虫会等待，写库速度跟不上时形成背压。
+        传入 fence 时每次写库前校验该锁仍然有效，失去租约后不再写入。
+        conditional 为真时使用条件请求，上游内容未变化的爬虫跳过解析和写库，
+        结果中记为 not_modified；本轮的校验器在快照和缓存都更新后才保存。
+        每个爬虫的各阶段耗时记录为一条 CrawlTask，trigger 标记触发方式。
+        """
+        names = [name for name in (crawler_names or self.crawlers.keys()) if name in self.crawlers]
+        conditional = conditional and settings.CRAWLER_CONDITIONAL_FETCH
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.CRAWL_QUEUE_SIZE)
+        stats: Dict[str, Dict[str, Any]] = {}
+        
+        async def produce(crawler_name: str):
+            run = CrawlRun(crawler_name, trigger)
+            # 本协程及其派生的请求、解析都计入该记录
+            current_run.set(run)
+            crawler = await self._create_crawler(crawler_name)
+            if conditional:
+                crawler.enable_conditional_fetch()
+            try:
+                with run.timed("crawl"):
+                    items = await crawler.run()
+                logger.info(f"爬虫 {crawler_name} 完成，获取 {len(items)} 条数据")
+            except ContentNotModified as e:
+                await record_saved_cycle(crawler_name, e.reason)
+                stats[crawler_name] = {"not_modified": e.reason, "churn": 0.0}
+                run.finish(SKIPPED, error_class=e.reason)
+                self.telemetry.record(run)
+                return
+            except Exception as e:
+                logger.error(f"爬虫 {crawler_name} 执行失败: {e}")
+                run.error_class, run.error_message = type(e).__name__, str(e)[:1000]
+                items = []
+            run.items_count = len(items)
+            await queue.put((crawler_name, items, crawler.pending_validators, run, time.perf_counter()))
+        
+        async def persist():
+            while True:
+                entry = await queue.get()
+                try:
+                    if entry is None:
+                        return
+                    crawler_name, items, validators, run, queued_at = entry
+                    run.add("queue_wait", time.perf_counter() - queued_at)
+                    if not items:
+                        run.finish(FAILED, error_class=run.error_class or "EmptyResult")
+                        continue
+                    if fence is not None and not await fence.is_valid():
+                        logger.warning(f"租约已失效，丢弃 {crawler_name} 的爬取结果")
+                        run.finish(FAILED, error_class="LeaseLost")
+                        continue
+                    with run.timed("persist"):
+                        result = await self.save_crawler_items(crawler_name, items)
+                    if result is None:
+                        run.finish(FAILED, error_class="PersistFailed")
+                        continue
+                    # 先生成快照再失效缓存，回源的请求读到的就是新快照
+                    platform_name, _ = self._parse_crawler_name(crawler_name)
+                    with run.timed("snapshot"):
+                        result["snapshots"] = len(await snapshot_service.rebuild_platform(platform_name))
+                    with run.timed("invalidate"):
+                        result["evicted"] = await self.invalidate_crawler_cache(crawler_name)
+                    stats[crawler_name] = result
+                    await save_validators(validators)
+                    run.items_inserted, run.items_updated = result["inserted"], result["updated"]
+                    run.finish(COMPLETED)
+                except Exception as e:
+                    logger.error(f"持久化爬取结果失败: {e}")
+                    if entry is not None:
+                        entry[3].finish(FAILED, error=e)
+                finally:
+                    if entry is not None:
+                        self.telemetry.record(entry[3])
+                    queue.task_done()
+        
+        logger.info(f"开始流式执行 {len(names)} 个爬虫任务")
+        worker = asyncio.create_task(persist())
+        try:
+            await asyncio.gather(*(produce(name) for name in names), return_exceptions=True)
+        finally:
+            await queue.put(None)
+            await worker
+        
+        evicted = sum(result.get("evicted", 0) for result in stats.values())
+        logger.info(f"本轮爬取共失效 {evicted} 个缓存键")
+        return stats
+    
+    async def invalidate_crawler_cache(self, crawler_name: str) -> int:
+        """只失效依赖该爬虫所属平台/分类的缓存，返回被删除的缓存键数量"""
+        platform_name, category_name = self._parse_crawler_name(crawler_name)
         try:
-            # 清除热榜相关的缓存
-            cache_patterns = [
-                "hot_list:*",
-                "hot_items:*",
-                "platforms:*",
-                "categories:*"
-            ]
-            
-            for pattern in cache_patterns:
-                await redis_manager.delete_pattern(pattern)
-            
-            logger.info("缓存清除完成")
+            evicted = await redis_manager.invalidate_tags([
+                ALL_PLATFORMS_TAG,
+                platform_tag(platform_name),
+                category_tag(platform_name, category_name),
+            ])
+            # 通知所有进程丢弃一级缓存中的同名条目
+            await broadcast_invalidation(evicted)
+            logger.info(f"{crawler_name} 失效 {len(evicted)} 个缓存键")
+            return len(evicted)
         except Exception as e:
-            logger.warning(f"清除缓存失败: {e}")
+            logger.warning(f"失效 {crawler_name} 缓存失败: {e}")
+            return 0
 
 
 # 全局爬虫管理器实例
@@ -0,0 +1,229 @@
+"""按主机限速与熔断
+
+所有进程共享Redis中的状态：
+- 令牌桶：每个主机每 CRAWLER_DELAY 秒补充一个令牌，最多积累 CRAWLER_HOST_BURST 个，
+  请求前取令牌，取不到时等待到下一个令牌可用。
+- 熔断器：连续失败（连接错误、超时、403/429/5xx）达到阈值后打开，冷却期内请求直接失败；
+  冷却结束后只放行一个探测请求（半开），探测成功则关闭，失败则以加倍的冷却时间重新打开。
+进程内保存已打开熔断器的到期时间，冷却期内的请求不访问Redis即可失败。
+Redis不可用时不限速也不熔断，与原有行为一致。
+"""
+from typing import Dict
+from urllib.parse import urlsplit
+import asyncio
+import time
+import logging
+logger = logging.getLogger(__name__)
+
+from app.core.config import settings
+from app.core.redis import redis_manager
+
+
+BUCKET_KEY_PREFIX = "crawl:bucket"
+CIRCUIT_KEY_PREFIX = "crawl:circuit"
+
+# 准入结果
+ADMITTED = 0
+WAIT = 1
+OPEN = 2
+PROBE = 3
+
+# 先检查熔断器，再取令牌，冷却结束后只有一个请求能拿到探测权
+# KEYS: 令牌桶, 熔断器, 探测标记
+# ARGV: 当前毫秒时间, 每秒令牌数, 桶容量, 探测超时毫秒, 令牌桶过期毫秒
+ADMIT_SCRIPT = """
+local now = tonumber(ARGV[1])
+local open_until = tonumber(redis.call('hget', KEYS[2], 'open_until') or '0')
+if open_until > now then
+    return {2, open_until}
+end
+local rate = tonumber(ARGV[2])
+local burst = tonumber(ARGV[3])
+local tokens = tonumber(redis.call('hget', KEYS[1], 'tokens') or ARGV[3])
+local ts = tonumber(redis.call('hget', KEYS[1], 'ts') or ARGV[1])
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+if tokens < 1 then
+    return {1, math.ceil((1 - tokens) * 1000 / rate)}
+end
+local status = 0
+if open_until > 0 then
+    if not redis.call('set', KEYS[3], '1', 'NX', 'PX', ARGV[4]) then
+        return {2, now + redis.call('pttl', KEYS[3])}
+    end
+    status = 3
+end
+redis.call('hset', KEYS[1], 'tokens', tostring(tokens - 1), 'ts', ARGV[1])
+redis.call('pexpire', KEYS[1], ARGV[5])
+return {status, 0}
+"""
+
+# 记录一次失败，达到阈值或探测失败时打开熔断器，返回打开到期时间（未打开返回0）
+# KEYS: 熔断器, 探测标记
+# ARGV: 当前毫秒时间, 失败阈值, 基础冷却毫秒, 最大冷却毫秒, 是否探测请求, 失败计数窗口毫秒
+FAILURE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local failures = redis.call('hincrby', KEYS[1], 'failures', 1)
+if ARGV[5] == '1' or failures >= tonumber(ARGV[2]) then
+    local opens = redis.call('hincrby', KEYS[1], 'opens', 1)
+    local cooldown = math.min(tonumber(ARGV[3]) * 2 ^ (opens - 1), tonumber(ARGV[4]))
+    local open_until = now + cooldown
+    redis.call('hset', KEYS[1], 'open_until', string.format('%d', open_until), 'failures', 0)
+    redis.call('del', KEYS[2])
+    redis.call('pexpire', KEYS[1], math.floor(cooldown + tonumber(ARGV[4])))
+    return open_until
+end
+if redis.call('hget', KEYS[1], 'open_until') == false then
+    redis.call('pexpire', KEYS[1], ARGV[6])
+end
+return 0
+"""
+
+# 响应状态码视为主机故障：被封禁、限流或服务端错误
+FAILURE_STATUSES = {403, 429}
+
+
+class CircuitOpenError(Exception):
+    """主机熔断器处于打开状态，请求未发出"""
+
+    def __init__(self, host: str, retry_at: float):
+        super().__init__(f"{host} 熔断中，{max(0.0, retry_at - time.time()):.0f} 秒后重试")
+        self.host = host
+        self.retry_at = retry_at
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+def is_failure_status(status: int) -> bool:
+    return status in FAILURE_STATUSES or status >= 500
+
+
+class HostGuard:
+    """按主机限速与熔断（Redis共享状态 + 进程内熔断镜像）"""
+
+    def __init__(self):
+        # 主机 -> 熔断打开到期时间（秒）
+        self._open_until: Dict[str, float] = {}
+
+    @staticmethod
+    def _keys(host: str) -> tuple:
+        circuit_key = f"{CIRCUIT_KEY_PREFIX}:{host}"
+        return f"{BUCKET_KEY_PREFIX}:{host}", circuit_key, f"{circuit_key}:probe"
+
+    def _enabled(self) -> bool:
+        return redis_manager.connected and redis_manager.redis_client is not None
+
+    async def acquire(self, host: str) -> bool:
+        """请求前调用：等待令牌，熔断时抛出 CircuitOpenError，返回本次是否为半开探测请求"""
+        open_until = self._open_until.get(host)
+        if open_until is not None:
+            if open_until > time.time():
+                raise CircuitOpenError(host, open_until)
+            del self._open_until[host]
+        if not self._enabled():
+            return False
+
+        bucket_key, circuit_key, probe_key = self._keys(host)
+        # CRAWLER_DELAY 为0时不限速，只保留熔断
+        delay = max(settings.CRAWLER_DELAY, 0.001)
+        burst = max(1, settings.CRAWLER_HOST_BURST)
+        bucket_ttl_ms = int(delay * burst * 1000) + 1000
+        while True:
+            try:
+                status, value = await redis_manager.redis_client.eval(
+                    ADMIT_SCRIPT, 3, bucket_key, circuit_key, probe_key,
+                    int(time.time() * 1000), 1 / delay, burst,
+                    settings.CRAWLER_TIMEOUT * 1000, bucket_ttl_ms
+                )
+            except Exception as e:
+                logger.warning(f"主机限速检查失败，直接放行 {host}: {e}")
+                return False
+            if status == WAIT:
+                await asyncio.sleep(int(value) / 1000)
+                continue
+            if status == OPEN:
+                self._open_until[host] = int(value) / 1000
+                raise CircuitOpenError(host, int(value) / 1000)
+            if status == PROBE:
+                logger.info(f"{host} 熔断冷却结束，发送探测请求")
+            return status == PROBE
+
+    async def record_success(self, host: str, probe: bool) -> None:
+        """请求成功：清空失败计数，探测成功时关闭熔断器"""
+        self._open_until.pop(host, None)
+        if not self._enabled():
+            return
+        _, circuit_key, probe_key = self._keys(host)
+        try:
+            await redis_manager.redis_client.delete(circuit_key, probe_key)
+        except Exception as e:
+            logger.warning(f"重置 {host} 熔断状态失败: {e}")
+            return
+        if probe:
+            logger.info(f"{host} 探测成功，熔断器关闭")
+
+    async def record_failure(self, host: str, probe: bool) -> None:
+        """请求失败：累计失败次数，达到阈值或探测失败时打开熔断器"""
+        if not self._enabled():
+            return
+        _, circuit_key, probe_key = self._keys(host)
+        try:
+            open_until = await redis_manager.redis_client.eval(
+                FAILURE_SCRIPT, 2, circuit_key, probe_key,
+                int(time.time() * 1000), settings.CRAWLER_CIRCUIT_THRESHOLD,
+                settings.CRAWLER_CIRCUIT_COOLDOWN * 1000, settings.CRAWLER_CIRCUIT_MAX_COOLDOWN * 1000,
+                '1' if probe else '0', settings.CRAWLER_CIRCUIT_WINDOW * 1000
+            )
+        except Exception as e:
+            logger.warning(f"记录 {host} 失败次数失败: {e}")
+            return
+        if open_until:
+            self._open_until[host] = int(open_until) / 1000
+            logger.warning(f"{host} 连续失败，熔断至 {time.strftime('%H:%M:%S', time.localtime(int(open_until) / 1000))}")
+
+    async def get_open_circuits(self) -> Dict[str, float]:
+        """当前打开的熔断器及剩余冷却秒数"""
+        circuits: Dict[str, float] = {}
+        now = time.time()
+        async for key in redis_manager.scan_iter(f"{CIRCUIT_KEY_PREFIX}:*"):
+            if key.endswith(":probe"):
+                continue
+            open_until = (await redis_manager.hgetall(key)).get("open_until")
+            if open_until and int(open_until) / 1000 > now:
+                circuits[key[len(CIRCUIT_KEY_PREFIX) + 1:]] = round(int(open_until) / 1000 - now, 1)
+        return circuits
+
+
+class GuardedRequest:
+    """包装 aiohttp 请求上下文：发出前取令牌/检查熔断，收到响应后记录结果"""
+
+    def __init__(self, guard: HostGuard, url: str, request_factory):
+        self._guard = guard
+        self._host = host_of(url)
+        self._request_factory = request_factory
+        self._context = None
+
+    async def __aenter__(self):
+        probe = await self._guard.acquire(self._host)
+        self._context = self._request_factory()
+        try:
+            response = await self._context.__aenter__()
+        except asyncio.CancelledError:
+            # 被竞速取消的请求不代表主机故障；探测标记随超时自然释放
+            raise
+        except Exception:
+            await self._guard.record_failure(self._host, probe)
+            raise
+        if is_failure_status(response.status):
+            await self._guard.record_failure(self._host, probe)
+        else:
+            await self._guard.record_success(self._host, probe)
+        return response
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return await self._context.__aexit__(exc_type, exc_val, exc_tb)
+
+
+# 全局实例
+host_guard = HostGuard()
@@ -0,0 +1,85 @@
+"""热度文本解析
+
+各平台的热度字段格式不一：纯数字（"2345678"）、带量级（"1.2万"、"3.5亿"、"12w"）、
+带单位（"345万播放"、"1,234评论"）、区间（"10-20万"）以及无数值的标签（"热"、"新"）。
+文本中有多个数值时（"TOP3 120万"）取最大的一个，日期和时刻不参与解析。
+normalize_hot_values 在入库前对一个批次统一解析为整数热度分数，
+同一批次中重复的文本只解析一次；原始文本另行保存用于展示。
+"""
+from typing import Dict, Iterable, List, Optional
+import re
+
+
+# 量级后缀 -> 倍数
+MAGNITUDES = {
+    "万": 10_000,
+    "w": 10_000,
+    "W": 10_000,
+    "亿": 100_000_000,
+    "千": 1_000,
+    "k": 1_000,
+    "K": 1_000,
+    "百": 100,
+}
+
+# hot_items.score 为 INTEGER，超出范围的值按上限保存
+MAX_SCORE = 2 ** 31 - 1
+
+# 数值 + 紧跟的可选量级（"万亿" 等连用时逐个相乘），其后可以是任意单位文字；
+# 字母量级后面不能再跟字母（"5weeks" 中的 w 不是量级）
+_NUMBER = r"(\d+(?:\.\d+)?)((?:[万亿千百]|[wWkK](?![A-Za-z]))*)"
+# 区间：两个数值之间以 -、~、至、到 连接
+_HOT_VALUE_RE = re.compile(_NUMBER + r"(?:\s*(?:-|~|～|—|–|至|到)\s*" + _NUMBER + r")?")
+# 千分位分隔符（逗号后恰好三位数字）
+_THOUSANDS_RE = re.compile(r"(?<=\d)[,，](?=\d{3}(?!\d))")
+# 日期（"2024-10-17"、"2024年10月17日"）和时刻（"12:30"）
+_DATETIME_RE = re.compile(r"\d{4}[-/.年]\d{1,2}[-/.月]\d{1,2}日?|\d{1,2}:\d{2}(?::\d{2})?")
+
+
+def _scale(number: str, suffix: str) -> float:
+    value = float(number)
+    for char in suffix:
+        value *= MAGNITUDES[char]
+    return value
+
+
+def _match_value(match: "re.Match") -> float:
+    """区间取中点，只有后一个数值带量级时（"10-20万"）前一个数值沿用该量级；
+    后一个数值小于前一个时不是区间，取两者中较大的"""
+    low_number, low_suffix, high_number, high_suffix = match.groups()
+    low = _scale(low_number, low_suffix)
+    if high_number is None:
+        return low
+    high = _scale(high_number, high_suffix)
+    if not low_suffix:
+        low = _scale(low_number, high_suffix)
+    if high < low:
+        return max(_scale(low_number, low_suffix), high)
+    return (low + high) / 2
+
+
+def parse_hot_value(text: Optional[str]) -> int:
+    """解析单个热度文本，没有数值时返回0"""
+    if text is None:
+        return 0
+    if isinstance(text, (int, float)):
+        return min(max(int(text), 0), MAX_SCORE)
+    text = str(text)
+    if text.isdecimal():
+        return min(int(text), MAX_SCORE)
+
+    text = _THOUSANDS_RE.sub("", _DATETIME_RE.sub(" ", text))
+    value = max((_match_value(match) for match in _HOT_VALUE_RE.finditer(text)), default=0)
+    return min(int(value), MAX_SCORE)
+
+
+def normalize_hot_values(values: Iterable[Optional[str]]) -> List[int]:
+    """批量解析一个批次的热度文本，返回与输入一一对应的热度分数"""
+    parsed: Dict[object, int] = {}
+    scores = []
+    for value in values:
+        score = parsed.get(value)
+        if score is None:
+            score = parsed[value] = parse_hot_value(value)
+        scores.append(score)
+    return scores
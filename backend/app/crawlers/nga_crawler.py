@@ -1,11 +1,12 @@
 """NGA杂谈爬虫"""
 from typing import List
 from datetime import datetime
+import json
 import logging
 import aiohttp
 logger = logging.getLogger(__name__)
 
-from .base import BaseCrawler, HotItem
+from .base import BaseCrawler, HotItem, ContentNotModified
 
 
 class NGACrawler(BaseCrawler):
@@ -31,13 +32,6 @@ class NGACrawler(BaseCrawler):
     
     async def crawl(self) -> List[HotItem]:
         """Crawl NGA hot topics using new API"""
-        # Ensure session is created
-        if not self.session:
-            self.session = aiohttp.ClientSession(
-                headers=self.headers,
-                timeout=aiohttp.ClientTimeout(total=30)
-            )
-        
         try:
             # Use new NGA API endpoint
             api_url = "https://ngabbs.com/nuke.php?__lib=load_topic&__act=load_topic_reply_ladder2&opt=1&all=1"
@@ -49,93 +43,16 @@ class NGACrawler(BaseCrawler):
             
             async with self.session.post(api_url, headers=self.headers, data=data) as response:
                 if response.status == 200:
-                    # Handle different content types
-                    content_type = response.headers.get('content-type', '')
-                    
-                    if 'json' in content_type:
-                        # Force JSON parsing even with non-standard content type
-                        text = await response.text()
-                        import json
-                        result = json.loads(text)
-                    else:
-                        result = await response.json()
-                    
-                    items = []
-                    rank = 1
-                    topics = []
-                    
-                    # Parse API response data
-                    if 'result' in result:
-                        if len(result['result']) > 0:
-                            # Check if result is a list of lists or direct list
-                            if isinstance(result['result'][0], list):
-                                topics = result['result'][0]  # Get first result array
-                            else:
-                                topics = result['result']  # Direct list
-                        else:
-                            logger.warning("No results found in API response")
-                            return []
-                    else:
-                        logger.warning("Unexpected API response structure")
-                        return []
-                    for topic_data in topics[:30]:  # Take first 30 items
-                            try:
-                                # Extract title
-                                title = topic_data.get('subject', '').strip()
-                                if not title:
-                                    continue
-                                
-                                # Build topic URL
-                                tpcurl = topic_data.get('tpcurl')
-                                if tpcurl:
-                                    url = f"https://bbs.nga.cn{tpcurl}"
-                                else:
-                                    continue
-                                
-                                # Extract author
-                                author = topic_data.get('author', '')
-                                
-                                # Extract reply count
-                                comment_count = topic_data.get('replies', 0)
-                                if isinstance(comment_count, str):
-                                    try:
-                                        comment_count = int(comment_count)
-                                    except ValueError:
-                                        comment_count = 0
-                                
-                                # Extract publish time
-                                publish_time = None
-                                postdate = topic_data.get('postdate')
-                                if postdate:
-                                    try:
-                                        # NGA timestamp is usually in seconds
-                                        publish_time = datetime.fromtimestamp(int(postdate))
-                                    except (ValueError, TypeError):
-                                        publish_time = datetime.now()
-                                else:
-                                    publish_time = datetime.now()
-                                
-                                item = HotItem(
-                                    title=title,
-                                    url=url,
-                                    rank=rank,
-                                    author=author,
-                                    comment_count=comment_count,
-                                    publish_time=publish_time
-                                )
-                                items.append(item)
-                                rank += 1
-                                
-                            except Exception as e:
-                                logger.warning(f"Failed to parse NGA topic data: {e}")
-                                continue
-                    
-                    return items
+                    # Content type is not always application/json, decode the text directly
+                    text = await self.read_body(api_url, response)
+                    return parse_nga_topics(text)
                     
                 else:
                     logger.error(f"NGA API request failed, status code: {response.status}")
                     return []
                     
+        except ContentNotModified:
+            raise
         except Exception as e:
             logger.error(f"NGA API request exception: {e}")
             return []
@@ -166,3 +83,80 @@ class NGACrawler(BaseCrawler):
         except Exception as e:
             logger.error(f"Failed to get NGA topic details: {e}")
             return {'content': '', 'summary': ''}
+
+
+def parse_nga_topics(text: str) -> List[HotItem]:
+    """Parse the NGA hot topic API response"""
+    result = json.loads(text)
+    
+    items = []
+    rank = 1
+    topics = []
+    
+    # Parse API response data
+    if 'result' in result:
+        if len(result['result']) > 0:
+            # Check if result is a list of lists or direct list
+            if isinstance(result['result'][0], list):
+                topics = result['result'][0]  # Get first result array
+            else:
+                topics = result['result']  # Direct list
+        else:
+            logger.warning("No results found in API response")
+            return []
+    else:
+        logger.warning("Unexpected API response structure")
+        return []
+    for topic_data in topics[:30]:  # Take first 30 items
+        try:
+            # Extract title
+            title = topic_data.get('subject', '').strip()
+            if not title:
+                continue
+            
+            # Build topic URL
+            tpcurl = topic_data.get('tpcurl')
+            if tpcurl:
+                url = f"https://bbs.nga.cn{tpcurl}"
+            else:
+                continue
+            
+            # Extract author
+            author = topic_data.get('author', '')
+            
+            # Extract reply count
+            comment_count = topic_data.get('replies', 0)
+            if isinstance(comment_count, str):
+                try:
+                    comment_count = int(comment_count)
+                except ValueError:
+                    comment_count = 0
+            
+            # Extract publish time
+            publish_time = None
+            postdate = topic_data.get('postdate')
+            if postdate:
+                try:
+                    # NGA timestamp is usually in seconds
+                    publish_time = datetime.fromtimestamp(int(postdate))
+                except (ValueError, TypeError):
+                    publish_time = datetime.now()
+            else:
+                publish_time = datetime.now()
+            
+            item = HotItem(
+                title=title,
+                url=url,
+                rank=rank,
+                author=author,
+                comment_count=comment_count,
+                publish_time=publish_time
+            )
+            items.append(item)
+            rank += 1
+            
+        except Exception as e:
+            logger.warning(f"Failed to parse NGA topic data: {e}")
+            continue
+    
+    return items
@@ -0,0 +1,82 @@
+"""HTML解析执行器
+
+BeautifulSoup 解析是纯CPU操作，直接在事件循环上执行会阻塞同一进程中的API请求。
+爬虫把原始HTML交给模块级的纯函数在进程池（或线程池）中解析，只取回 HotItem
+列表等可序列化的结果。进程池的工作进程使用 spawn 方式启动，只导入解析函数所在
+的爬虫模块，不继承主进程的事件循环和连接。
+"""
+from typing import Optional
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
+import threading
+import logging
+logger = logging.getLogger(__name__)
+from bs4 import BeautifulSoup, FeatureNotFound
+
+from app.core.config import settings
+
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+_parser: Optional[str] = None
+
+
+def get_parser() -> str:
+    """返回可用的BeautifulSoup解析后端，配置的后端未安装时回退到 html.parser"""
+    global _parser
+    if _parser is None:
+        try:
+            BeautifulSoup("", settings.CRAWLER_PARSER)
+            _parser = settings.CRAWLER_PARSER
+        except FeatureNotFound:
+            logger.warning(f"解析后端 {settings.CRAWLER_PARSER} 不可用，使用 html.parser")
+            _parser = "html.parser"
+    return _parser
+
+
+def make_soup(html: str) -> BeautifulSoup:
+    """使用配置的解析后端构建文档树"""
+    return BeautifulSoup(html, get_parser())
+
+
+def get_parse_executor() -> Executor:
+    """获取解析执行器（懒加载），进程池无法创建时回退到线程池"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = max(1, settings.CRAWLER_PARSE_WORKERS)
+                if settings.CRAWLER_PARSE_EXECUTOR == "process":
+                    try:
+                        _executor = ProcessPoolExecutor(
+                            max_workers=workers,
+                            mp_context=multiprocessing.get_context("spawn")
+                        )
+                    except (OSError, NotImplementedError) as e:
+                        logger.warning(f"无法创建解析进程池，改用线程池: {e}")
+                if _executor is None:
+                    _executor = ThreadPoolExecutor(
+                        max_workers=workers,
+                        thread_name_prefix="crawler-parse"
+                    )
+                logger.info(f"HTML解析执行器已创建: {type(_executor).__name__} x {workers}")
+    return _executor
+
+
+def reset_parse_executor() -> None:
+    """丢弃已损坏的执行器（如工作进程被杀死），下次调用时重新创建"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_parse_executor() -> None:
+    """关闭解析执行器"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+        logger.info("HTML解析执行器已关闭")
@@ -0,0 +1,196 @@
+"""爬取运行记录
+
+每次 crawl_and_persist 中的每个爬虫对应一条 CrawlTask 记录，包含各阶段耗时：
+DNS解析、建立连接、下载字节数、解析、等待入库队列、写库、生成快照、失效缓存，
+以及条目数量和错误类型。
+运行中的记录通过 ContextVar 传递，请求级的计时来自共享会话的 aiohttp TraceConfig，
+爬虫代码不需要显式传参。记录先缓存在内存中，攒够一批或等待一段时间后一次写入。
+"""
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Set
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import asyncio
+import time
+import aiohttp
+import logging
+logger = logging.getLogger(__name__)
+
+from app.core.config import settings
+from app.core.metrics import observe_crawl_run
+
+
+# 与 app.models.crawl_task.TaskStatus 的取值一致（此模块会被解析进程导入，不引入模型）
+COMPLETED = "completed"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+# 当前协程所属的爬取记录，由爬虫管理器在执行爬虫前设置
+current_run: ContextVar[Optional["CrawlRun"]] = ContextVar("current_crawl_run", default=None)
+
+
+@dataclass
+class CrawlRun:
+    """单个爬虫一次运行的统计"""
+    crawler_name: str
+    trigger: str
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    completed_at: Optional[datetime] = None
+    status: str = "running"
+    requests_count: int = 0
+    bytes_downloaded: int = 0
+    # 各阶段耗时（毫秒），并发请求的耗时累加
+    dns_ms: float = 0.0
+    connect_ms: float = 0.0
+    crawl_ms: float = 0.0
+    parse_ms: float = 0.0
+    queue_wait_ms: float = 0.0
+    persist_ms: float = 0.0
+    snapshot_ms: float = 0.0
+    invalidate_ms: float = 0.0
+    items_count: int = 0
+    items_inserted: int = 0
+    items_updated: int = 0
+    error_class: Optional[str] = None
+    error_message: Optional[str] = None
+
+    def add(self, stage: str, seconds: float) -> None:
+        setattr(self, f"{stage}_ms", getattr(self, f"{stage}_ms") + seconds * 1000)
+
+    @contextmanager
+    def timed(self, stage: str) -> Iterator[None]:
+        """累计代码块的耗时到指定阶段"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started)
+
+    def finish(self, status: str, error: Optional[BaseException] = None, error_class: Optional[str] = None) -> None:
+        self.status = status
+        self.completed_at = datetime.now(timezone.utc)
+        if error is not None:
+            self.error_class = type(error).__name__
+            self.error_message = str(error)[:1000]
+        elif error_class:
+            self.error_class = error_class
+
+    def to_row(self, category_id: int) -> Dict[str, Any]:
+        return {
+            "category_id": category_id,
+            "crawler_name": self.crawler_name,
+            "trigger": self.trigger,
+            "status": self.status,
+            "started_at": self.started_at,
+            "completed_at": self.completed_at or datetime.now(timezone.utc),
+            "items_count": self.items_count,
+            "items_inserted": self.items_inserted,
+            "items_updated": self.items_updated,
+            "requests_count": self.requests_count,
+            "bytes_downloaded": self.bytes_downloaded,
+            "dns_ms": round(self.dns_ms),
+            "connect_ms": round(self.connect_ms),
+            "crawl_ms": round(self.crawl_ms),
+            "parse_ms": round(self.parse_ms),
+            "queue_wait_ms": round(self.queue_wait_ms),
+            "persist_ms": round(self.persist_ms),
+            "snapshot_ms": round(self.snapshot_ms),
+            "invalidate_ms": round(self.invalidate_ms),
+            "error_class": self.error_class,
+            "error_message": self.error_message,
+        }
+
+
+def create_trace_config() -> aiohttp.TraceConfig:
+    """共享会话的请求追踪：把DNS、建连耗时和下载字节数计入当前爬取记录"""
+
+    async def on_request_start(session, ctx: SimpleNamespace, params) -> None:
+        run = current_run.get()
+        if run is not None:
+            run.requests_count += 1
+
+    async def on_dns_resolvehost_start(session, ctx: SimpleNamespace, params) -> None:
+        ctx.dns_started = time.perf_counter()
+
+    async def on_dns_resolvehost_end(session, ctx: SimpleNamespace, params) -> None:
+        run = current_run.get()
+        if run is not None and hasattr(ctx, "dns_started"):
+            run.add("dns", time.perf_counter() - ctx.dns_started)
+
+    async def on_connection_create_start(session, ctx: SimpleNamespace, params) -> None:
+        ctx.connect_started = time.perf_counter()
+
+    async def on_connection_create_end(session, ctx: SimpleNamespace, params) -> None:
+        run = current_run.get()
+        if run is not None and hasattr(ctx, "connect_started"):
+            run.add("connect", time.perf_counter() - ctx.connect_started)
+
+    async def on_response_chunk_received(session, ctx: SimpleNamespace, params) -> None:
+        run = current_run.get()
+        if run is not None:
+            run.bytes_downloaded += len(params.chunk)
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_dns_resolvehost_start.append(on_dns_resolvehost_start)
+    trace_config.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+    trace_config.on_connection_create_start.append(on_connection_create_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_response_chunk_received.append(on_response_chunk_received)
+    return trace_config
+
+
+class CrawlTelemetry:
+    """批量写入爬取记录
+
+    record 同时计入Prometheus指标，并把记录放入内存缓冲区；缓冲区达到 CRAWL_TELEMETRY_BATCH_SIZE 条时立即写入，
+    否则最迟 CRAWL_TELEMETRY_FLUSH_SECONDS 秒后写入。写入失败的记录直接丢弃，不影响爬取。
+    """
+
+    def __init__(self, writer: Callable[[List[CrawlRun]], Awaitable[None]]):
+        self._writer = writer
+        self._buffer: List[CrawlRun] = []
+        self._timer: Optional[asyncio.Task] = None
+        # 进行中的写入任务，保留引用避免被垃圾回收
+        self._tasks: Set[asyncio.Task] = set()
+        self._lock = asyncio.Lock()
+
+    def record(self, run: CrawlRun) -> None:
+        observe_crawl_run(run)
+        self._buffer.append(run)
+        if len(self._buffer) >= settings.CRAWL_TELEMETRY_BATCH_SIZE:
+            self._spawn(self.flush())
+        elif self._timer is None or self._timer.done():
+            self._timer = self._spawn(self._flush_later())
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(settings.CRAWL_TELEMETRY_FLUSH_SECONDS)
+        # 关闭时取消定时器不应中断已开始的写入
+        await asyncio.shield(self.flush())
+
+    async def flush(self) -> int:
+        """写入缓冲区中的全部记录，返回写入条数"""
+        async with self._lock:
+            runs, self._buffer = self._buffer, []
+            if not runs:
+                return 0
+            try:
+                await self._writer(runs)
+            except Exception as e:
+                logger.warning(f"写入 {len(runs)} 条爬取记录失败: {e}")
+                return 0
+            return len(runs)
+
+    async def close(self) -> None:
+        """取消定时写入并写入剩余记录"""
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
+        await self.flush()
@@ -0,0 +1,57 @@
+"""条件请求校验器
+
+按URL在Redis中保存上次成功入库时的 ETag、Last-Modified 和响应体哈希。下次抓取时
+携带 If-None-Match/If-Modified-Since，上游返回304或响应体哈希不变时跳过解析和写库。
+校验器在抓取时只暂存在爬虫实例上，入库成功后才写入Redis，写库失败的内容下一轮
+仍会被完整处理。
+"""
+from typing import Dict
+import hashlib
+import logging
+logger = logging.getLogger(__name__)
+
+from app.core.config import settings
+from app.core.redis import redis_manager
+
+
+VALIDATOR_KEY_PREFIX = "fetch:validators"
+SAVED_CYCLES_KEY = "fetch:saved_cycles"
+
+# 跳过原因：上游返回304 / 响应体与上次入库时相同
+NOT_MODIFIED = "not_modified"
+UNCHANGED_BODY = "unchanged_body"
+
+
+def validator_key(url: str) -> str:
+    """校验器键，URL可能很长，使用摘要"""
+    return f"{VALIDATOR_KEY_PREFIX}:{hashlib.sha1(url.encode('utf-8')).hexdigest()}"
+
+
+def body_hash(body: bytes) -> str:
+    return hashlib.sha1(body).hexdigest()
+
+
+async def load_validators(url: str) -> Dict[str, str]:
+    """读取URL上次入库时的校验器，不存在时返回空字典"""
+    return await redis_manager.hgetall(validator_key(url))
+
+
+async def save_validators(validators: Dict[str, Dict[str, str]]) -> None:
+    """入库成功后保存本轮抓取的校验器"""
+    for url, fields in validators.items():
+        if fields:
+            await redis_manager.hset(validator_key(url), fields, expire=settings.CRAWLER_VALIDATOR_TTL)
+
+
+async def record_saved_cycle(crawler_name: str, reason: str) -> None:
+    """累计因内容未变化而跳过的爬取周期"""
+    await redis_manager.hincrby(SAVED_CYCLES_KEY, f"{crawler_name}:{reason}")
+
+
+async def get_saved_cycles() -> Dict[str, Dict[str, int]]:
+    """各爬虫按原因统计的跳过次数"""
+    counters: Dict[str, Dict[str, int]] = {}
+    for field, value in (await redis_manager.hgetall(SAVED_CYCLES_KEY)).items():
+        crawler_name, _, reason = field.rpartition(":")
+        counters.setdefault(crawler_name, {})[reason] = int(value)
+    return counters
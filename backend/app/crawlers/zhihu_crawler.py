@@ -1,10 +1,13 @@
 """知乎热榜爬虫"""
 from typing import List
 from datetime import datetime
+import json
+import re
 import logging
 logger = logging.getLogger(__name__)
 
-from .base import BaseCrawler, HotItem
+from .base import BaseCrawler, HotItem, ContentNotModified
+from .parsing import make_soup
 
 class ZhihuCrawler(BaseCrawler):
     """知乎热榜爬虫"""
@@ -42,61 +45,66 @@ class ZhihuCrawler(BaseCrawler):
             logger.info(f"正在请求知乎热榜页面: {url}")
             
             html = await self.fetch(url, headers=headers)
-            soup = self.parse_html(html)
+            return await self.parse_in_executor(parse_zhihu_billboard, html)
+                    
+        except ContentNotModified:
+            raise
+        except Exception as e:
+            logger.error(f"爬取知乎热榜失败: {e}", exc_info=True)
+            return []
 
-            script_tag = soup.find('script', id='js-initialData')
-            if not script_tag:
-                logger.warning("未找到ID为 'js-initialData' 的 script 标签")
-                return []
 
-            try:
-                import json
-                json_data = json.loads(script_tag.string)
-                hot_list = json_data.get('initialState', {}).get('topstory', {}).get('hotList', [])
-            except (json.JSONDecodeError, AttributeError) as e:
-                logger.error(f"解析知乎热榜JSON数据失败: {e}")
-                return []
+def parse_zhihu_billboard(html: str) -> List[HotItem]:
+    """解析知乎热榜页面内嵌的初始数据（在解析执行器中运行）"""
+    soup = make_soup(html)
 
-            items = []
-            for i, item_data in enumerate(hot_list):
-                try:
-                    target = item_data.get('target', {})
-                    title = target.get('titleArea', {}).get('text', '')
-                    link = target.get('link', {}).get('url', '')
-                    metrics = target.get('metricsArea', {}).get('text', '')
-                    
-                    if not title or not link:
-                        continue
-
-                    hot_value = '0'
-                    if '万' in metrics:
-                        try:
-                            import re
-                            match = re.search(r'([\d.]+)万', metrics)
-                            if match:
-                                hot_num = float(match.group(1))
-                                hot_value = str(int(hot_num * 10000))
-                        except (ValueError, AttributeError):
-                            pass
-                    else:
-                        hot_value = ''.join(filter(str.isdigit, metrics))
+    script_tag = soup.find('script', id='js-initialData')
+    if not script_tag:
+        logger.warning("未找到ID为 'js-initialData' 的 script 标签")
+        return []
 
+    try:
+        json_data = json.loads(script_tag.string)
+        hot_list = json_data.get('initialState', {}).get('topstory', {}).get('hotList', [])
+    except (json.JSONDecodeError, AttributeError, TypeError) as e:
+        logger.error(f"解析知乎热榜JSON数据失败: {e}")
+        return []
 
-                    item_obj = HotItem(
-                        title=title,
-                        url=link,
-                        rank=i + 1,
-                        hot_value=hot_value,
-                        publish_time=datetime.now()
-                    )
-                    items.append(item_obj)
-                except Exception as e:
-                    logger.warning(f"解析知乎热榜条目失败: {e}, item_data: {item_data}")
-                    continue
+    items = []
+    for i, item_data in enumerate(hot_list):
+        try:
+            target = item_data.get('target', {})
+            title = target.get('titleArea', {}).get('text', '')
+            link = target.get('link', {}).get('url', '')
+            metrics = target.get('metricsArea', {}).get('text', '')
             
-            logger.info(f"成功解析到 {len(items)} 条知乎热榜")
-            return items
-                    
+            if not title or not link:
+                continue
+
+            hot_value = '0'
+            if '万' in metrics:
+                try:
+                    match = re.search(r'([\d.]+)万', metrics)
+                    if match:
+                        hot_num = float(match.group(1))
+                        hot_value = str(int(hot_num * 10000))
+                except (ValueError, AttributeError):
+                    pass
+            else:
+                hot_value = ''.join(filter(str.isdigit, metrics))
+
+
+            item_obj = HotItem(
+                title=title,
+                url=link,
+                rank=i + 1,
+                hot_value=hot_value,
+                publish_time=datetime.now()
+            )
+            items.append(item_obj)
         except Exception as e:
-            logger.error(f"爬取知乎热榜失败: {e}", exc_info=True)
-            return []
\ No newline at end of file
+            logger.warning(f"解析知乎热榜条目失败: {e}, item_data: {item_data}")
+            continue
+    
+    logger.info(f"成功解析到 {len(items)} 条知乎热榜")
+    return items
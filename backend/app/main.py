@@ -1,21 +1,81 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+import asyncio
+import functools
+import time
 import uvicorn
 from loguru import logger
 
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import engine, Base, ensure_schema, AsyncSessionLocal
+from app.core.metrics import MetricsMiddleware, render_metrics
 from app.api.v1.api import api_router
 from app.core.scheduler import scheduler
 from app.crawlers.crawler_manager import crawler_manager
 from app.core.redis import redis_manager
+from app.core.local_cache import local_cache, CACHE_INVALIDATION_CHANNEL
+from app.services.hot_list_stream import hot_list_stream, HOT_LIST_UPDATES_CHANNEL
+from app.services.snapshot_service import snapshot_service
+from app.services.history_service import history_service
+from app.services.cluster_service import cluster_service
+
+
+async def _data_age_seconds() -> float:
+    """最新快照距今的秒数，尚无快照时返回 inf"""
+    async with AsyncSessionLocal() as db:
+        generated_at = await snapshot_service.latest_generated_at(db)
+    if generated_at is None:
+        return float("inf")
+    return (datetime.now(timezone.utc) - generated_at).total_seconds()
+
+
+async def _warm_crawl(app: FastAPI) -> None:
+    """后台预热爬取
+
+    每次成为主节点时由调度器在后台执行（启动时未竞选成功的副本在接管时执行）；
+    已有快照足够新（未超过最短爬取间隔）时跳过，避免频繁重启或主节点切换时重复爬取。
+    """
+    state = app.state.startup
+    try:
+        if not scheduler.is_leader:
+            state["initial_crawl"] = "skipped_not_leader"
+            return
+        if await _data_age_seconds() < settings.CRAWL_MIN_INTERVAL_MINUTES * 60:
+            state["initial_crawl"] = "skipped_fresh"
+            return
+        
+        state["initial_crawl"] = "running"
+        started = time.perf_counter()
+        # 数据已过期，不使用条件请求，确保每个平台都刷新一次
+        stats = await crawler_manager.crawl_and_persist(
+            fence=scheduler.leader_lock, conditional=False, trigger="warm"
+        )
+        state["initial_crawl_ms"] = round((time.perf_counter() - started) * 1000)
+        state["initial_crawl"] = "completed"
+        logger.info(
+            f"Initial crawl completed in {state['initial_crawl_ms']} ms, "
+            f"{len(stats)} crawlers wrote new data"
+        )
+    except asyncio.CancelledError:
+        state["initial_crawl"] = "cancelled"
+        raise
+    except Exception as e:
+        state["initial_crawl"] = "failed"
+        logger.error(f"Error during initial crawl task: {e}")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理"""
+    started = time.perf_counter()
+    app.state.startup = {
+        "cold_start_ms": None,
+        "initial_crawl": "pending",
+        "initial_crawl_ms": None,
+    }
     try:
         # 启动时执行
         logger.info("Starting MoMoYu API Server...")
@@ -23,23 +83,35 @@ async def lifespan(app: FastAPI):
         # 创建数据库表
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            await ensure_schema(conn)
+            # 提前创建排名历史的每日分区
+            await history_service.ensure_partitions(conn)
         
         # 连接Redis
         await redis_manager.connect()
+        
+        # 订阅缓存失效通知，爬取提交后各进程及时丢弃一级缓存
+        redis_manager.subscribe(CACHE_INVALIDATION_CHANNEL, local_cache.handle_invalidation)
+        # 订阅热榜变化，转发给本进程的推送连接
+        redis_manager.subscribe(HOT_LIST_UPDATES_CHANNEL, hot_list_stream.handle_message)
+        await redis_manager.start_listener()
 
         # 启动定时任务调度器
         scheduler.start()
         logger.info("Scheduler started")
-
-        # 立即执行一次爬虫任务
-        try:
-            import asyncio
-            await asyncio.sleep(5)  # 等待5秒，确保数据库准备就绪
-            results = await crawler_manager.crawl_all()
-            await crawler_manager.save_to_database(results)
-            logger.info("Initial crawl task executed successfully")
-        except Exception as e:
-            logger.error(f"Error during initial crawl task: {e}")
+        
+        # 首次爬取在成为主节点后于后台执行，启动后立即用已持久化的快照提供服务
+        scheduler.on_leadership(functools.partial(_warm_crawl, app))
+        # 聚类写入Redis只在主节点进行，租约变化时重建进程内索引
+        scheduler.on_leadership_change(cluster_service.set_leadership)
+        
+        # 竞选调度主节点，多副本部署时只有主节点注册爬取任务
+        await scheduler.start_election()
+        if not scheduler.is_leader:
+            app.state.startup["initial_crawl"] = "waiting_for_leadership"
+        
+        app.state.startup["cold_start_ms"] = round((time.perf_counter() - started) * 1000)
+        logger.info(f"Server ready in {app.state.startup['cold_start_ms']} ms")
         
         yield
     
@@ -48,10 +120,15 @@ async def lifespan(app: FastAPI):
     finally:
         # 关闭时执行
         logger.info("Shutting down MoMoYu API Server...")
+        # 取消进行中的预热爬取，并主动释放主节点租约，其他副本无需等待租约过期
+        await scheduler.stop_election()
         if scheduler.is_running:
             scheduler.shutdown()
             logger.info("Scheduler stopped")
         
+        # 关闭爬虫共享会话
+        await crawler_manager.close()
+        
         # 断开Redis连接
         await redis_manager.disconnect()
 
@@ -75,6 +152,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 请求耗时指标（最外层，包含CORS等中间件的耗时）
+app.add_middleware(MetricsMiddleware)
+
 # 注册API路由
 app.include_router(api_router, prefix="/api/v1")
 
@@ -99,6 +179,51 @@ async def health_check():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus 指标"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/ready")
+async def readiness_check():
+    """就绪检查
+
+    数据库可用即视为就绪（可以提供已持久化的快照）；同时报告数据是否新鲜、
+    首次爬取进度和冷启动耗时。数据库不可用时返回503。
+    """
+    try:
+        data_age = await _data_age_seconds()
+        database_ok = True
+    except Exception as e:
+        logger.warning(f"Readiness database check failed: {e}")
+        data_age = float("inf")
+        database_ok = False
+    
+    if data_age == float("inf"):
+        data_status = "empty"
+    elif data_age > settings.DATA_STALE_MINUTES * 60:
+        data_status = "stale"
+    else:
+        data_status = "fresh"
+    
+    return JSONResponse(
+        status_code=200 if database_ok else 503,
+        content={
+            "ready": database_ok,
+            "data": data_status,
+            "data_age_seconds": None if data_age == float("inf") else round(data_age),
+            "checks": {
+                "database": database_ok,
+                "redis": redis_manager.connected,
+            },
+            "scheduler_leader": scheduler.is_leader,
+            **getattr(app.state, "startup", {}),
+        }
+    )
+
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     """HTTP异常处理器"""
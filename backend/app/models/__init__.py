@@ -2,6 +2,8 @@ from .platform import Platform
 from .category import Category
 from .hot_item import HotItem
 from .crawl_task import CrawlTask
+from .hot_list_snapshot import HotListSnapshot
+from .hot_item_history import HotItemKey, HotItemSnapshot
 from .user import User
 
 __all__ = [
@@ -9,5 +11,8 @@ __all__ = [
     "Category", 
     "HotItem",
     "CrawlTask",
+    "HotListSnapshot",
+    "HotItemKey",
+    "HotItemSnapshot",
     "User"
 ]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from enum import Enum
@@ -12,6 +12,7 @@ class TaskStatus(str, Enum):
     COMPLETED = "completed"  # 已完成
     FAILED = "failed"        # 失败
     CANCELLED = "cancelled"  # 已取消
+    SKIPPED = "skipped"      # 上游内容未变化，跳过写库
 
 
 class CrawlTask(Base):
@@ -27,9 +28,33 @@ class CrawlTask(Base):
     items_count = Column(Integer, default=0, comment="爬取条目数量")
     error_message = Column(Text, comment="错误信息")
     
+    # 运行记录
+    crawler_name = Column(String(50), comment="爬虫名称")
+    trigger = Column(String(20), comment="触发方式：scheduled/manual/warm")
+    items_inserted = Column(Integer, default=0, comment="新增条目数量")
+    items_updated = Column(Integer, default=0, comment="更新条目数量")
+    requests_count = Column(Integer, default=0, comment="HTTP请求数")
+    bytes_downloaded = Column(BigInteger, default=0, comment="下载字节数")
+    error_class = Column(String(100), comment="错误类型")
+    
+    # 各阶段耗时（毫秒），并发请求的耗时累加
+    dns_ms = Column(Integer, comment="DNS解析耗时")
+    connect_ms = Column(Integer, comment="建立连接耗时（含DNS）")
+    crawl_ms = Column(Integer, comment="爬虫运行耗时（请求+解析）")
+    parse_ms = Column(Integer, comment="HTML解析耗时")
+    queue_wait_ms = Column(Integer, comment="等待入库队列耗时")
+    persist_ms = Column(Integer, comment="写库耗时")
+    snapshot_ms = Column(Integer, comment="生成快照耗时")
+    invalidate_ms = Column(Integer, comment="失效缓存耗时")
+    
     # 时间戳
     created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
     
+    __table_args__ = (
+        # 按爬虫过滤的键集分页
+        Index('ix_crawl_tasks_crawler_name_id', 'crawler_name', 'id'),
+    )
+    
     # 关系
     category = relationship("Category", back_populates="crawl_tasks")
     
@@ -48,7 +73,8 @@ class CrawlTask(Base):
             "error_message": self.error_message,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "category": self.category.to_simple_dict() if self.category else None,
-            "duration": self.get_duration()
+            "duration": self.get_duration(),
+            **self.telemetry_dict()
         }
     
     def to_simple_dict(self):
@@ -62,7 +88,30 @@ class CrawlTask(Base):
             "items_count": self.items_count,
             "error_message": self.error_message,
             "created_at": self.created_at.isoformat() if self.created_at else None,
-            "duration": self.get_duration()
+            "duration": self.get_duration(),
+            **self.telemetry_dict()
+        }
+    
+    def telemetry_dict(self):
+        """运行记录字段"""
+        return {
+            "crawler_name": self.crawler_name,
+            "trigger": self.trigger,
+            "items_inserted": self.items_inserted,
+            "items_updated": self.items_updated,
+            "requests_count": self.requests_count,
+            "bytes_downloaded": self.bytes_downloaded,
+            "error_class": self.error_class,
+            "timings_ms": {
+                "dns": self.dns_ms,
+                "connect": self.connect_ms,
+                "crawl": self.crawl_ms,
+                "parse": self.parse_ms,
+                "queue_wait": self.queue_wait_ms,
+                "persist": self.persist_ms,
+                "snapshot": self.snapshot_ms,
+                "invalidate": self.invalidate_ms,
+            },
         }
     
     def get_duration(self):
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, UniqueConstraint
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -19,9 +19,11 @@ class HotItem(Base):
     description = Column(Text, comment="描述")
     author = Column(String(100), comment="作者")
     score = Column(Integer, default=0, comment="热度分数")
+    hot_value = Column(String(100), comment="热度显示文本")
     comment_count = Column(Integer, default=0, comment="评论数")
     rank_position = Column(Integer, index=True, comment="排名位置")
     source_id = Column(String(100), comment="原平台ID")
+    item_key_id = Column(Integer, comment="排名历史条目ID（hot_item_keys.id）")
     tags = Column(ARRAY(String), comment="标签数组")
     
     # 时间戳
@@ -30,6 +32,11 @@ class HotItem(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), comment="更新时间")
     
+    # 唯一约束：同一分类下URL不能重复（批量 upsert 的冲突目标）
+    __table_args__ = (
+        UniqueConstraint('category_id', 'url', name='uq_hot_items_category_url'),
+    )
+    
     # 关系
     category = relationship("Category", back_populates="hot_items")
     
@@ -46,9 +53,11 @@ class HotItem(Base):
             "description": self.description,
             "author": self.author,
             "score": self.score,
+            "hot_value": self.hot_value,
             "comment_count": self.comment_count,
             "rank_position": self.rank_position,
             "source_id": self.source_id,
+            "item_key_id": self.item_key_id,
             "tags": self.tags or [],
             "published_at": self.published_at.isoformat() if self.published_at else None,
             "crawled_at": self.crawled_at.isoformat() if self.crawled_at else None,
@@ -67,9 +76,11 @@ class HotItem(Base):
             "description": self.description,
             "author": self.author,
             "score": self.score,
+            "hot_value": self.hot_value,
             "comment_count": self.comment_count,
             "rank_position": self.rank_position,
             "source_id": self.source_id,
+            "item_key_id": self.item_key_id,
             "tags": self.tags or [],
             "published_at": self.published_at.isoformat() if self.published_at else None,
             "crawled_at": self.crawled_at.isoformat() if self.crawled_at else None,
@@ -85,8 +96,10 @@ class HotItem(Base):
             "url": self.url,
             "author": self.author,
             "score": self.score,
+            "hot_value": self.hot_value,
             "comment_count": self.comment_count,
             "rank_position": self.rank_position,
+            "item_key_id": self.item_key_id,
             "tags": self.tags or [],
             "published_at": self.published_at.isoformat() if self.published_at else None
         }
@@ -101,6 +114,7 @@ class HotItem(Base):
             description=data.get("description"),
             author=data.get("author"),
             score=data.get("score", 0),
+            hot_value=data.get("hot_value"),
             comment_count=data.get("comment_count", 0),
             rank_position=data.get("rank_position"),
             source_id=data.get("source_id"),
@@ -0,0 +1,51 @@
+from sqlalchemy import Column, Integer, SmallInteger, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class HotItemKey(Base):
+    """热榜条目历史的维度表
+
+    按 (分类, URL) 为每个出现过的条目分配整数ID，标题只保存一份；hot_items 只保留
+    当前榜单，条目落榜被清理后历史仍可通过该表查到。
+    """
+    
+    __tablename__ = "hot_item_keys"
+    
+    id = Column(Integer, primary_key=True)
+    category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), nullable=False, comment="所属分类ID")
+    url = Column(String(2000), nullable=False, comment="链接地址")
+    title = Column(String(500), nullable=False, comment="最近一次的标题")
+    first_seen_at = Column(DateTime(timezone=True), server_default=func.now(), comment="首次上榜时间")
+    last_seen_at = Column(DateTime(timezone=True), server_default=func.now(), comment="最近一次在榜时间")
+    
+    __table_args__ = (
+        UniqueConstraint('category_id', 'url', name='uq_hot_item_keys_category_url'),
+    )
+    
+    def __repr__(self):
+        return f"<HotItemKey(id={self.id}, category_id={self.category_id})>"
+
+
+class HotItemSnapshot(Base):
+    """热榜条目排名历史（只追加）
+
+    每次入库为榜单上的每个条目追加一行，只保存整数列，约40字节/行。
+    PostgreSQL 上按 crawled_at 以天为单位范围分区，过期数据直接删除整个分区；
+    主键 (item_key_id, crawled_at) 同时用于按条目查询时间序列。
+    """
+    
+    __tablename__ = "hot_item_snapshots"
+    
+    item_key_id = Column(Integer, primary_key=True, comment="条目ID（hot_item_keys.id）")
+    crawled_at = Column(DateTime(timezone=True), primary_key=True, comment="爬取时间")
+    rank_position = Column(SmallInteger, nullable=False, comment="排名位置")
+    score = Column(Integer, nullable=False, default=0, comment="热度分数")
+    comment_count = Column(Integer, nullable=False, default=0, comment="评论数")
+    
+    __table_args__ = {
+        "postgresql_partition_by": "RANGE (crawled_at)",
+    }
+    
+    def __repr__(self):
+        return f"<HotItemSnapshot(item_key_id={self.item_key_id}, crawled_at={self.crawled_at}, rank={self.rank_position})>"
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class HotListSnapshot(Base):
+    """热榜快照模型
+
+    爬取入库后预先生成的完整响应文档，每个作用域一行，重新生成时版本号递增。
+    作用域形如 all、platform:<平台>、category:<平台>/<分类>。
+    """
+    
+    __tablename__ = "hot_list_snapshots"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(String(200), unique=True, nullable=False, comment="快照作用域")
+    version = Column(Integer, nullable=False, default=1, comment="快照版本")
+    payload = Column(Text, nullable=False, comment="序列化后的响应文档")
+    generated_at = Column(DateTime(timezone=True), nullable=False, comment="生成时间")
+    
+    # 时间戳
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), comment="更新时间")
+    
+    def __repr__(self):
+        return f"<HotListSnapshot(scope='{self.scope}', version={self.version})>"
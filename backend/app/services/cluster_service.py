@@ -0,0 +1,370 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+from dataclasses import dataclass
+import asyncio
+import json
+import re
+import time
+import zlib
+import numpy as np
+from sqlalchemy import and_, select
+from loguru import logger
+
+from app.core.config import settings
+from app.core.redis import redis_manager
+from app.models.platform import Platform
+from app.models.category import Category
+from app.models.hot_item import HotItem
+from app.models.hot_item_history import HotItemKey
+from app.services.trending_service import score_batch
+
+
+# 聚类在Redis中按聚类分别保存：有序集合（成员为聚类ID，分数为跨平台热度）+ 哈希（聚类ID -> 聚类JSON）
+CLUSTER_HEAT_KEY = "clusters:heat"
+CLUSTER_ITEMS_KEY = "clusters:items"
+# 最近一次写入聚类的时间，存在即表示Redis中的聚类完整（聚类全部解散时前两个键不存在）
+CLUSTER_UPDATED_KEY = "clusters:updated_at"
+
+# 读取聚类时每次从有序集合中取出的数量
+READ_PAGE_SIZE = 100
+
+# MinHash 置换参数：a*h + b 对小于 2^32 的素数取模，uint64 运算不会溢出
+_PRIME = np.uint64(4294967291)
+# 去掉空白和标点，只保留文字、字母和数字
+_NON_WORD_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def title_shingles(title: str) -> Set[str]:
+    """标题的字符二元组集合，中文标题没有分词边界，按字切分比按词更稳定"""
+    text = _NON_WORD_RE.sub("", title or "").lower()
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def jaccard(left: Set[str], right: Set[str]) -> float:
+    return len(left & right) / len(left | right)
+
+
+@dataclass
+class StoryMember:
+    """索引中的一个热榜条目（hot_item_keys.id 为键）"""
+    platform: str
+    category: str
+    title: str
+    url: str
+    rank: int
+    heat: float
+    shingles: Set[str]
+    band_keys: List[Tuple[int, bytes]]
+    cluster_id: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "platform": self.platform,
+            "category": self.category,
+            "title": self.title,
+            "url": self.url,
+            "rank": self.rank,
+            "heat": self.heat,
+        }
+
+
+class StoryIndex:
+    """标题近似重复的增量索引（MinHash + LSH）
+
+    每个标题按字符二元组计算 MinHash 签名并切分为若干段，任一段相同的条目为候选，
+    候选中与新条目 Jaccard 相似度最高且不低于 CLUSTER_SIMILARITY 的条目所在的聚类即为
+    新条目的聚类，否则新建聚类。聚类只在条目加入时确定，不做聚类间合并。
+    每个分类入库时只处理该分类的条目：标题未变的条目只更新排名和热度，
+    落榜的条目移出索引，开销与批次大小成正比，与索引中的条目总数无关。
+    聚类ID为 "命名空间-序号"，命名空间（调度主节点的防护令牌）区分不同进程生成的ID。
+    """
+
+    def __init__(self, num_perm: int, bands: int, similarity: float, namespace: str = "0"):
+        self.rows = num_perm // bands
+        self.bands = bands
+        self.similarity = similarity
+        generator = np.random.default_rng(1)
+        size = self.rows * bands
+        self._a = generator.integers(1, int(_PRIME), size, dtype=np.uint64)[:, None]
+        self._b = generator.integers(0, int(_PRIME), size, dtype=np.uint64)[:, None]
+        self.members: Dict[int, StoryMember] = {}
+        self.buckets: Dict[Tuple[int, bytes], Set[int]] = {}
+        self.clusters: Dict[str, Set[int]] = {}
+        self.by_category: Dict[Tuple[str, str], Set[int]] = {}
+        self.namespace = namespace
+        self._next_cluster_id = 1
+
+    def signature(self, shingles: Set[str]) -> np.ndarray:
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+            dtype=np.uint64, count=len(shingles)
+        )
+        return ((self._a * hashes + self._b) % _PRIME).min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [
+            (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def update(self, platform: str, category: str, entries: List[Dict[str, Any]]) -> Set[str]:
+        """用一个分类本次的榜单更新索引，entries 为 score_batch 的结果
+
+        返回本次有条目加入、移出或排名热度变化的聚类ID。
+        """
+        scope = (platform, category)
+        current = {entry["id"] for entry in entries}
+        touched: Set[str] = set()
+        for member_id in self.by_category.get(scope, set()) - current:
+            touched.add(self._remove(member_id))
+
+        indexed = set()
+        for entry in entries:
+            member = self.members.get(entry["id"])
+            if member is not None and member.title == entry["title"]:
+                if (member.rank, member.heat) != (entry["rank"], entry["heat"]):
+                    member.rank, member.heat = entry["rank"], entry["heat"]
+                    touched.add(member.cluster_id)
+                indexed.add(entry["id"])
+                continue
+            if member is not None:
+                touched.add(self._remove(entry["id"]))
+            cluster_id = self._add(platform, category, entry)
+            if cluster_id is not None:
+                touched.add(cluster_id)
+                indexed.add(entry["id"])
+        self.by_category[scope] = indexed
+        touched.discard(None)
+        return touched
+
+    def _add(self, platform: str, category: str, entry: Dict[str, Any]) -> Optional[str]:
+        shingles = title_shingles(entry["title"])
+        if not shingles:
+            return None
+        band_keys = self._band_keys(self.signature(shingles))
+
+        candidates: Set[int] = set()
+        for band_key in band_keys:
+            candidates |= self.buckets.get(band_key, set())
+        best_id, best_similarity = None, self.similarity
+        for candidate_id in candidates:
+            similarity = jaccard(shingles, self.members[candidate_id].shingles)
+            if similarity >= best_similarity:
+                best_id, best_similarity = candidate_id, similarity
+
+        if best_id is not None:
+            cluster_id = self.members[best_id].cluster_id
+        else:
+            cluster_id = f"{self.namespace}-{self._next_cluster_id}"
+            self._next_cluster_id += 1
+        self.clusters.setdefault(cluster_id, set()).add(entry["id"])
+        for band_key in band_keys:
+            self.buckets.setdefault(band_key, set()).add(entry["id"])
+        self.members[entry["id"]] = StoryMember(
+            platform=platform,
+            category=category,
+            title=entry["title"],
+            url=entry["url"],
+            rank=entry["rank"],
+            heat=entry["heat"],
+            shingles=shingles,
+            band_keys=band_keys,
+            cluster_id=cluster_id,
+        )
+        return cluster_id
+
+    def _remove(self, member_id: int) -> Optional[str]:
+        member = self.members.pop(member_id, None)
+        if member is None:
+            return None
+        for band_key in member.band_keys:
+            bucket = self.buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(member_id)
+                if not bucket:
+                    del self.buckets[band_key]
+        cluster = self.clusters.get(member.cluster_id)
+        if cluster is not None:
+            cluster.discard(member_id)
+            if not cluster:
+                del self.clusters[member.cluster_id]
+        return member.cluster_id
+
+    def cluster_summary(self, cluster_id: str) -> Optional[Dict[str, Any]]:
+        """一个聚类的结果，聚类不存在或只有一个条目时返回None
+
+        跨平台热度为各平台中热度最高的条目之和（热度已在各自榜单内归一化），
+        同一平台内的重复条目不重复计入。
+        """
+        member_ids = self.clusters.get(cluster_id)
+        if not member_ids or len(member_ids) < 2:
+            return None
+        members = sorted((self.members[member_id] for member_id in member_ids), key=lambda m: -m.heat)
+        platform_heat: Dict[str, float] = {}
+        for member in members:
+            platform_heat.setdefault(member.platform, member.heat)
+        return {
+            "id": cluster_id,
+            "title": members[0].title,
+            "heat": round(sum(platform_heat.values()), 4),
+            "platform_count": len(platform_heat),
+            "platforms": list(platform_heat),
+            "items": [member.to_dict() for member in members],
+        }
+
+    def story_clusters(self) -> List[Dict[str, Any]]:
+        """包含多个条目的聚类，按跨平台热度降序"""
+        clusters = [
+            cluster for cluster in map(self.cluster_summary, self.clusters)
+            if cluster is not None
+        ]
+        clusters.sort(key=lambda cluster: (-cluster["heat"], cluster["id"]))
+        return clusters
+
+
+class ClusterService:
+    """跨平台热点聚类
+
+    爬取入库后由（调度主节点上的）爬虫管理器调用 update，更新本进程的增量索引，
+    只把本批次涉及的聚类写入Redis（按热度排序的有序集合 + 聚类详情哈希），
+    读接口在任意进程中都从Redis读取。进程内索引首次使用时按数据库中的当前榜单构建一次，
+    此时（以及Redis中的数据丢失后）整体重写Redis中的聚类。
+    只有调度主节点写Redis：租约变化时丢弃进程内索引，获得租约后的首次更新以新的防护令牌
+    为聚类ID命名空间重建索引并整体重写，不会与前任主节点写入的聚类ID冲突。
+    """
+
+    def __init__(self):
+        self._namespace: Optional[str] = None
+        self.index = self._new_index()
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    def _new_index(self) -> StoryIndex:
+        return StoryIndex(
+            settings.CLUSTER_NUM_PERM, settings.CLUSTER_BANDS, settings.CLUSTER_SIMILARITY,
+            namespace=self._namespace or "0"
+        )
+
+    def set_leadership(self, token: Optional[int]) -> None:
+        """调度主节点租约变化时调用，token 为获得租约时的防护令牌，失去租约时为None"""
+        self._namespace = str(token) if token is not None else None
+        self._loaded = False
+
+    @staticmethod
+    def _redis():
+        if redis_manager.connected and redis_manager.redis_client is not None:
+            return redis_manager.redis_client
+        return None
+
+    async def update(self, db, platform_name: str, category_name: str, entries: List[Dict[str, Any]]) -> None:
+        """用一个分类本次的榜单更新聚类，失败只记录日志"""
+        try:
+            async with self._lock:
+                rewrite = not self._loaded
+                if rewrite:
+                    await self._load(db)
+                touched = self.index.update(platform_name, category_name, entries)
+                client = self._redis() if self._namespace is not None else None
+                if client is None:
+                    return
+                if not rewrite and not await client.exists(CLUSTER_UPDATED_KEY):
+                    rewrite = True
+                if rewrite:
+                    touched = {
+                        cluster_id for cluster_id, member_ids in self.index.clusters.items()
+                        if len(member_ids) > 1
+                    }
+                await self._store(client, touched, rewrite)
+        except Exception as e:
+            logger.error(f"更新热点聚类失败 {platform_name}/{category_name}: {e}")
+
+    async def _store(self, client, cluster_ids: Set[str], rewrite: bool) -> None:
+        """把指定聚类的当前结果写入Redis，已解散的聚类从Redis中移除"""
+        async with client.pipeline(transaction=True) as pipe:
+            if rewrite:
+                pipe.delete(CLUSTER_HEAT_KEY, CLUSTER_ITEMS_KEY)
+            for cluster_id in cluster_ids:
+                cluster = self.index.cluster_summary(cluster_id)
+                if cluster is None:
+                    pipe.zrem(CLUSTER_HEAT_KEY, cluster_id)
+                    pipe.hdel(CLUSTER_ITEMS_KEY, cluster_id)
+                else:
+                    pipe.zadd(CLUSTER_HEAT_KEY, {str(cluster_id): cluster["heat"]})
+                    pipe.hset(CLUSTER_ITEMS_KEY, cluster_id, json.dumps(cluster, ensure_ascii=False))
+            pipe.expire(CLUSTER_HEAT_KEY, settings.CLUSTER_SNAPSHOT_TTL)
+            pipe.expire(CLUSTER_ITEMS_KEY, settings.CLUSTER_SNAPSHOT_TTL)
+            pipe.set(CLUSTER_UPDATED_KEY, int(time.time()), ex=settings.CLUSTER_SNAPSHOT_TTL)
+            await pipe.execute()
+
+    async def _load(self, db) -> None:
+        """按各分类当前榜单构建索引"""
+        stmt = (
+            select(
+                Platform.name, Category.name, HotItemKey.id,
+                HotItem.url, HotItem.title, HotItem.rank_position, HotItem.score
+            )
+            .select_from(HotItem)
+            .join(Category, Category.id == HotItem.category_id)
+            .join(Platform, Platform.id == Category.platform_id)
+            .join(HotItemKey, and_(
+                HotItemKey.category_id == HotItem.category_id,
+                HotItemKey.url == HotItem.url,
+            ))
+            .where(Platform.is_active == True, Category.is_active == True)
+        )
+        lists: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for platform_name, category_name, key_id, url, title, rank, score in (await db.execute(stmt)).all():
+            current = lists.setdefault((platform_name, category_name), {"rows": [], "key_ids": {}})
+            current["rows"].append({"url": url, "title": title, "rank_position": rank or 999, "score": score})
+            current["key_ids"][url] = key_id
+
+        index = self._new_index()
+        for (platform_name, category_name), current in lists.items():
+            index.update(platform_name, category_name, score_batch(current["rows"], {}, current["key_ids"]))
+        self.index = index
+        self._loaded = True
+        logger.info(f"热点聚类索引已构建：{len(index.members)} 个条目，{len(lists)} 个分类")
+
+    async def get_clusters(self, min_platforms: int = 2, limit: int = 50) -> Optional[List[Dict[str, Any]]]:
+        """按跨平台热度读取聚类结果
+
+        Redis中没有聚类时，已构建索引的进程（调度主节点）使用本进程的索引，
+        其他进程返回None（聚类结果暂不可用）。
+        """
+        client = self._redis()
+        if client is not None:
+            try:
+                clusters = await self._read(client, min_platforms, limit)
+                if clusters is not None:
+                    return clusters
+            except Exception as e:
+                logger.error(f"读取热点聚类失败: {e}")
+        if not self._loaded:
+            return None
+        clusters = self.index.story_clusters()
+        return [cluster for cluster in clusters if cluster["platform_count"] >= min_platforms][:limit]
+
+    @staticmethod
+    async def _read(client, min_platforms: int, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """从Redis按热度分页读取，Redis中没有聚类时返回None"""
+        clusters: List[Dict[str, Any]] = []
+        start = 0
+        while len(clusters) < limit:
+            cluster_ids = await client.zrevrange(CLUSTER_HEAT_KEY, start, start + READ_PAGE_SIZE - 1)
+            if not cluster_ids:
+                if start == 0 and not await client.exists(CLUSTER_UPDATED_KEY):
+                    return None
+                break
+            for raw in await client.hmget(CLUSTER_ITEMS_KEY, cluster_ids):
+                if raw is None:
+                    continue
+                cluster = json.loads(raw)
+                if cluster["platform_count"] >= min_platforms:
+                    clusters.append(cluster)
+            start += READ_PAGE_SIZE
+        return clusters[:limit]
+
+
+# 全局热点聚类服务实例
+cluster_service = ClusterService()
@@ -0,0 +1,248 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+from datetime import date, datetime, time, timedelta, timezone
+from sqlalchemy import Integer, cast, delete, extract, func, literal_column, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from loguru import logger
+
+from app.core.config import settings
+from app.models.hot_item_history import HotItemKey, HotItemSnapshot
+
+
+SNAPSHOT_TABLE = HotItemSnapshot.__tablename__
+PARTITION_PREFIX = f"{SNAPSHOT_TABLE}_p"
+
+# 单条 INSERT 的最大行数，避免超出驱动的绑定参数上限
+CHUNK_SIZE = 1000
+
+# 时间序列的降采样粒度 -> 桶长度（秒）
+RESOLUTIONS = {"5m": 300, "1h": 3600, "1d": 86400}
+
+
+def partition_name(day: date) -> str:
+    """某一天（UTC）的分区表名"""
+    return f"{PARTITION_PREFIX}{day:%Y%m%d}"
+
+
+def _day_start(day: date) -> str:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc).isoformat()
+
+
+def _dialect_name(db) -> str:
+    """会话或连接对应的数据库方言"""
+    dialect = getattr(db, "dialect", None)
+    return (dialect or db.get_bind().dialect).name
+
+
+class HistoryService:
+    """热榜条目排名历史
+
+    hot_items 每个分类只保留当前榜单，每次入库时额外向 hot_item_snapshots 追加一行
+    （条目ID、排名、热度、评论数、爬取时间），条目的URL和标题只在 hot_item_keys 中保存一份。
+    PostgreSQL 上快照表按天（UTC）分区：分区提前创建，写入时缺失的分区按需补建，
+    过期数据通过删除整个分区清理，不产生逐行删除的表膨胀。
+    """
+
+    def __init__(self):
+        # 本进程已确认存在的分区
+        self._partitions: Set[date] = set()
+
+    async def ensure_partition(self, db, day: date) -> None:
+        """确保某一天的分区存在（仅PostgreSQL）"""
+        if day in self._partitions or _dialect_name(db) != "postgresql":
+            return
+        await db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(day)} PARTITION OF {SNAPSHOT_TABLE} "
+            f"FOR VALUES FROM ('{_day_start(day)}') TO ('{_day_start(day + timedelta(days=1))}')"
+        ))
+        self._partitions.add(day)
+
+    async def ensure_partitions(self, db, days_ahead: Optional[int] = None) -> None:
+        """创建今天及之后若干天的分区，启动时和每日清理时调用"""
+        days_ahead = settings.HISTORY_PARTITIONS_AHEAD if days_ahead is None else days_ahead
+        today = datetime.now(timezone.utc).date()
+        for offset in range(days_ahead + 1):
+            day = today + timedelta(days=offset)
+            try:
+                # 多个副本同时创建同一分区时可能冲突，单个分区失败不影响其他分区，写入时会再补建
+                async with db.begin_nested():
+                    await self.ensure_partition(db, day)
+            except Exception as e:
+                logger.warning(f"创建排名历史分区 {partition_name(day)} 失败: {e}")
+
+    async def append(
+        self,
+        db,
+        category_id: int,
+        rows: Iterable[Dict[str, Any]],
+        crawled_at: Optional[datetime] = None
+    ) -> Dict[str, int]:
+        """追加一个分类本次入库的排名历史，返回 URL -> 条目ID（hot_item_keys.id）
+
+        rows 为热榜条目的行数据（url、title、rank_position、score、comment_count）。
+        在保存点中执行，写入失败只记录日志，不影响同一事务中的热榜条目。
+        """
+        rows = [row for row in rows if row.get("url")]
+        if not rows:
+            return {}
+        crawled_at = crawled_at or datetime.now(timezone.utc)
+        insert = pg_insert if _dialect_name(db) == "postgresql" else sqlite_insert
+        key_ids: Dict[str, int] = {}
+
+        try:
+            async with db.begin_nested():
+                await self.ensure_partition(db, crawled_at.astimezone(timezone.utc).date())
+
+                key_stmt = insert(HotItemKey)
+                key_stmt = key_stmt.on_conflict_do_update(
+                    index_elements=[HotItemKey.category_id, HotItemKey.url],
+                    set_={
+                        "title": key_stmt.excluded.title,
+                        "last_seen_at": key_stmt.excluded.last_seen_at,
+                    }
+                ).returning(HotItemKey.id, HotItemKey.url)
+                for chunk in self._chunks(rows):
+                    result = await db.execute(key_stmt.values([
+                        {
+                            "category_id": category_id,
+                            "url": row["url"],
+                            "title": row["title"],
+                            "last_seen_at": crawled_at,
+                        }
+                        for row in chunk
+                    ]))
+                    key_ids.update({url: key_id for key_id, url in result.fetchall()})
+
+                snapshots = [
+                    {
+                        "item_key_id": key_ids[row["url"]],
+                        "crawled_at": crawled_at,
+                        "rank_position": row["rank_position"],
+                        "score": row.get("score") or 0,
+                        "comment_count": row.get("comment_count") or 0,
+                    }
+                    for row in rows
+                ]
+                snapshot_stmt = insert(HotItemSnapshot).on_conflict_do_nothing()
+                for chunk in self._chunks(snapshots):
+                    await db.execute(snapshot_stmt.values(chunk))
+        except Exception as e:
+            # 分区可能被其他进程删除，下次重新确认
+            self._partitions.discard(crawled_at.astimezone(timezone.utc).date())
+            logger.warning(f"写入分类 {category_id} 的排名历史失败: {e}")
+            return {}
+        return key_ids
+
+    async def drop_expired(self, db, retention_days: Optional[int] = None) -> Dict[str, int]:
+        """清理超过保留期的历史
+
+        PostgreSQL 上删除整个过期分区；其他数据库按时间删除行。
+        之后删除保留期内没有再上榜的条目ID。调用方负责提交。
+        """
+        retention_days = settings.HISTORY_RETENTION_DAYS if retention_days is None else retention_days
+        cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+        stats = {"partitions": 0, "snapshots": 0, "keys": 0}
+
+        if _dialect_name(db) == "postgresql":
+            for name in await self._list_partitions(db):
+                try:
+                    day = datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m%d").date()
+                except ValueError:
+                    continue
+                # 分区的结束时间早于截止时间才删除，保证保留期内的数据完整
+                if day + timedelta(days=1) <= cutoff.date():
+                    await db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                    self._partitions.discard(day)
+                    stats["partitions"] += 1
+        else:
+            result = await db.execute(
+                delete(HotItemSnapshot).where(HotItemSnapshot.crawled_at < cutoff)
+                .execution_options(synchronize_session=False)
+            )
+            stats["snapshots"] = result.rowcount or 0
+
+        result = await db.execute(
+            delete(HotItemKey).where(HotItemKey.last_seen_at < cutoff)
+            .execution_options(synchronize_session=False)
+        )
+        stats["keys"] = result.rowcount or 0
+        return stats
+
+    async def get_series(
+        self,
+        db,
+        key_ids: Sequence[int],
+        resolution: str = "1h",
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        """按条目ID（hot_item_keys.id）查询降采样后的排名/热度序列
+
+        一条聚合查询完成：按主键 (item_key_id, crawled_at) 范围扫描快照表，
+        在数据库中按时间桶分组，不关联 hot_items，已落榜的条目同样可查，也不加载ORM对象。
+        每个桶返回最高排名、平均排名、最高热度、最多评论数和采样数。
+        返回 {条目ID: [数据点, ...]}，没有历史的条目不在结果中。
+        """
+        seconds = RESOLUTIONS[resolution]
+        until = until or datetime.now(timezone.utc)
+        since = since or until - timedelta(days=1)
+        if not key_ids:
+            return {}
+
+        # 桶长度直接写入SQL，保证 SELECT 与 GROUP BY 中的表达式完全一致
+        width = literal_column(str(seconds), Integer)
+        if _dialect_name(db) == "postgresql":
+            bucket = func.floor(extract("epoch", HotItemSnapshot.crawled_at) / width)
+        else:
+            bucket = cast(func.strftime("%s", HotItemSnapshot.crawled_at), Integer) // width
+
+        stmt = (
+            select(
+                HotItemSnapshot.item_key_id,
+                bucket.label("bucket"),
+                func.min(HotItemSnapshot.rank_position),
+                func.avg(HotItemSnapshot.rank_position),
+                func.max(HotItemSnapshot.score),
+                func.max(HotItemSnapshot.comment_count),
+                func.count(),
+            )
+            .where(
+                HotItemSnapshot.item_key_id.in_(list(key_ids)),
+                HotItemSnapshot.crawled_at >= since,
+                HotItemSnapshot.crawled_at < until,
+            )
+            .group_by(HotItemSnapshot.item_key_id, bucket)
+            .order_by(HotItemSnapshot.item_key_id, bucket)
+        )
+        result = await db.execute(stmt)
+
+        series: Dict[int, List[Dict[str, Any]]] = {}
+        for key_id, bucket_index, best_rank, avg_rank, score, comment_count, samples in result.all():
+            series.setdefault(key_id, []).append({
+                "time": datetime.fromtimestamp(int(bucket_index) * seconds, timezone.utc).isoformat(),
+                "rank": best_rank,
+                "avg_rank": round(float(avg_rank), 2),
+                "score": score,
+                "comment_count": comment_count,
+                "samples": samples,
+            })
+        return series
+
+    @staticmethod
+    async def _list_partitions(db) -> List[str]:
+        result = await db.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :table"
+        ), {"table": SNAPSHOT_TABLE})
+        return [row[0] for row in result.fetchall()]
+
+    @staticmethod
+    def _chunks(rows: List[Dict[str, Any]]) -> Iterable[List[Dict[str, Any]]]:
+        for offset in range(0, len(rows), CHUNK_SIZE):
+            yield rows[offset:offset + CHUNK_SIZE]
+
+
+# 全局历史服务实例
+history_service = HistoryService()
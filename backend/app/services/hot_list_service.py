@@ -1,16 +1,32 @@
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Callable, Awaitable
+import functools
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, desc, func
 from sqlalchemy.orm import selectinload
 from loguru import logger
 from datetime import datetime, timedelta, timezone
 
-from app.core.database import get_db
-from app.core.redis import redis_manager, cache_result
+from app.core.redis import (
+    redis_manager,
+    cache_result,
+    broadcast_invalidation,
+    ALL_PLATFORMS_TAG,
+    platform_tag,
+    category_tag,
+)
 from app.core.config import settings
+from app.core.payload import EncodedPayload
+from app.services.snapshot_service import (
+    snapshot_service,
+    ALL_SCOPE,
+    platform_scope,
+    category_scope,
+)
+from app.services.trending_service import trending_service, window_for_hours, score_batch
 from app.models.platform import Platform
 from app.models.category import Category
 from app.models.hot_item import HotItem
+from app.models.crawl_task import CrawlTask
 
 
 class HotListService:
@@ -55,9 +71,66 @@ class HotListService:
                 "data": []
             }
     
-    @cache_result("hot_list:all", expire=settings.HOT_LIST_CACHE_TIME)
-    async def get_all_hot_lists(self) -> Dict[str, Any]:
-        """获取所有平台的热榜数据"""
+    @cache_result(
+        "hot_list:all",
+        expire=settings.HOT_LIST_CACHE_TIME,
+        depends_on=lambda self: [ALL_PLATFORMS_TAG],
+        local=True
+    )
+    async def get_all_hot_lists(self) -> EncodedPayload:
+        """获取所有平台的热榜数据（读取预生成快照，返回预编码的响应体）"""
+        return await self._read_snapshot(ALL_SCOPE, self.build_all_hot_lists)
+    
+    @cache_result(
+        "hot_list:platform",
+        expire=settings.HOT_LIST_CACHE_TIME,
+        depends_on=lambda self, platform_name: [platform_tag(platform_name)],
+        local=True
+    )
+    async def get_platform_hot_list(self, platform_name: str) -> EncodedPayload:
+        """获取指定平台的热榜数据（读取预生成快照，返回预编码的响应体）"""
+        return await self._read_snapshot(
+            platform_scope(platform_name),
+            functools.partial(self.build_platform_hot_list, platform_name)
+        )
+    
+    @cache_result(
+        "hot_list:category",
+        expire=settings.HOT_LIST_CACHE_TIME,
+        depends_on=lambda self, platform_name, category_name: [
+            platform_tag(platform_name),
+            category_tag(platform_name, category_name),
+        ],
+        local=True
+    )
+    async def get_category_hot_list(
+        self, 
+        platform_name: str, 
+        category_name: str
+    ) -> EncodedPayload:
+        """获取指定平台分类的热榜数据（读取预生成快照，返回预编码的响应体）"""
+        return await self._read_snapshot(
+            category_scope(platform_name, category_name),
+            functools.partial(self.build_category_hot_list, platform_name, category_name)
+        )
+    
+    async def _read_snapshot(
+        self,
+        scope: str,
+        build: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> EncodedPayload:
+        """按作用域读取预编码的快照
+
+        快照只在爬取入库后生成，正常情况下这里只是一次查找，响应体和压缩版本都已生成好。
+        首次爬取完成前没有快照时现场构建并返回，不在读请求中写入快照。
+        """
+        payload = await snapshot_service.load_payload(self.db, scope)
+        if payload is not None:
+            return payload
+        return EncodedPayload.from_document(await build())
+    
+    async def build_all_hot_lists(self) -> Dict[str, Any]:
+        """构建所有平台的热榜文档"""
         try:
             db = self.db
             
@@ -136,9 +209,8 @@ class HotListService:
                 "data": []
             }
     
-    @cache_result("hot_list:platform", expire=settings.HOT_LIST_CACHE_TIME)
-    async def get_platform_hot_list(self, platform_name: str) -> Dict[str, Any]:
-        """获取指定平台的热榜数据"""
+    async def build_platform_hot_list(self, platform_name: str) -> Dict[str, Any]:
+        """构建指定平台的热榜文档"""
         try:
             db = self.db
             
@@ -215,13 +287,12 @@ class HotListService:
                 "data": None
             }
     
-    @cache_result("hot_list:category", expire=settings.HOT_LIST_CACHE_TIME)
-    async def get_category_hot_list(
+    async def build_category_hot_list(
         self, 
         platform_name: str, 
         category_name: str
     ) -> Dict[str, Any]:
-        """获取指定平台分类的热榜数据"""
+        """构建指定平台分类的热榜文档"""
         try:
             db = self.db
             
@@ -229,7 +300,10 @@ class HotListService:
             stmt = (
                 select(Category)
                 .join(Platform)
-                .options(selectinload(Category.hot_items))
+                .options(
+                    selectinload(Category.hot_items),
+                    selectinload(Category.platform).selectinload(Platform.categories)
+                )
                 .where(
                     and_(
                         Platform.name == platform_name,
@@ -286,18 +360,27 @@ class HotListService:
         hours: int = 24, 
         limit: int = 50
     ) -> List[Dict[str, Any]]:
-        """获取热门趋势条目"""
+        """获取热门趋势条目
+
+        优先读取趋势引擎维护的Redis有序集合（跨平台归一化、时间衰减），
+        Redis不可用或尚无数据时用数据库中的当前榜单按同样的方式计算热度（不计排名变化和衰减），
+        两种来源返回的条目字段相同。
+        """
+        items = await trending_service.get_trending(window_for_hours(hours), limit)
+        if items:
+            return items
+        
         try:
-            db = await self._get_db()
+            db = self.db
             
             # 计算时间范围
             since_time = datetime.now(timezone.utc) - timedelta(hours=hours)
             
-            # 查询热门条目（按热度分数排序）
+            # 查询时间范围内各分类的当前榜单
             stmt = (
-                select(HotItem)
-                .join(Category)
-                .join(Platform)
+                select(HotItem, Platform.name, Category.name)
+                .join(Category, Category.id == HotItem.category_id)
+                .join(Platform, Platform.id == Category.platform_id)
                 .where(
                     and_(
                         HotItem.crawled_at >= since_time,
@@ -305,14 +388,35 @@ class HotListService:
                         Platform.is_active == True
                     )
                 )
-                .order_by(desc(HotItem.score), desc(HotItem.comment_count))
-                .limit(limit)
             )
             
             result = await db.execute(stmt)
-            items = result.scalars().all()
-            
-            return [item.to_dict() for item in items]
+            lists: Dict[tuple, List[HotItem]] = {}
+            for item, platform_name, category_name in result.all():
+                lists.setdefault((platform_name, category_name), []).append(item)
+            
+            # 热度只在同一榜单内归一化，与趋势引擎一致
+            items = []
+            for (platform_name, category_name), category_items in lists.items():
+                rows = [{
+                    "url": item.url,
+                    "title": item.title,
+                    "rank_position": item.rank_position or 999,
+                    "score": item.score,
+                } for item in category_items]
+                seen_at = {item.url: int(item.crawled_at.timestamp()) for item in category_items}
+                key_ids = {item.url: item.item_key_id for item in category_items}
+                for entry in score_batch(rows, {}, key_ids):
+                    items.append({
+                        **entry,
+                        "platform": platform_name,
+                        "category": category_name,
+                        "seen_at": seen_at[entry["url"]],
+                        "trend_score": entry["heat"],
+                    })
+            
+            items.sort(key=lambda entry: -entry["trend_score"])
+            return items[:limit]
             
         except Exception as e:
             logger.error(f"获取热门趋势失败: {e}")
@@ -321,12 +425,11 @@ class HotListService:
     async def refresh_cache(self) -> bool:
         """刷新缓存"""
         try:
-            # 清除相关缓存
-            cache_keys = await redis_manager.keys("hot_list:*")
-            for key in cache_keys:
-                await redis_manager.delete(key)
+            # 通过命名空间索引删除热榜缓存，不扫描整个键空间
+            deleted = await redis_manager.invalidate_index("hot_list")
+            await broadcast_invalidation(["*"])
             
-            logger.info("热榜缓存已刷新")
+            logger.info(f"热榜缓存已刷新，删除 {deleted} 个缓存键")
             return True
             
         except Exception as e:
@@ -336,11 +439,14 @@ class HotListService:
     async def get_cache_status(self) -> Dict[str, Any]:
         """获取缓存状态"""
         try:
-            cache_keys = await redis_manager.keys("hot_list:*")
+            cache_keys = await redis_manager.index_members("hot_list")
+            ttls = await redis_manager.ttl_many(cache_keys)
             cache_info = []
             
-            for key in cache_keys:
-                ttl = await redis_manager.ttl(key)
+            for key, ttl in zip(cache_keys, ttls):
+                if ttl == -2:
+                    # 索引中残留的已过期键
+                    continue
                 cache_info.append({
                     "key": key,
                     "ttl": ttl,
@@ -348,7 +454,7 @@ class HotListService:
                 })
             
             return {
-                "total_keys": len(cache_keys),
+                "total_keys": len(cache_info),
                 "cache_info": cache_info
             }
             
@@ -400,4 +506,58 @@ class HotListService:
 
         except Exception as e:
             logger.error(f"获取分页热榜失败: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    async def get_crawl_tasks(
+        self,
+        limit: int = settings.DEFAULT_PAGE_SIZE,
+        before_id: Optional[int] = None,
+        crawler_name: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """按ID倒序分页获取爬取记录
+
+        使用键集分页：传入上一页返回的 next_cursor 作为 before_id，
+        查询走主键（或 crawler_name, id 索引），翻页深度不影响耗时。
+        """
+        limit = max(1, min(limit, settings.MAX_PAGE_SIZE))
+        query = select(CrawlTask).order_by(desc(CrawlTask.id)).limit(limit + 1)
+        if before_id is not None:
+            query = query.where(CrawlTask.id < before_id)
+        if crawler_name:
+            query = query.where(CrawlTask.crawler_name == crawler_name)
+        if status:
+            query = query.where(CrawlTask.status == status)
+
+        result = await self.db.execute(query)
+        tasks = result.scalars().all()
+        has_more = len(tasks) > limit
+        tasks = tasks[:limit]
+        return {
+            "tasks": [task.to_simple_dict() for task in tasks],
+            "next_cursor": tasks[-1].id if has_more else None,
+        }
+
+    async def get_crawl_task_by_id(self, task_id: int) -> Optional[Dict[str, Any]]:
+        """获取单条爬取记录（含所属分类）"""
+        query = (
+            select(CrawlTask)
+            .options(selectinload(CrawlTask.category))
+            .where(CrawlTask.id == task_id)
+        )
+        result = await self.db.execute(query)
+        task = result.scalars().first()
+        return task.to_dict() if task else None
+
+    async def create_crawl_task(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
+        """创建一条待执行的爬取任务"""
+        category = await self.db.get(Category, task_data.get("category_id"))
+        if category is None:
+            raise ValueError(f"分类不存在: {task_data.get('category_id')}")
+        task = CrawlTask.create_from_dict(task_data)
+        task.crawler_name = task_data.get("crawler_name")
+        task.trigger = "manual"
+        self.db.add(task)
+        await self.db.commit()
+        await self.db.refresh(task)
+        return task.to_simple_dict()
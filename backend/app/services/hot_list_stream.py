@@ -0,0 +1,144 @@
+from typing import List, Dict, Optional, Any, Set, Tuple, AsyncIterator
+import asyncio
+import json
+from loguru import logger
+
+from app.core.config import settings
+from app.core.redis import redis_manager
+
+
+# 热榜变化通知频道，消息为单个平台的差异JSON
+HOT_LIST_UPDATES_CHANNEL = "hot:updates"
+
+# 连接积压过多时发送的重新拉取事件
+RESYNC_FRAME = b"event: resync\ndata: {}\n\n"
+KEEPALIVE_FRAME = b": ping\n\n"
+
+
+def diff_platform(
+    previous: Optional[Dict[str, Any]],
+    current: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """比较同一平台前后两次快照，返回每个分类中新上榜、下榜和排名变化的条目"""
+    def index(document: Optional[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        if not document or not document.get("success"):
+            return {}
+        return {
+            entry["category"]["name"]: entry["items"]
+            for entry in document["data"]["categories"]
+        }
+
+    before = index(previous)
+    categories = []
+    for category_name, items in index(current).items():
+        old_items = {item["id"]: item for item in before.get(category_name, [])}
+        new_ids = {item["id"] for item in items}
+
+        entered = [item for item in items if item["id"] not in old_items]
+        left = [
+            {"id": item["id"], "title": item["title"], "url": item["url"]}
+            for item_id, item in old_items.items()
+            if item_id not in new_ids
+        ]
+        moved = [
+            {
+                "id": item["id"],
+                "title": item["title"],
+                "from": old_items[item["id"]]["rank_position"],
+                "to": item["rank_position"],
+            }
+            for item in items
+            if item["id"] in old_items
+            and old_items[item["id"]]["rank_position"] != item["rank_position"]
+        ]
+
+        if entered or left or moved:
+            categories.append({
+                "category": category_name,
+                "entered": entered,
+                "left": left,
+                "moved": moved,
+            })
+    return categories
+
+
+class HotListStream:
+    """热榜变化推送
+
+    爬取进程生成快照后把平台差异发布到Redis频道，每个API进程通过 RedisManager
+    的订阅协程收到一次，编码成SSE帧后分发给本进程的所有连接。同一条消息的帧
+    在连接间共享，每个连接只持有一个有界队列；客户端消费过慢导致队列写满时
+    丢弃积压并发送 resync 事件，由客户端重新拉取完整热榜。
+    """
+
+    def __init__(self, queue_size: int, keepalive: int):
+        self.queue_size = queue_size
+        self.keepalive = keepalive
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    async def publish_diff(
+        self,
+        platform_name: str,
+        previous: Optional[Dict[str, Any]],
+        current: Dict[str, Any]
+    ) -> int:
+        """发布平台差异，返回发生变化的分类数量"""
+        categories = diff_platform(previous, current)
+        if not categories:
+            return 0
+
+        snapshot = current.get("snapshot") or {}
+        message = json.dumps({
+            "platform": platform_name,
+            "version": snapshot.get("version"),
+            "generated_at": snapshot.get("generated_at"),
+            "categories": categories,
+        }, ensure_ascii=False)
+        await redis_manager.publish(HOT_LIST_UPDATES_CHANNEL, message)
+        return len(categories)
+
+    def handle_message(self, message: str) -> None:
+        """处理Redis推送的差异消息，分发给本进程的所有连接"""
+        if not self._subscribers:
+            return
+        try:
+            platform_name = json.loads(message)["platform"]
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            logger.warning(f"Invalid hot list update message: {e}")
+            return
+
+        frame = f"event: diff\ndata: {message}\n\n".encode("utf-8")
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait((platform_name, frame))
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait((None, RESYNC_FRAME))
+
+    async def events(self, platforms: Optional[Set[str]] = None) -> AsyncIterator[bytes]:
+        """单个连接的SSE事件流，platforms 为空时接收所有平台"""
+        queue: asyncio.Queue[Tuple[Optional[str], bytes]] = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        try:
+            yield b"retry: 5000\n\n"
+            while True:
+                try:
+                    platform_name, frame = await asyncio.wait_for(queue.get(), timeout=self.keepalive)
+                except asyncio.TimeoutError:
+                    yield KEEPALIVE_FRAME
+                    continue
+                if platforms and platform_name is not None and platform_name not in platforms:
+                    continue
+                yield frame
+        finally:
+            self._subscribers.discard(queue)
+
+    @property
+    def connections(self) -> int:
+        """本进程当前的推送连接数"""
+        return len(self._subscribers)
+
+
+# 全局热榜推送实例
+hot_list_stream = HotListStream(settings.STREAM_QUEUE_SIZE, settings.STREAM_KEEPALIVE_SECONDS)
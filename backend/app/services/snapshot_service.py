@@ -0,0 +1,304 @@
+from typing import List, Dict, Optional, Any
+from datetime import datetime, timezone
+import asyncio
+import json
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.redis import redis_manager
+from app.core.payload import EncodedPayload
+from app.models.hot_list_snapshot import HotListSnapshot
+from app.models.platform import Platform
+from app.services.hot_list_stream import hot_list_stream
+
+
+# Redis中快照哈希的键前缀，字段为 EncodedPayload.to_mapping()（响应体及其压缩版本）和 version/generated_at
+SNAPSHOT_KEY_PREFIX = "snapshot"
+ALL_SCOPE = "all"
+
+# 全部平台文档中每个平台最多返回的条目数
+ALL_ITEMS_PER_PLATFORM = 30
+
+# 全部平台快照因版本冲突重新拼装的最多次数
+ALL_STORE_ATTEMPTS = 3
+
+
+def platform_scope(platform_name: str) -> str:
+    """平台快照作用域"""
+    return f"platform:{platform_name}"
+
+
+def category_scope(platform_name: str, category_name: str) -> str:
+    """分类快照作用域"""
+    return f"category:{platform_name}/{category_name}"
+
+
+def snapshot_key(scope: str) -> str:
+    """快照在Redis中的键"""
+    return f"{SNAPSHOT_KEY_PREFIX}:{scope}"
+
+
+def assemble_all_document(platform_documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """由各平台的快照文档拼出全部平台的热榜文档
+
+    结果与 HotListService.build_all_hot_lists 相同：每个平台合并各分类的条目，
+    按排名排序后最多保留 ALL_ITEMS_PER_PLATFORM 条，没有条目的平台不返回。
+    """
+    hot_lists = []
+    total_items = 0
+    for document in platform_documents:
+        platform = document["data"]["platform"]
+        categories = document["data"]["categories"]
+        items = [item for entry in categories for item in entry["items"]]
+        items.sort(key=lambda item: item["rank_position"] or 999)
+        if not items:
+            continue
+        updated = [entry["last_updated"] for entry in categories if entry["last_updated"]]
+        hot_lists.append({
+            "platform_id": platform["id"],
+            "name": platform["name"],
+            "display_name": platform["display_name"],
+            "api_endpoint": f"/api/v1/hot/{platform['name']}",
+            "items": items[:ALL_ITEMS_PER_PLATFORM],
+            "total_count": sum(entry["total_count"] for entry in categories),
+            "last_updated": max(updated, key=datetime.fromisoformat) if updated else None,
+        })
+        total_items += len(hot_lists[-1]["items"])
+
+    return {
+        "success": True,
+        "data": {
+            "hot_lists": hot_lists,
+            "total_platforms": len(hot_lists),
+            "total_items": total_items,
+            "last_updated": datetime.now(timezone.utc).isoformat()
+        }
+    }
+
+
+class SnapshotService:
+    """热榜快照服务
+
+    爬取入库后由持久化协程调用，把平台、分类和全部平台的响应文档一次性生成好，
+    同时写入 hot_list_snapshots 表和Redis。读接口只按作用域查找快照，不再在请求
+    路径上加载ORM对象。表是持久副本，Redis中的快照在 SNAPSHOT_REDIS_TTL 后过期，
+    过期或丢失后从表中回填。
+    
+    同一进程内的重建串行执行；跨进程的并发写入由 store 的版本比较处理。
+    """
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+
+    async def load(self, db: AsyncSession, scope: str) -> Optional[Dict[str, Any]]:
+        """按作用域读取快照文档，不存在时返回None"""
+        payload = await self.load_payload(db, scope)
+        return json.loads(payload.body) if payload is not None else None
+
+    async def load_payload(self, db: AsyncSession, scope: str) -> Optional[EncodedPayload]:
+        """按作用域读取预编码的快照，依次查找Redis和数据库，不存在时返回None
+
+        Redis中保存了生成快照时压缩好的版本；从数据库回填时压缩一次并写回Redis。
+        """
+        cached = await redis_manager.hgetall(snapshot_key(scope))
+        if cached.get("body"):
+            return EncodedPayload.from_mapping(cached)
+
+        stmt = select(
+            HotListSnapshot.payload,
+            HotListSnapshot.version,
+            HotListSnapshot.generated_at
+        ).where(HotListSnapshot.scope == scope)
+        result = await db.execute(stmt)
+        row = result.first()
+        if row is None:
+            return None
+
+        generated_at = row.generated_at
+        if generated_at.tzinfo is None:
+            generated_at = generated_at.replace(tzinfo=timezone.utc)
+        payload = EncodedPayload(row.payload.encode("utf-8"), generated_at).compress()
+        await redis_manager.hset(snapshot_key(scope), {
+            **payload.to_mapping(),
+            "version": row.version,
+            "generated_at": generated_at.isoformat(),
+        }, expire=settings.SNAPSHOT_REDIS_TTL)
+        return payload
+
+    async def latest_generated_at(self, db: AsyncSession) -> Optional[datetime]:
+        """最近一次生成快照的时间，尚无快照时返回None"""
+        result = await db.execute(select(func.max(HotListSnapshot.generated_at)))
+        generated_at = result.scalar()
+        if generated_at is not None and generated_at.tzinfo is None:
+            generated_at = generated_at.replace(tzinfo=timezone.utc)
+        return generated_at
+
+    async def store(
+        self,
+        db: AsyncSession,
+        documents: Dict[str, Dict[str, Any]],
+        versions: Optional[Dict[str, int]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """保存一组快照文档并提交，返回成功写入的带版本信息的文档
+
+        每个作用域按版本号比较后写入（compare-and-set）：只有表中版本仍是读到的版本时
+        才会写入新版本，其他进程已抢先写入的作用域跳过，不会出现同一版本号对应不同内容。
+        versions 为调用方事先读到的版本，未提供时在这里读取。
+        """
+        if not documents:
+            return {}
+
+        if versions is None:
+            versions = await self._versions(db, list(documents))
+
+        generated_at = datetime.now(timezone.utc)
+        insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+        stamped: Dict[str, Dict[str, Any]] = {}
+        mappings: Dict[str, Dict[str, Any]] = {}
+
+        for scope, document in documents.items():
+            expected = versions.get(scope, 0)
+            version = expected + 1
+            document = {
+                **document,
+                "snapshot": {
+                    "version": version,
+                    "generated_at": generated_at.isoformat()
+                }
+            }
+            # 响应体和压缩版本在这里一次生成，读请求直接使用
+            encoded = EncodedPayload.from_document(document).compress()
+            payload = encoded.body.decode("utf-8")
+
+            if expected:
+                stmt = update(HotListSnapshot).where(
+                    HotListSnapshot.scope == scope,
+                    HotListSnapshot.version == expected
+                ).values(
+                    version=version,
+                    payload=payload,
+                    generated_at=generated_at,
+                    updated_at=func.now()
+                )
+            else:
+                stmt = insert(HotListSnapshot).values(
+                    scope=scope,
+                    version=version,
+                    payload=payload,
+                    generated_at=generated_at
+                ).on_conflict_do_nothing(index_elements=[HotListSnapshot.scope])
+            result = await db.execute(stmt.returning(HotListSnapshot.version))
+            if result.scalar() is None:
+                logger.warning(f"快照 {scope} 版本 {expected} 已被其他进程更新，跳过本次写入")
+                continue
+
+            stamped[scope] = document
+            mappings[scope] = {
+                **encoded.to_mapping(),
+                "version": version,
+                "generated_at": generated_at.isoformat(),
+            }
+
+        await db.commit()
+
+        # 数据库提交成功后再覆盖Redis中的快照
+        for scope, mapping in mappings.items():
+            await redis_manager.hset(snapshot_key(scope), mapping, expire=settings.SNAPSHOT_REDIS_TTL)
+
+        return stamped
+
+    async def _versions(self, db: AsyncSession, scopes: List[str]) -> Dict[str, int]:
+        """各作用域当前的快照版本，尚无快照的作用域不返回"""
+        result = await db.execute(
+            select(HotListSnapshot.scope, HotListSnapshot.version)
+            .where(HotListSnapshot.scope.in_(scopes))
+        )
+        return {row.scope: row.version for row in result}
+
+    async def _platform_documents(self, db: AsyncSession) -> List[Dict[str, Any]]:
+        """按平台ID顺序返回各活跃平台已提交的快照文档"""
+        result = await db.execute(
+            select(Platform.name).where(Platform.is_active == True).order_by(Platform.id)
+        )
+        scopes = [platform_scope(name) for name in result.scalars().all()]
+
+        result = await db.execute(
+            select(HotListSnapshot.scope, HotListSnapshot.payload)
+            .where(HotListSnapshot.scope.in_(scopes))
+        )
+        stored = {scope: json.loads(payload) for scope, payload in result.all()}
+
+        documents = (stored.get(scope) for scope in scopes)
+        return [document for document in documents if document is not None]
+
+    async def _store_all(self, db: AsyncSession) -> bool:
+        """由已提交的平台快照拼出全部平台文档并按版本写入，返回是否写入成功
+
+        先读全部平台快照的版本再读各平台快照：期间其他进程提交了新的平台快照并更新了
+        全部平台快照时，本次写入会因版本不一致而失败，重新读取后再拼装，保证最后写入的
+        文档包含所有已提交的平台快照。
+        """
+        for _ in range(ALL_STORE_ATTEMPTS):
+            versions = await self._versions(db, [ALL_SCOPE])
+            document = assemble_all_document(await self._platform_documents(db))
+            if ALL_SCOPE in await self.store(db, {ALL_SCOPE: document}, versions):
+                return True
+        logger.warning(f"全部平台快照连续 {ALL_STORE_ATTEMPTS} 次版本冲突，等待下次重建")
+        return False
+
+    async def rebuild_platform(self, platform_name: str) -> List[str]:
+        """重新生成某个平台相关的全部快照并推送差异，返回更新的作用域列表
+
+        全部平台的文档在平台快照提交之后由各平台的快照拼出，不重新加载所有平台的条目。
+        """
+        async with self._lock:
+            return await self._rebuild_platform(platform_name)
+
+    async def _rebuild_platform(self, platform_name: str) -> List[str]:
+        """rebuild_platform 的实现，调用时已持有重建锁"""
+        from app.services.hot_list_service import HotListService
+
+        scopes: List[str] = []
+        async for db in get_db():
+            try:
+                service = HotListService(db)
+                documents: Dict[str, Dict[str, Any]] = {}
+                previous = await self.load(db, platform_scope(platform_name))
+
+                platform_document = await service.build_platform_hot_list(platform_name)
+                if platform_document.get("success"):
+                    documents[platform_scope(platform_name)] = platform_document
+                    for entry in platform_document["data"]["categories"]:
+                        category_name = entry["category"]["name"]
+                        category_document = await service.build_category_hot_list(
+                            platform_name, category_name
+                        )
+                        if category_document.get("success"):
+                            documents[category_scope(platform_name, category_name)] = category_document
+
+                stored = await self.store(db, documents)
+                current = stored.get(platform_scope(platform_name))
+                if current is not None:
+                    await hot_list_stream.publish_diff(platform_name, previous, current)
+
+                scopes = list(stored)
+                if await self._store_all(db):
+                    scopes.append(ALL_SCOPE)
+                logger.info(f"平台 {platform_name} 生成 {len(scopes)} 个快照")
+
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"生成平台 {platform_name} 快照失败: {e}")
+            finally:
+                break
+
+        return scopes
+
+
+# 全局快照服务实例
+snapshot_service = SnapshotService()
@@ -0,0 +1,180 @@
+from typing import Any, Dict, List, Mapping, Optional
+from bisect import bisect_left, bisect_right
+import json
+import math
+import time
+from loguru import logger
+
+from app.core.config import settings
+from app.core.redis import redis_manager
+
+
+TRENDING_KEY_PREFIX = "trending"
+
+# 计算衰减分数的时间原点，使有序集合中的分数保持较小的数值
+EPOCH = 1704067200  # 2024-01-01 UTC
+
+# 过期成员和超出上限的成员一并移除（有序集合、最近上榜时间、条目详情）
+# KEYS: 分数有序集合, 最近上榜时间有序集合, 条目详情哈希
+# ARGV: 过期截止时间, 最多保留条目数
+TRIM_SCRIPT = """
+local removed = redis.call('zrangebyscore', KEYS[2], '-inf', ARGV[1])
+local overflow = redis.call('zrange', KEYS[1], 0, -(tonumber(ARGV[2]) + 1))
+for _, member in ipairs(overflow) do
+    table.insert(removed, member)
+end
+for i = 1, #removed, 500 do
+    local chunk = {unpack(removed, i, math.min(i + 499, #removed))}
+    redis.call('zrem', KEYS[1], unpack(chunk))
+    redis.call('zrem', KEYS[2], unpack(chunk))
+    redis.call('hdel', KEYS[3], unpack(chunk))
+end
+return #removed
+"""
+
+
+def _windows() -> Dict[str, Dict[str, float]]:
+    """趋势窗口：统计时长与热度半衰期（秒）"""
+    return {
+        "today": {"span": 86400, "half_life": settings.TRENDING_TODAY_HALF_LIFE_HOURS * 3600},
+        "week": {"span": 7 * 86400, "half_life": settings.TRENDING_WEEK_HALF_LIFE_HOURS * 3600},
+    }
+
+
+def window_for_hours(hours: int) -> str:
+    return "today" if hours <= 24 else "week"
+
+
+def _keys(window: str) -> tuple:
+    prefix = f"{TRENDING_KEY_PREFIX}:{window}"
+    return prefix, f"{prefix}:seen", f"{prefix}:items"
+
+
+def _percentiles(values: List[int]) -> List[float]:
+    """各值在本批次中的百分位（相同值取中位），取值 (0, 1)"""
+    ordered = sorted(values)
+    count = len(ordered)
+    return [
+        (bisect_left(ordered, value) + bisect_right(ordered, value)) / (2 * count)
+        for value in values
+    ]
+
+
+def score_batch(
+    rows: List[Mapping[str, Any]],
+    previous_ranks: Mapping[str, Optional[int]],
+    key_ids: Mapping[str, int]
+) -> List[Dict[str, Any]]:
+    """计算一个分类本次榜单中各条目的热度，取值 (0, 1 + TRENDING_VELOCITY_WEIGHT]
+
+    各平台的热度数值量级不同（微博热搜指数、B站播放量、虎扑回复数），只在同一榜单内
+    取百分位：热度分数百分位与排名百分位各占一半，热度数值缺失（全为0）时只用排名。
+    再按排名变化加权：相对上次爬取上升的条目加分、下降的减分，新上榜视为从榜尾进入；
+    previous_ranks 为空（分类首次入库）时不计排名变化。
+    """
+    rows = [row for row in rows if row["url"] in key_ids]
+    count = len(rows)
+    if not count:
+        return []
+
+    scores = [row.get("score") or 0 for row in rows]
+    score_percentiles = _percentiles(scores) if any(scores) else None
+    entries = []
+    for index, row in enumerate(rows):
+        rank = row["rank_position"]
+        rank_percentile = max(0.0, 1 - (rank - 1) / count)
+        strength = rank_percentile
+        if score_percentiles is not None:
+            strength = (score_percentiles[index] + rank_percentile) / 2
+        velocity = 0.0
+        if previous_ranks:
+            previous = previous_ranks.get(row["url"])
+            velocity = ((previous if previous is not None else count + 1) - rank) / count
+            velocity = max(-1.0, min(1.0, velocity))
+        heat = max(strength * (1 + settings.TRENDING_VELOCITY_WEIGHT * velocity), 1e-6)
+        entries.append({
+            "id": key_ids[row["url"]],
+            "title": row["title"],
+            "url": row["url"],
+            "rank": rank,
+            "score": row.get("score") or 0,
+            "velocity": round(velocity, 3),
+            "heat": round(heat, 4),
+        })
+    return entries
+
+
+class TrendingService:
+    """跨平台热门趋势
+
+    每个分类入库后调用 record，把本次榜单的热度写入Redis有序集合：分数为
+    log2(热度) + (t - EPOCH) / 半衰期，等价于把所有条目的热度按同一时刻做指数衰减后比较，
+    已有成员无需随时间重算。ZADD GT 保留每个条目衰减后的峰值热度。
+    读取今日/本周热门只需 ZREVRANGE + HMGET，复杂度 O(log n + limit)。
+    超出统计时长未再上榜的条目在写入时移除，每个窗口最多保留 TRENDING_MAX_ITEMS 条。
+    """
+
+    def _enabled(self) -> bool:
+        return redis_manager.connected and redis_manager.redis_client is not None
+
+    async def record(self, platform_name: str, category_name: str, entries: List[Dict[str, Any]]) -> None:
+        """写入一个分类本次的热度，失败只记录日志"""
+        if not entries or not self._enabled():
+            return
+        now = time.time()
+        seen_at = int(now)
+        details = {
+            str(entry["id"]): json.dumps(
+                {**entry, "platform": platform_name, "category": category_name, "seen_at": seen_at},
+                ensure_ascii=False
+            )
+            for entry in entries
+        }
+        try:
+            async with redis_manager.redis_client.pipeline(transaction=True) as pipe:
+                for window, config in _windows().items():
+                    score_key, seen_key, items_key = _keys(window)
+                    elapsed = (now - EPOCH) / config["half_life"]
+                    pipe.zadd(
+                        score_key,
+                        {str(entry["id"]): math.log2(entry["heat"]) + elapsed for entry in entries},
+                        gt=True
+                    )
+                    pipe.zadd(seen_key, {member: seen_at for member in details})
+                    pipe.hset(items_key, mapping=details)
+                    pipe.eval(
+                        TRIM_SCRIPT, 3, score_key, seen_key, items_key,
+                        seen_at - int(config["span"]), settings.TRENDING_MAX_ITEMS
+                    )
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"更新热门趋势失败 {platform_name}/{category_name}: {e}")
+
+    async def get_trending(self, window: str, limit: int = 50) -> Optional[List[Dict[str, Any]]]:
+        """按当前衰减后的热度读取热门条目，Redis不可用时返回None"""
+        if not self._enabled():
+            return None
+        score_key, _, items_key = _keys(window)
+        half_life = _windows()[window]["half_life"]
+        try:
+            members = await redis_manager.redis_client.zrevrange(score_key, 0, limit - 1, withscores=True)
+            if not members:
+                return []
+            details = await redis_manager.redis_client.hmget(items_key, [member for member, _ in members])
+        except Exception as e:
+            logger.error(f"读取热门趋势失败 {window}: {e}")
+            return None
+
+        elapsed = (time.time() - EPOCH) / half_life
+        items = []
+        for (member, score), detail in zip(members, details):
+            if detail is None:
+                continue
+            item = json.loads(detail)
+            item["trend_score"] = round(2 ** (score - elapsed), 4)
+            items.append(item)
+        return items
+
+
+# 全局热门趋势服务实例
+trending_service = TrendingService()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""热度文本解析基准
+
+按各爬虫实际产生的格式（纯数字、万/亿量级、带单位、区间、无数值标签）生成批次，
+对比原有的 isdigit 判断、逐条解析和批量解析（批次内去重）的耗时，
+并统计各实现得到非零热度分数的比例。计时前先用 tests/test_hot_value.py 中的样例表
+校验解析结果，样例只维护这一份。
+
+用法: python benchmarks/bench_hot_values.py [--sizes 1000,10000,100000] [--repeat 5]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.crawlers.hot_value import parse_hot_value, normalize_hot_values
+from tests.test_hot_value import EXPECTED
+
+
+def make_values(size: int) -> List[Optional[str]]:
+    """生成一个批次的热度文本，格式分布接近各平台的混合结果"""
+    generators = [
+        lambda: str(random.randint(1000, 10_000_000)),                    # 微博/百度/头条
+        lambda: f"{random.randint(1, 9999) / 10:.1f}万",                  # 知乎
+        lambda: f"{random.randint(1, 999)}万播放",                        # B站
+        lambda: f"{random.randint(1, 50) / 10:.1f}亿",
+        lambda: f"{random.randint(1, 5000):,}评论",                      # IT之家
+        lambda: f"{random.randint(1, 50)}-{random.randint(51, 100)}万",
+        lambda: random.choice(["热", "新", "爆", "沸", ""]),              # 无数值标签
+        lambda: None,
+    ]
+    return [random.choice(generators)() for _ in range(size)]
+
+
+def legacy_scores(values: List[Optional[str]]) -> List[int]:
+    """原有实现：只有纯数字文本能得到分数"""
+    return [int(value) if value and value.isdigit() else 0 for value in values]
+
+
+def per_item_scores(values: List[Optional[str]]) -> List[int]:
+    return [parse_hot_value(value) for value in values]
+
+
+def measure(func: Callable[[List[Optional[str]]], List[int]], values: List[Optional[str]], repeat: int) -> tuple:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        scores = func(values)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings), sum(1 for score in scores if score) / len(scores)
+
+
+def check_samples() -> bool:
+    """逐条解析和批量解析的结果都应与样例表一致"""
+    samples = list(EXPECTED)
+    batch = normalize_hot_values(samples)
+    ok = True
+    for text, expected, batch_score in zip(samples, EXPECTED.values(), batch):
+        score = parse_hot_value(text)
+        if score != expected or batch_score != expected:
+            print(f"样例 {text!r}: 期望 {expected}，逐条 {score}，批量 {batch_score}")
+            ok = False
+    return ok
+
+
+def main(sizes: List[int], repeat: int) -> int:
+    if not check_samples():
+        return 1
+    print(f"{'size':>7} | {'impl':>8} | {'ms':>8} | {'us/条':>7} | {'非零比例':>8}")
+    print("-" * 52)
+    for size in sizes:
+        values = make_values(size)
+        for name, func in (("legacy", legacy_scores), ("per_item", per_item_scores), ("batch", normalize_hot_values)):
+            elapsed, nonzero = measure(func, values, repeat)
+            print(f"{size:>7} | {name:>8} | {elapsed:>8.2f} | {elapsed * 1000 / size:>7.2f} | {nonzero:>8.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="热度文本解析基准")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="每批文本数量，逗号分隔")
+    parser.add_argument("--repeat", type=int, default=5, help="每组重复次数（取最小值）")
+    args = parser.parse_args()
+    sys.exit(main([int(s) for s in args.sizes.split(",")], args.repeat))
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""爬虫解析性能基准：回放 fixtures/ 下保存的页面和接口响应
+
+启动本地桩HTTP服务器，把各爬虫请求的地址映射到对应夹具文件：
+  1. 通过爬虫自身的 fetch 取回夹具（与线上一致的解码路径），再直接调用解析函数，
+     统计每个用例的解析耗时（中位数/最小值）、tracemalloc 峰值内存和解析结果占用内存
+  2. 每个爬虫完整执行一次 crawl()，确认夹具能驱动真实的抓取流程
+
+基线保存在 parse_baseline.json，--check 时解析变慢、峰值内存上升或解析条目减少
+超过阈值即以非零状态退出，可作为回归门禁。耗时与机器相关，基线应在运行门禁的
+同一台机器上用 --update-baseline 生成。
+
+仓库中的夹具按各解析器所针对的页面/接口结构构造（条目数和页面体积接近线上），
+可在能访问外网的环境用 --record 替换为线上录制的内容后重新生成基线。
+
+用法:
+  python benchmarks/bench_parsers.py [--repeat 20] [--only weibo_hot,zol_hot]
+  python benchmarks/bench_parsers.py --check [--tolerance 0.3]
+  python benchmarks/bench_parsers.py --update-baseline
+  python benchmarks/bench_parsers.py --record      # 从线上重新录制夹具
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+import aiohttp
+from aiohttp import web
+
+from app.crawlers.base import HotItem, CrawlerSession
+from app.crawlers.crawler_manager import crawler_manager
+from app.crawlers.parsing import get_parser, get_parse_executor, shutdown_parse_executor
+from app.crawlers.nga_crawler import parse_nga_topics
+from app.crawlers.zhihu_crawler import parse_zhihu_billboard
+from app.crawlers.weibo_crawler import parse_weibo_realtime, parse_weibo_summary_page
+from app.crawlers.toutiao_crawler import parse_toutiao_hot_board, parse_toutiao_feed_page
+from app.crawlers.bilibili_crawler import parse_bilibili_ranking_api, parse_bilibili_rank_page
+from app.crawlers.hupu_crawler import parse_hupu_api, parse_hupu_page
+from app.crawlers.ithome_crawler import parse_ithome_page
+from app.crawlers.zol_crawler import parse_zol_home, parse_zol_news
+from app.crawlers.smzdm_crawler import parse_smzdm_top
+from app.crawlers.kr36_crawler import parse_kr36_hot_rank
+from app.crawlers.baidu_crawler import parse_baidu_realtime
+
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+BASELINE_FILE = Path(__file__).resolve().parent / "parse_baseline.json"
+
+
+@dataclass
+class ParseCase:
+    """一个解析用例：夹具文件、爬虫实际请求的地址和对应的解析函数"""
+    name: str
+    crawler: str
+    fixture: str
+    url: str
+    parse: Callable[[str], List[HotItem]]
+    method: str = "GET"
+    record_kwargs: Dict[str, Any] = field(default_factory=dict)
+
+
+CASES: List[ParseCase] = [
+    ParseCase(
+        "nga_zatan", "nga_zatan", "nga_zatan.json",
+        "https://ngabbs.com/nuke.php?__lib=load_topic&__act=load_topic_reply_ladder2&opt=1&all=1",
+        parse_nga_topics, method="POST", record_kwargs={"data": {"__output": "14"}},
+    ),
+    ParseCase(
+        "zhihu_hot", "zhihu_hot", "zhihu_hot.html",
+        "https://www.zhihu.com/billboard",
+        parse_zhihu_billboard,
+    ),
+    ParseCase(
+        "weibo_hot", "weibo_hot", "weibo_hot.json",
+        "https://weibo.com/ajax/side/hotSearch",
+        parse_weibo_realtime,
+    ),
+    ParseCase(
+        "weibo_hot_web", "weibo_hot", "weibo_hot_summary.html",
+        "https://s.weibo.com/top/summary",
+        partial(parse_weibo_summary_page, base_url="https://weibo.com"),
+    ),
+    ParseCase(
+        "toutiao_hot", "toutiao_hot", "toutiao_hot.json",
+        "https://www.toutiao.com/hot-event/hot-board/?origin=toutiao_pc",
+        partial(parse_toutiao_hot_board, base_url="https://www.toutiao.com"),
+    ),
+    ParseCase(
+        "toutiao_hot_web", "toutiao_hot", "toutiao_hot_feed.html",
+        "https://www.toutiao.com/",
+        partial(parse_toutiao_feed_page, base_url="https://www.toutiao.com"),
+    ),
+    ParseCase(
+        "bilibili_hot", "bilibili_hot", "bilibili_hot.json",
+        "https://api.bilibili.com/x/web-interface/ranking/v2?rid=0&type=all",
+        parse_bilibili_ranking_api,
+    ),
+    ParseCase(
+        "bilibili_hot_web", "bilibili_hot", "bilibili_hot_rank.html",
+        "https://www.bilibili.com/v/popular/rank/all",
+        partial(parse_bilibili_rank_page, base_url="https://www.bilibili.com"),
+    ),
+    ParseCase(
+        "hupu_hot", "hupu_hot", "hupu_hot_api.json",
+        "https://m.hupu.com/api/v2/bbs/topicThreads?topicId=1&page=1",
+        parse_hupu_api,
+    ),
+    ParseCase(
+        "hupu_hot_web", "hupu_hot", "hupu_hot.html",
+        "https://bbs.hupu.com/all-gambia",
+        partial(parse_hupu_page, url="https://bbs.hupu.com/all-gambia", base_url="https://bbs.hupu.com"),
+    ),
+    ParseCase(
+        "ithome_hot", "ithome_hot", "ithome_hot.html",
+        "https://m.ithome.com/rankm/",
+        partial(parse_ithome_page, url="https://m.ithome.com/rankm/", base_url="https://www.ithome.com"),
+    ),
+    ParseCase(
+        "zol_hot", "zol_hot", "zol_hot.html",
+        "https://www.zol.com.cn/",
+        partial(parse_zol_home, base_url="https://www.zol.com.cn"),
+    ),
+    ParseCase(
+        "zol_hot_news", "zol_hot", "zol_hot_news.html",
+        "https://news.zol.com.cn/",
+        partial(parse_zol_news, base_url="https://www.zol.com.cn", existing_urls=[], start_rank=1, limit=30),
+    ),
+    ParseCase(
+        "smzdm_hot", "smzdm_hot", "smzdm_hot.html",
+        "https://m.smzdm.com/top/",
+        parse_smzdm_top,
+    ),
+    ParseCase(
+        "kr36_hot", "kr36_hot", "kr36_hot.json",
+        "https://gateway.36kr.com/api/mis/nav/home/nav/rank/hot",
+        parse_kr36_hot_rank, method="POST",
+        record_kwargs={"json": {"partner_id": "wap", "param": {"siteId": 1, "platformId": 2}}},
+    ),
+    ParseCase(
+        "baidu_hot", "baidu_hot", "baidu_hot.html",
+        "https://top.baidu.com/board?tab=realtime",
+        parse_baidu_realtime,
+    ),
+]
+
+
+class StubSession(CrawlerSession):
+    """把爬虫请求改写到本地桩服务器，未录制的地址返回404"""
+
+    def __init__(self, session: aiohttp.ClientSession, headers: Dict[str, str], base_url: str):
+        super().__init__(session, headers)
+        self.base_url = base_url
+        self.routes = {case.url: case.fixture for case in CASES}
+
+    def request(self, method: str, url: str, **kwargs):
+        fixture = self.routes.get(url, "__missing__")
+        # 桩服务器不校验请求头，去掉爬虫写死的 Host/Content-Length 等头
+        kwargs.pop("headers", None)
+        return self._session.request(method, f"{self.base_url}/{fixture}", **kwargs)
+
+
+async def start_stub_server() -> web.AppRunner:
+    """启动桩服务器，按扩展名返回带字符集的 Content-Type"""
+    async def serve(request: web.Request) -> web.Response:
+        path = FIXTURES_DIR / request.match_info["fixture"]
+        if not path.is_file():
+            return web.Response(status=404)
+        content_type = "application/json" if path.suffix == ".json" else "text/html"
+        return web.Response(body=path.read_bytes(), content_type=content_type, charset="utf-8")
+
+    app = web.Application()
+    app.router.add_route("*", "/{fixture}", serve)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner
+
+
+def stub_base_url(runner: web.AppRunner) -> str:
+    host, port = runner.addresses[0][:2]
+    return f"http://{host}:{port}"
+
+
+def make_crawler(name: str, session: aiohttp.ClientSession, base_url: str):
+    crawler = crawler_manager.crawlers[name]()
+    crawler.session = StubSession(session, crawler.headers, base_url)
+    return crawler
+
+
+def measure_parse(case: ParseCase, text: str, repeat: int) -> Dict[str, Any]:
+    """计时与内存分开测量，避免 tracemalloc 的开销计入耗时"""
+    items = case.parse(text)  # 预热，同时记录解析条目数
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        case.parse(text)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    result = case.parse(text)
+    _, peak = tracemalloc.get_traced_memory()
+    # BeautifulSoup 文档树存在循环引用，回收后剩下的才是结果本身占用的内存
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    return {
+        "crawler": case.crawler,
+        "fixture_kib": round(len(text.encode("utf-8")) / 1024, 1),
+        "items": len(items),
+        "median_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "peak_kib": round((peak - before) / 1024, 1),
+        "retained_kib": round((current - before) / 1024, 1),
+    }
+
+
+async def run_parse_cases(cases: List[ParseCase], repeat: int) -> Dict[str, Dict[str, Any]]:
+    runner = await start_stub_server()
+    base_url = stub_base_url(runner)
+    results = {}
+    try:
+        async with aiohttp.ClientSession() as session:
+            for case in cases:
+                crawler = make_crawler(case.crawler, session, base_url)
+                text = await crawler.fetch(case.url, max_retries=1)
+                results[case.name] = measure_parse(case, text, repeat)
+    finally:
+        await runner.cleanup()
+    return results
+
+
+async def run_crawls(crawler_names: List[str]) -> Dict[str, Dict[str, Any]]:
+    """每个爬虫完整执行一次 crawl()，请求全部落到桩服务器"""
+    runner = await start_stub_server()
+    base_url = stub_base_url(runner)
+    results = {}
+    # 预先启动解析执行器，避免工作进程的启动时间计入第一个爬虫
+    await asyncio.get_running_loop().run_in_executor(get_parse_executor(), get_parser)
+    try:
+        async with aiohttp.ClientSession() as session:
+            for name in crawler_names:
+                crawler = make_crawler(name, session, base_url)
+                start = time.perf_counter()
+                items = await crawler.crawl()
+                results[name] = {
+                    "items": len(items),
+                    "crawl_ms": round((time.perf_counter() - start) * 1000, 1),
+                }
+    finally:
+        await runner.cleanup()
+        shutdown_parse_executor()
+    return results
+
+
+async def record(cases: List[ParseCase]):
+    """使用各爬虫自身的请求头从线上重新录制夹具"""
+    for case in cases:
+        crawler = crawler_manager.crawlers[case.crawler]()
+        try:
+            async with crawler:
+                async with crawler.session.request(case.method, case.url, **case.record_kwargs) as response:
+                    response.raise_for_status()
+                    text = await response.text()
+        except Exception as e:
+            print(f"  {case.name}: 录制失败 {e}")
+            continue
+        (FIXTURES_DIR / case.fixture).write_text(text, encoding="utf-8")
+        print(f"  {case.name}: 已保存 {case.fixture} ({len(text.encode('utf-8')) / 1024:.1f} KiB)")
+
+
+def print_results(parse_results: Dict[str, Dict[str, Any]], crawl_results: Dict[str, Dict[str, Any]]):
+    print(f"解析后端: {get_parser()}")
+    print(f"{'case':<17} | {'KiB':>6} | {'items':>5} | {'median ms':>9} | {'min ms':>8} | {'peak KiB':>8} | {'kept KiB':>8}")
+    print("-" * 80)
+    for name, r in parse_results.items():
+        print(f"{name:<17} | {r['fixture_kib']:>6.1f} | {r['items']:>5} | {r['median_ms']:>9.3f} | "
+              f"{r['min_ms']:>8.3f} | {r['peak_kib']:>8.1f} | {r['retained_kib']:>8.1f}")
+    if crawl_results:
+        print()
+        print(f"{'crawler':<17} | {'items':>5} | {'crawl ms':>9}")
+        print("-" * 38)
+        for name, r in crawl_results.items():
+            print(f"{name:<17} | {r['items']:>5} | {r['crawl_ms']:>9.1f}")
+
+
+def check_regressions(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Any],
+    tolerance: float,
+    min_delta_ms: float
+) -> List[str]:
+    """与基线比较，返回超出阈值的回归描述"""
+    failures = []
+    if baseline.get("parser") != get_parser():
+        print(f"  警告: 基线使用的解析后端为 {baseline.get('parser')}，当前为 {get_parser()}")
+    for name, current in results.items():
+        base = baseline["cases"].get(name)
+        if not base:
+            print(f"  警告: 基线中没有用例 {name}，请更新基线")
+            continue
+        # 以最小值比较，受调度噪声影响比中位数小；极快的用例还要求绝对差值超过 min_delta_ms
+        slower = current["min_ms"] - base["min_ms"]
+        if current["min_ms"] > base["min_ms"] * (1 + tolerance) and slower > min_delta_ms:
+            failures.append(f"{name}: 解析耗时 {base['min_ms']:.3f} -> {current['min_ms']:.3f} ms")
+        if current["peak_kib"] > base["peak_kib"] * (1 + tolerance) and current["peak_kib"] - base["peak_kib"] > 64:
+            failures.append(f"{name}: 峰值内存 {base['peak_kib']:.1f} -> {current['peak_kib']:.1f} KiB")
+        if current["items"] < base["items"]:
+            failures.append(f"{name}: 解析条目 {base['items']} -> {current['items']}")
+    return failures
+
+
+async def main(args) -> int:
+    cases = CASES
+    if args.only:
+        selected = set(args.only.split(","))
+        cases = [case for case in CASES if case.name in selected or case.crawler in selected]
+
+    if args.record:
+        await record(cases)
+        return 0
+
+    parse_results = await run_parse_cases(cases, args.repeat)
+    crawl_results = {} if args.skip_crawl else await run_crawls(
+        list(dict.fromkeys(case.crawler for case in cases))
+    )
+    print_results(parse_results, crawl_results)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(
+            {"parse": parse_results, "crawl": crawl_results}, ensure_ascii=False, indent=2
+        ), encoding="utf-8")
+
+    if args.update_baseline:
+        BASELINE_FILE.write_text(json.dumps({
+            "parser": get_parser(),
+            "python": platform.python_version(),
+            "repeat": args.repeat,
+            "cases": parse_results,
+        }, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"\n基线已更新: {BASELINE_FILE}")
+        return 0
+
+    if args.check:
+        if not BASELINE_FILE.exists():
+            print(f"\n未找到基线文件 {BASELINE_FILE}，请先运行 --update-baseline")
+            return 2
+        baseline = json.loads(BASELINE_FILE.read_text(encoding="utf-8"))
+        failures = check_regressions(parse_results, baseline, args.tolerance, args.min_delta_ms)
+        if failures:
+            print("\n解析性能回归:")
+            for failure in failures:
+                print(f"  {failure}")
+            return 1
+        print("\n未发现解析性能回归")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="爬虫解析性能基准")
+    parser.add_argument("--repeat", type=int, default=20, help="每个用例的计时次数（取中位数）")
+    parser.add_argument("--only", help="只运行指定的用例或爬虫，逗号分隔")
+    parser.add_argument("--skip-crawl", action="store_true", help="跳过完整 crawl() 流程")
+    parser.add_argument("--output", help="把结果写入JSON文件")
+    parser.add_argument("--check", action="store_true", help="与基线比较，出现回归时退出码为1")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="允许的相对退化比例")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="判定变慢所需的最小绝对差值（毫秒）")
+    parser.add_argument("--update-baseline", action="store_true", help="用本次结果覆盖基线")
+    parser.add_argument("--record", action="store_true", help="从线上重新录制夹具")
+    args = parser.parse_args()
+
+    # 解析函数的逐条日志会干扰计时输出
+    logging.basicConfig(level=logging.ERROR)
+    sys.exit(asyncio.run(main(args)))
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""热榜入库性能对比：逐条查询循环 vs 批量 upsert
+
+使用当前配置的 DATABASE_URL，在临时平台下分别以每分类 30/300/3000 条数据运行：
+  1. 首次写入（全部为新条目）
+  2. 再次写入（全部为已存在条目，排名打乱）
+结束后删除临时平台及其数据。
+
+用法: python benchmarks/bench_save_to_database.py [--sizes 30,300,3000] [--repeat 3]
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import select, delete, desc
+
+from app.core.database import AsyncSessionLocal, engine, Base, ensure_schema
+from app.crawlers.base import HotItem
+from app.crawlers.crawler_manager import crawler_manager
+from app.models.platform import Platform
+from app.models.hot_item import HotItem as HotItemModel
+
+
+BENCH_PLATFORM = "bench_save"
+
+
+def make_items(size: int, shuffle: bool = False) -> List[HotItem]:
+    """生成测试条目"""
+    ranks = list(range(1, size + 1))
+    if shuffle:
+        random.shuffle(ranks)
+    return [
+        HotItem(
+            title=f"基准测试条目 {i}",
+            url=f"https://bench.example.com/item/{i}",
+            rank=ranks[i],
+            hot_value=str(random.randint(1000, 10_000_000)),
+            comment_count=random.randint(0, 5000),
+            publish_time=datetime.now(),
+        )
+        for i in range(size)
+    ]
+
+
+async def legacy_save(db, category_id: int, items: List[HotItem], keep: int) -> Dict[str, int]:
+    """原有实现：先查已有URL，再对每个已存在条目单独查询更新"""
+    stmt = select(HotItemModel.url).where(HotItemModel.category_id == category_id)
+    result = await db.execute(stmt)
+    existing_urls = {row[0] for row in result.fetchall()}
+
+    new_items_count = 0
+    updated_items_count = 0
+    for item in items:
+        if item.url in existing_urls:
+            stmt = select(HotItemModel).where(
+                HotItemModel.category_id == category_id,
+                HotItemModel.url == item.url
+            )
+            result = await db.execute(stmt)
+            existing_item = result.scalars().first()
+            if existing_item:
+                existing_item.rank_position = item.rank
+                existing_item.score = int(item.hot_value) if item.hot_value and item.hot_value.isdigit() else 0
+                existing_item.comment_count = item.comment_count or 0
+                existing_item.crawled_at = datetime.now()
+                updated_items_count += 1
+        else:
+            db.add(HotItemModel(
+                category_id=category_id,
+                title=item.title,
+                url=item.url,
+                rank_position=item.rank,
+                score=int(item.hot_value) if item.hot_value and item.hot_value.isdigit() else 0,
+                comment_count=item.comment_count or 0,
+                published_at=item.publish_time,
+                crawled_at=datetime.now()
+            ))
+            new_items_count += 1
+
+    stmt = select(HotItemModel.id).where(
+        HotItemModel.category_id == category_id
+    ).order_by(desc(HotItemModel.crawled_at)).offset(keep)
+    result = await db.execute(stmt)
+    old_item_ids = [row[0] for row in result.fetchall()]
+    if old_item_ids:
+        await db.execute(delete(HotItemModel).where(HotItemModel.id.in_(old_item_ids)))
+
+    return {"inserted": new_items_count, "updated": updated_items_count, "pruned": len(old_item_ids)}
+
+
+async def bulk_save(db, category_id: int, items: List[HotItem], keep: int) -> Dict[str, int]:
+    """新实现：每个分类一条 INSERT ... ON CONFLICT"""
+    return await crawler_manager._bulk_upsert_items(db, category_id, items, keep=keep)
+
+
+async def run_case(name: str, save_func, size: int) -> Dict[str, float]:
+    """在独立分类中执行首次写入和再次写入，返回耗时（毫秒）"""
+    async with AsyncSessionLocal() as db:
+        platform = await crawler_manager._get_or_create_platform(db, BENCH_PLATFORM)
+        category = await crawler_manager._get_or_create_category(db, platform.id, f"{name}_{size}")
+        await db.execute(delete(HotItemModel).where(HotItemModel.category_id == category.id))
+        await db.commit()
+
+        timings = {}
+        for phase, items in (("insert", make_items(size)), ("update", make_items(size, shuffle=True))):
+            start = time.perf_counter()
+            counts = await save_func(db, category.id, items, size)
+            await db.commit()
+            timings[phase] = (time.perf_counter() - start) * 1000
+            expected = "inserted" if phase == "insert" else "updated"
+            if counts[expected] != size:
+                print(f"  警告: {name} {phase} 统计异常: {counts}")
+        return timings
+
+
+async def cleanup():
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Platform).where(Platform.name == BENCH_PLATFORM))
+        await db.commit()
+
+
+async def main(sizes: List[int], repeat: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await ensure_schema(conn)
+
+    print(f"{'size':>6} | {'impl':>6} | {'insert ms':>10} | {'update ms':>10}")
+    print("-" * 44)
+    try:
+        for size in sizes:
+            results = {}
+            for name, func in (("legacy", legacy_save), ("bulk", bulk_save)):
+                runs = [await run_case(name, func, size) for _ in range(repeat)]
+                results[name] = {
+                    phase: min(run[phase] for run in runs) for phase in ("insert", "update")
+                }
+                print(f"{size:>6} | {name:>6} | {results[name]['insert']:>10.1f} | {results[name]['update']:>10.1f}")
+            speedup = results["legacy"]["update"] / max(results["bulk"]["update"], 0.001)
+            print(f"{'':>6} | update 提速 {speedup:.1f}x")
+    finally:
+        await cleanup()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="热榜入库性能对比")
+    parser.add_argument("--sizes", default="30,300,3000", help="每个分类的条目数，逗号分隔")
+    parser.add_argument("--repeat", type=int, default=3, help="每组重复次数（取最小值）")
+    args = parser.parse_args()
+    asyncio.run(main([int(s) for s in args.sizes.split(",")], args.repeat))
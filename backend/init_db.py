@@ -1,5 +1,5 @@
 import asyncio
-from app.core.database import engine, Base
+from app.core.database import engine, Base, ensure_schema
 from loguru import logger
 
 async def init_database():
@@ -7,6 +7,7 @@ async def init_database():
     try:
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            await ensure_schema(conn)
         logger.info("Database initialized successfully")
         print("数据库初始化成功")
     except Exception as e:
@@ -0,0 +1,88 @@
+"""标题近似重复的增量索引"""
+import pytest
+
+from app.services.cluster_service import StoryIndex, jaccard, title_shingles
+
+
+def entry(item_id, title, rank=1, heat=0.5):
+    return {"id": item_id, "title": title, "url": f"http://x/{item_id}", "rank": rank, "heat": heat}
+
+
+@pytest.fixture
+def index():
+    return StoryIndex(num_perm=60, bands=30, similarity=0.4)
+
+
+def test_title_shingles_ignores_punctuation_and_case():
+    assert title_shingles("A-B c！") == title_shingles("abc")
+    assert title_shingles("好") == {"好"}
+    assert title_shingles("！？") == set()
+    assert jaccard({"ab", "bc"}, {"ab"}) == 0.5
+
+
+def test_similar_titles_share_a_cluster(index):
+    index.update("weibo", "hot", [entry(1, "美国宣布对华加征关税", heat=0.9), entry(2, "今天天气不错")])
+    touched = index.update("baidu", "hot", [entry(3, "美宣布对华加征关税 外交部回应", heat=0.8)])
+
+    assert index.members[3].cluster_id == index.members[1].cluster_id
+    assert index.members[2].cluster_id != index.members[1].cluster_id
+    assert touched == {index.members[1].cluster_id}
+
+    clusters = index.story_clusters()
+    assert len(clusters) == 1
+    assert clusters[0]["platforms"] == ["weibo", "baidu"]
+    assert clusters[0]["heat"] == pytest.approx(1.7)
+    assert [item["title"] for item in clusters[0]["items"]][0] == "美国宣布对华加征关税"
+
+
+def test_same_platform_counts_once(index):
+    index.update("weibo", "hot", [entry(1, "台风杜苏芮登陆福建", heat=0.6)])
+    index.update("weibo", "realtime", [entry(2, "台风杜苏芮登陆福建晋江", heat=0.4)])
+    cluster = index.cluster_summary(index.members[1].cluster_id)
+    assert cluster["platform_count"] == 1
+    assert cluster["heat"] == pytest.approx(0.6)
+
+
+def test_dropped_items_are_removed(index):
+    index.update("weibo", "hot", [entry(1, "某明星官宣结婚")])
+    index.update("zhihu", "hot", [entry(2, "某明星官宣结婚，你怎么看？")])
+    cluster_id = index.members[1].cluster_id
+    assert index.cluster_summary(cluster_id) is not None
+
+    touched = index.update("zhihu", "hot", [])
+    assert touched == {cluster_id}
+    assert 2 not in index.members
+    assert index.cluster_summary(cluster_id) is None
+    assert index.story_clusters() == []
+    assert all(2 not in bucket for bucket in index.buckets.values())
+
+    index.update("weibo", "hot", [])
+    assert index.members == {} and index.clusters == {} and index.buckets == {}
+
+
+def test_rank_changes_touch_cluster_and_title_changes_recluster(index):
+    index.update("weibo", "hot", [entry(1, "美国宣布对华加征关税", rank=1)])
+    cluster_id = index.members[1].cluster_id
+    assert index.update("weibo", "hot", [entry(1, "美国宣布对华加征关税", rank=1)]) == set()
+    assert index.update("weibo", "hot", [entry(1, "美国宣布对华加征关税", rank=2)]) == {cluster_id}
+    assert index.members[1].rank == 2
+
+    touched = index.update("weibo", "hot", [entry(1, "股市今日大涨")])
+    assert cluster_id in touched
+    assert index.members[1].title == "股市今日大涨"
+    assert index.members[1].cluster_id != cluster_id
+
+
+def test_titles_without_text_are_not_indexed(index):
+    assert index.update("weibo", "hot", [entry(1, "！！！")]) == set()
+    assert index.members == {}
+
+
+def test_cluster_ids_are_namespaced():
+    first = StoryIndex(num_perm=60, bands=30, similarity=0.4, namespace="1")
+    second = StoryIndex(num_perm=60, bands=30, similarity=0.4, namespace="2")
+    first.update("weibo", "hot", [entry(1, "美国宣布对华加征关税")])
+    second.update("weibo", "hot", [entry(1, "美国宣布对华加征关税")])
+
+    assert first.members[1].cluster_id == "1-1"
+    assert second.members[1].cluster_id == "2-1"
@@ -0,0 +1,48 @@
+"""热榜快照差异"""
+from app.services.hot_list_stream import diff_platform
+
+
+def item(item_id, rank):
+    return {"id": item_id, "title": f"t{item_id}", "url": f"http://x/{item_id}", "rank_position": rank}
+
+
+def document(categories, success=True):
+    return {
+        "success": success,
+        "data": {
+            "categories": [
+                {"category": {"name": name}, "items": items}
+                for name, items in categories.items()
+            ]
+        },
+    }
+
+
+def test_diff_reports_entered_left_and_moved():
+    previous = document({"hot": [item("a", 1), item("b", 2), item("c", 3)]})
+    current = document({"hot": [item("b", 1), item("a", 2), item("d", 3)]})
+
+    [diff] = diff_platform(previous, current)
+    assert diff["category"] == "hot"
+    assert [entry["id"] for entry in diff["entered"]] == ["d"]
+    assert diff["left"] == [{"id": "c", "title": "tc", "url": "http://x/c"}]
+    assert {(entry["id"], entry["from"], entry["to"]) for entry in diff["moved"]} == {("a", 1, 2), ("b", 2, 1)}
+
+
+def test_unchanged_categories_are_omitted():
+    previous = document({"hot": [item("a", 1)], "new": [item("b", 1)]})
+    current = document({"hot": [item("a", 1)], "new": [item("c", 1)]})
+    assert [diff["category"] for diff in diff_platform(previous, current)] == ["new"]
+
+
+def test_missing_or_failed_previous_treats_everything_as_entered():
+    current = document({"hot": [item("a", 1), item("b", 2)]})
+    for previous in (None, document({"hot": [item("a", 1)]}, success=False)):
+        [diff] = diff_platform(previous, current)
+        assert [entry["id"] for entry in diff["entered"]] == ["a", "b"]
+        assert diff["left"] == [] and diff["moved"] == []
+
+
+def test_failed_current_has_no_diff():
+    previous = document({"hot": [item("a", 1)]})
+    assert diff_platform(previous, document({}, success=False)) == []
@@ -0,0 +1,47 @@
+"""热度文本解析"""
+import pytest
+
+from app.crawlers.hot_value import MAX_SCORE, normalize_hot_values, parse_hot_value
+
+
+# 样例文本 -> 期望的热度分数
+EXPECTED = {
+    "2345678": 2345678,
+    "1.2万": 12000,
+    "345万播放": 3450000,
+    "3.5亿": 350000000,
+    "12w": 120000,
+    "1,234评论": 1234,
+    "10-20万": 150000,
+    "1万~3万": 20000,
+    "热度 98.6万": 986000,
+    "热": 0,
+    "": 0,
+    None: 0,
+    "50亿": MAX_SCORE,
+    "1,234,567": 1234567,
+    "TOP3 120万": 1200000,
+    "5 weeks": 5,
+    "5weeks": 5,
+    "3k": 3000,
+    "2024-10-17": 0,
+    "更新于 12:30": 0,
+    "²": 0,
+    "１２３": 123,
+}
+
+
+@pytest.mark.parametrize("text, expected", list(EXPECTED.items()))
+def test_parse_hot_value(text, expected):
+    assert parse_hot_value(text) == expected
+
+
+def test_parse_numeric_input():
+    assert parse_hot_value(1500) == 1500
+    assert parse_hot_value(-3) == 0
+    assert parse_hot_value(2.0 ** 40) == MAX_SCORE
+
+
+def test_normalize_matches_per_item_parsing():
+    values = list(EXPECTED) * 3
+    assert normalize_hot_values(values) == [parse_hot_value(value) for value in values]
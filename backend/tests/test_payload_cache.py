@@ -0,0 +1,86 @@
+"""预编码响应体与缓存键"""
+import gzip
+import inspect
+from datetime import datetime, timezone
+
+from app.core.payload import MIN_COMPRESS_SIZE, EncodedPayload
+from app.core.redis import build_cache_key
+
+
+def large_document(**extra):
+    return {
+        "success": True,
+        "data": {"items": [{"title": f"条目{index}", "rank": index} for index in range(200)]},
+        "snapshot": {"version": 3, "generated_at": "2024-10-17T08:00:00+00:00"},
+        **extra,
+    }
+
+
+def test_compressed_variants_round_trip_through_mapping():
+    payload = EncodedPayload.from_document(large_document()).compress()
+    assert len(payload) > MIN_COMPRESS_SIZE
+    restored = EncodedPayload.from_mapping(payload.to_mapping())
+
+    assert restored.body == payload.body
+    assert restored.etag == payload.etag
+    assert restored.last_modified == datetime(2024, 10, 17, 8, tzinfo=timezone.utc)
+    body, encoding = restored.encode("gzip, deflate")
+    assert encoding == "gzip"
+    assert gzip.decompress(body) == payload.body
+
+
+def test_encode_respects_accept_encoding():
+    payload = EncodedPayload.from_document(large_document()).compress()
+    assert payload.encode("") == (payload.body, None)
+    assert payload.encode("gzip;q=0") == (payload.body, None)
+    assert payload.encode("*")[1] is not None
+
+
+def test_uncompressed_and_small_payloads_are_sent_as_is():
+    assert EncodedPayload.from_document(large_document()).encode("gzip")[1] is None
+    small = EncodedPayload.from_document({"success": True}).compress()
+    assert small.encode("gzip") == (small.body, None)
+    assert "gzip" not in small.to_mapping()
+
+
+def test_conditional_requests():
+    payload = EncodedPayload.from_document(large_document())
+    assert payload.is_not_modified(payload.etag, None)
+    assert payload.is_not_modified(payload.etag[2:], None)
+    assert not payload.is_not_modified('W/"other"', None)
+    assert payload.is_not_modified(None, "Thu, 17 Oct 2024 08:00:00 GMT")
+    assert not payload.is_not_modified(None, "Thu, 17 Oct 2024 07:59:59 GMT")
+    assert "Last-Modified" in payload.headers()
+
+
+def test_failed_documents_are_not_cacheable():
+    payload = EncodedPayload.from_document({"success": False, "error": "x", "data": None})
+    assert not payload.cacheable
+    assert payload.headers() == {"Cache-Control": "no-store"}
+    assert not payload.is_not_modified("*", None)
+    assert EncodedPayload.from_document(large_document()).cacheable
+
+
+class Service:
+    async def get_list(self, platform_name: str, hours: int = 24, db=None):
+        pass
+
+
+SIGNATURE = inspect.signature(Service.get_list)
+
+
+def test_cache_key_is_stable_and_ignores_self():
+    first = build_cache_key("hot_list:platform", SIGNATURE, (Service(), "zhihu"), {})
+    second = build_cache_key("hot_list:platform", SIGNATURE, (Service(),), {"platform_name": "zhihu", "hours": 24})
+    assert first == second
+    assert first.startswith("hot_list:platform:")
+
+
+def test_cache_key_depends_on_arguments():
+    keys = {
+        build_cache_key("hot_list:platform", SIGNATURE, (Service(), "zhihu"), {}),
+        build_cache_key("hot_list:platform", SIGNATURE, (Service(), "weibo"), {}),
+        build_cache_key("hot_list:platform", SIGNATURE, (Service(), "zhihu", 48), {}),
+        build_cache_key("hot_list:category", SIGNATURE, (Service(), "zhihu"), {}),
+    }
+    assert len(keys) == 4
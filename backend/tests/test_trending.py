@@ -0,0 +1,55 @@
+"""热门趋势的批次热度计算"""
+from app.core.config import settings
+from app.services.trending_service import score_batch
+
+
+def make_rows(count):
+    return [
+        {"url": f"http://x/{rank}", "title": f"t{rank}", "rank_position": rank, "score": (count - rank + 1) * 100}
+        for rank in range(1, count + 1)
+    ]
+
+
+def key_ids_for(rows):
+    return {row["url"]: index for index, row in enumerate(rows, 1)}
+
+
+def test_first_crawl_has_no_velocity():
+    rows = make_rows(10)
+    entries = score_batch(rows, {}, key_ids_for(rows))
+    assert [entry["velocity"] for entry in entries] == [0.0] * 10
+    heats = [entry["heat"] for entry in entries]
+    assert heats == sorted(heats, reverse=True)
+    assert all(0 < heat <= 1 for heat in heats)
+
+
+def test_rising_item_gets_positive_velocity():
+    rows = make_rows(10)
+    previous = {row["url"]: row["rank_position"] for row in rows}
+    previous["http://x/3"] = 9
+    entries = {entry["url"]: entry for entry in score_batch(rows, previous, key_ids_for(rows))}
+    assert entries["http://x/3"]["velocity"] > 0
+    assert entries["http://x/1"]["velocity"] == 0
+    assert entries["http://x/3"]["heat"] <= 1 + settings.TRENDING_VELOCITY_WEIGHT
+
+
+def test_new_item_enters_from_bottom():
+    rows = make_rows(5)
+    previous = {row["url"]: row["rank_position"] for row in rows[1:]}
+    entries = {entry["url"]: entry for entry in score_batch(rows, previous, key_ids_for(rows))}
+    assert entries["http://x/1"]["velocity"] == 1.0
+
+
+def test_rows_without_key_id_are_skipped():
+    rows = make_rows(4)
+    key_ids = key_ids_for(rows)
+    del key_ids["http://x/2"]
+    entries = score_batch(rows, {}, key_ids)
+    assert [entry["id"] for entry in entries] == [1, 3, 4]
+    assert score_batch(rows, {}, {}) == []
+
+
+def test_missing_scores_use_rank_only():
+    rows = [{**row, "score": 0} for row in make_rows(4)]
+    entries = score_batch(rows, {}, key_ids_for(rows))
+    assert [entry["heat"] for entry in entries] == [1.0, 0.75, 0.5, 0.25]
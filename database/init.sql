@@ -38,9 +38,11 @@ CREATE TABLE hot_items (
     description TEXT,
     author VARCHAR(100),
     score INTEGER DEFAULT 0,
+    hot_value VARCHAR(100),
     comment_count INTEGER DEFAULT 0,
     rank_position INTEGER,
     source_id VARCHAR(100), -- 原平台的ID
+    item_key_id INTEGER, -- 排名历史条目ID（hot_item_keys.id）
     tags TEXT[], -- 标签数组
     published_at TIMESTAMP WITH TIME ZONE,
     crawled_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
@@ -48,6 +50,28 @@ CREATE TABLE hot_items (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- 热榜条目历史的维度表（每个出现过的 (分类, URL) 一个整数ID）
+CREATE TABLE hot_item_keys (
+    id SERIAL PRIMARY KEY,
+    category_id INTEGER NOT NULL REFERENCES categories(id) ON DELETE CASCADE,
+    url VARCHAR(2000) NOT NULL,
+    title VARCHAR(500) NOT NULL, -- 最近一次的标题
+    first_seen_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    last_seen_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_hot_item_keys_category_url UNIQUE (category_id, url)
+);
+
+-- 热榜条目排名历史（只追加），按爬取时间以天（UTC）为单位范围分区，
+-- 分区由后端启动时和每日清理任务创建，过期分区整体删除
+CREATE TABLE hot_item_snapshots (
+    item_key_id INTEGER NOT NULL,
+    crawled_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    rank_position SMALLINT NOT NULL,
+    score INTEGER NOT NULL DEFAULT 0,
+    comment_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (item_key_id, crawled_at)
+) PARTITION BY RANGE (crawled_at);
+
 -- 爬取任务表
 CREATE TABLE crawl_tasks (
     id SERIAL PRIMARY KEY,
@@ -57,9 +81,36 @@ CREATE TABLE crawl_tasks (
     completed_at TIMESTAMP WITH TIME ZONE,
     items_count INTEGER DEFAULT 0,
     error_message TEXT,
+    -- 运行记录
+    crawler_name VARCHAR(50),
+    trigger VARCHAR(20), -- scheduled, manual, warm
+    items_inserted INTEGER DEFAULT 0,
+    items_updated INTEGER DEFAULT 0,
+    requests_count INTEGER DEFAULT 0,
+    bytes_downloaded BIGINT DEFAULT 0,
+    error_class VARCHAR(100),
+    -- 各阶段耗时（毫秒）
+    dns_ms INTEGER,
+    connect_ms INTEGER,
+    crawl_ms INTEGER,
+    parse_ms INTEGER,
+    queue_wait_ms INTEGER,
+    persist_ms INTEGER,
+    snapshot_ms INTEGER,
+    invalidate_ms INTEGER,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- 热榜快照表（爬取后预生成的响应文档）
+CREATE TABLE hot_list_snapshots (
+    id SERIAL PRIMARY KEY,
+    scope VARCHAR(200) NOT NULL UNIQUE, -- all, platform:<name>, category:<platform>/<category>
+    version INTEGER NOT NULL DEFAULT 1,
+    payload TEXT NOT NULL,
+    generated_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
 -- 用户表（用于管理后台）
 CREATE TABLE users (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -78,8 +129,10 @@ CREATE INDEX idx_hot_items_category_id ON hot_items(category_id);
 CREATE INDEX idx_hot_items_crawled_at ON hot_items(crawled_at);
 CREATE INDEX idx_hot_items_rank_position ON hot_items(rank_position);
 CREATE INDEX idx_hot_items_published_at ON hot_items(published_at);
+CREATE UNIQUE INDEX uq_hot_items_category_url ON hot_items(category_id, url);
 CREATE INDEX idx_crawl_tasks_category_id ON crawl_tasks(category_id);
 CREATE INDEX idx_crawl_tasks_status ON crawl_tasks(status);
+CREATE INDEX ix_crawl_tasks_crawler_name_id ON crawl_tasks(crawler_name, id);
 
 -- 插入初始平台数据
 INSERT INTO platforms (name, display_name, base_url, description) VALUES
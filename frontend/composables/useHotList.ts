@@ -1,4 +1,4 @@
-import type { HotItem, Platform, Category, HotItemsQuery, PaginatedResponse, TrendingItem, SearchResult, Statistics, PlatformStats } from '~/types'
+import type { HotItem, Platform, Category, HotItemsQuery, PaginatedResponse, TrendingItem, SearchResult, Statistics, PlatformStats, HotListDiff } from '~/types'
 
 export const useHotList = () => {
   const { $api } = useNuxtApp()
@@ -165,6 +165,47 @@ export const useHotList = () => {
     }
   }
   
+  // 订阅热榜变化推送（Server-Sent Events），返回取消订阅函数
+  // 断线由浏览器自动重连；收到 resync 时说明推送有积压，应重新拉取完整热榜
+  // 连接出错或浏览器不支持时调用 onError，（重新）连接成功时调用 onOpen，调用方据此切换到轮询
+  const subscribeHotListStream = (
+    handlers: {
+      onDiff: (diff: HotListDiff) => void
+      onResync?: () => void
+      onOpen?: () => void
+      onError?: () => void
+    },
+    platformNames: string[] = []
+  ) => {
+    if (!process.client || typeof EventSource === 'undefined') {
+      handlers.onError?.()
+      return () => {}
+    }
+    
+    const config = useRuntimeConfig()
+    const query = platformNames.length ? `?platforms=${encodeURIComponent(platformNames.join(','))}` : ''
+    const source = new EventSource(`${config.public.apiBase}/api/v1/hot/stream${query}`)
+    
+    source.addEventListener('diff', (event) => {
+      try {
+        handlers.onDiff(JSON.parse((event as MessageEvent).data) as HotListDiff)
+      } catch (err) {
+        console.error('Hot list stream parse error:', err)
+      }
+    })
+    source.addEventListener('resync', () => {
+      handlers.onResync?.()
+    })
+    source.addEventListener('open', () => {
+      handlers.onOpen?.()
+    })
+    source.addEventListener('error', () => {
+      handlers.onError?.()
+    })
+    
+    return () => source.close()
+  }
+  
   // 获取单个热门条目
   const fetchHotItem = async (id: number) => {
     try {
@@ -367,6 +408,7 @@ export const useHotList = () => {
     fetchAllHotLists,
     fetchPlatformHotList,
     fetchCategoryHotList,
+    subscribeHotListStream,
     fetchHotItem,
     fetchTodayTrending,
     fetchWeekTrending,
@@ -152,6 +152,29 @@ export interface TrendingItem extends HotItem {
   growth_rate: number
 }
 
+// 热榜推送差异类型（/api/v1/hot/stream 的 diff 事件）
+export interface HotListDiffItem {
+  id: string
+  title: string
+  url?: string
+  rank_position?: number
+  score?: number
+}
+
+export interface HotListCategoryDiff {
+  category: string
+  entered: HotListDiffItem[]
+  left: HotListDiffItem[]
+  moved: (HotListDiffItem & { from: number; to: number })[]
+}
+
+export interface HotListDiff {
+  platform: string
+  version: number
+  generated_at: string
+  categories: HotListCategoryDiff[]
+}
+
 // 搜索结果类型
 export interface SearchResult {
   hot_items: HotItem[]